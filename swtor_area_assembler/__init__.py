@@ -1,7 +1,13 @@
 import sys
 import importlib
 
-import bpy
+# Outside Blender (the preprocessing stage's worker processes, command
+# line tools) only this package's bpy-free modules are used, so the
+# add-on's modules are neither loaded nor registered.
+try:
+    import bpy
+except ImportError:
+    bpy = None
 
 # Add-on Metadata
 
@@ -21,37 +27,41 @@ bl_info = {
 # Simplifies coding the loading of the modules to keeping a list of their names
 # (See https://b3d.interplanety.org/en/creating-multifile-add-on-for-blender/ )
 
-# Determine Blender version
-blender_version_major_number, blender_version_minor_number , _ = bpy.app.version
+if bpy is not None:
 
-if blender_version_major_number == 4:
-    modulesNames = [
-        'preferences',
-        'area_import_4',
-        'process_named_mats_4',
-        'area_collections_exclude_include',
-        'ui',
-        ]
-else:
-    modulesNames = [
-        'preferences',
-        'area_import',
-        'process_named_mats',
-        'area_collections_exclude_include',
-        'ui',
-        ]
+    # Determine Blender version
+    blender_version_major_number, blender_version_minor_number , _ = bpy.app.version
 
+    if blender_version_major_number == 4:
+        modulesNames = [
+            'preferences',
+            'area_import_4',
+            'process_named_mats_4',
+            'area_collections_exclude_include',
+            'cache_tools',
+            'ui',
+            ]
+    else:
+        modulesNames = [
+            'preferences',
+            'area_import',
+            'process_named_mats',
+            'area_collections_exclude_include',
+            'cache_tools',
+            'ui',
+            ]
 
-modulesFullNames = {}
-for currentModuleName in modulesNames:
-    modulesFullNames[currentModuleName] = ('{}.{}'.format(__name__, currentModuleName))
 
-for currentModuleFullName in modulesFullNames.values():
-    if currentModuleFullName in sys.modules:
-        importlib.reload(sys.modules[currentModuleFullName])
-    else:
-        globals()[currentModuleFullName] = importlib.import_module(currentModuleFullName)
-        setattr(globals()[currentModuleFullName], 'modulesNames', modulesFullNames)
+    modulesFullNames = {}
+    for currentModuleName in modulesNames:
+        modulesFullNames[currentModuleName] = ('{}.{}'.format(__name__, currentModuleName))
+
+    for currentModuleFullName in modulesFullNames.values():
+        if currentModuleFullName in sys.modules:
+            importlib.reload(sys.modules[currentModuleFullName])
+        else:
+            globals()[currentModuleFullName] = importlib.import_module(currentModuleFullName)
+            setattr(globals()[currentModuleFullName], 'modulesNames', modulesFullNames)
 
 
 def register():
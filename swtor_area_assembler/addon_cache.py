@@ -0,0 +1,46 @@
+# Location of the Area Assembler's on-disk caches.
+#
+# No bpy here: the folder's path is read from the add-on's
+# preferences by the operators and passed in.
+
+import hashlib
+import os
+import tempfile
+
+
+DEFAULT_CACHE_FOLDERNAME = "swtor_area_assembler_cache"
+
+
+def get_cache_folderpath(cache_folderpath="", subfolder=None):
+    """
+    Returns the path to the Area Assembler's cache folder (or to one of its
+    subfolders), creating it if needed. An empty cache_folderpath means
+    using a subfolder of the Operating System's temporary files folder.
+    """
+    if not cache_folderpath:
+        cache_folderpath = os.path.join(tempfile.gettempdir(), DEFAULT_CACHE_FOLDERNAME)
+    if subfolder:
+        cache_folderpath = os.path.join(cache_folderpath, subfolder)
+    os.makedirs(cache_folderpath, exist_ok=True)
+    return cache_folderpath
+
+
+def file_signature(filepath):
+    # (size, mtime) of a file, or None if it doesn't exist.
+    # Cheap enough to key caches with.
+    try:
+        stat = os.stat(filepath)
+    except OSError:
+        return None
+    return (stat.st_size, stat.st_mtime_ns)
+
+
+def cache_key(text):
+    # Short, filename-safe key identifying something (such as the
+    # resources' location) in the names of the caches that depend on it.
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+def folder_cache_key(folderpath):
+    # cache_key() of a folder's normalized path.
+    return cache_key(os.path.normcase(os.path.abspath(folderpath)))
@@ -0,0 +1,209 @@
+# Offline analyzer of areas.
+#
+# Tells what importing some areas would involve without importing them
+# (and without Blender): which assets they use and how many instances
+# of each, which references can't be resolved and which files are
+# missing, and roughly how much memory their meshes and textures take,
+# estimated from the .gr2 objects' and .dds textures' headers. Useful
+# to plan and budget the import of whole worlds in seconds rather than
+# finding out after a long import.
+#
+# From the command line:
+#   python -m swtor_area_assembler.area_analyzer <area .json files…>
+#       --resources <resources folder> [--archives <.zip/.tor or folder>]
+#       [--cache <folder>] [--keep-dbo] [--top N] [--parallel] [--json]
+#
+# No bpy here.
+
+import argparse
+import json
+import os
+import sys
+from collections import Counter
+
+from .area_preprocess import preprocess_area_files
+from .dds_header import DDS_HEADER_SIZE, parse_dds_header, dds_memory_size
+from .element_kinds import KIND_MESH, KIND_MAG, KIND_SPN, KIND_DBO, KIND_TERRAIN, classify_elements
+from .gr2_header import read_gr2_headers
+from .prefetch import mat_texture_filepaths, prefetch_mat_trees, read_concurrently, PREFETCH_MAX_WORKERS
+from .resources_vfs import open_resources_vfs
+from .import_plan import terrain_asset_path
+from .working_set import MAT_FOLDERPATH
+
+
+# .gr2 indices are uint16.
+GR2_INDEX_SIZE = 2
+
+
+def analyze_areas(json_filepaths, spn_table_filepath, dyn_zip_filepath, resources,
+                  skip_dbo_objects=True, use_process_pool=False, index_cache_folderpath=None,
+                  max_workers=PREFETCH_MAX_WORKERS):
+    """
+    Analyzes the given area .json files, resolving their references
+    like the importer does and reading assets from resources (a
+    ResourcesVFS). Returns a JSON-serializable dict with the report
+    (see format_report()).
+    """
+    instances = Counter()
+    unresolved = Counter()
+    terrain_filepaths = set()
+    unreadable_areas = {}
+    element_count = 0
+
+    for json_filepath, result in preprocess_area_files(
+            json_filepaths, spn_table_filepath, dyn_zip_filepath, resources,
+            skip_dbo_objects=skip_dbo_objects, use_process_pool=use_process_pool,
+            index_cache_folderpath=index_cache_folderpath):
+        if isinstance(result, Exception):
+            unreadable_areas[json_filepath] = str(result)
+            continue
+        store = result[0]
+        element_count += len(store)
+        elements_by_kind = classify_elements(store, skip_dbo_objects)
+        for kind in (KIND_MESH, KIND_DBO):
+            instances.update(store.asset_path(element) for element in elements_by_kind[kind])
+        for kind in (KIND_SPN, KIND_MAG):
+            unresolved.update(store.asset_path(element) for element in elements_by_kind[kind])
+        terrain_filepaths.update(
+            terrain_asset_path(store.ids[element]) for element in elements_by_kind[KIND_TERRAIN])
+
+    # Meshes' sizes, out of the objects' headers (Blender shares
+    # mesh data between instances, so unique assets are what count).
+    gr2_headers = read_gr2_headers(resources, instances, max_workers)
+    vertex_bytes = 0
+    index_bytes = 0
+    vertex_count = 0
+    mat_names = set()
+    missing_files = set()
+    unreadable_files = set()
+    for gr2_filepath, gr2_header in gr2_headers.items():
+        if gr2_header is None:
+            (unreadable_files if resources.isfile(gr2_filepath) else missing_files).add(gr2_filepath)
+            continue
+        for mesh in gr2_header.meshes:
+            vertex_count += mesh.vertex_count
+            vertex_bytes += mesh.vertex_count * mesh.vertex_size
+            index_bytes += mesh.index_count * GR2_INDEX_SIZE
+        mat_names.update(gr2_header.materials)
+
+    missing_files.update(terrain_filepath for terrain_filepath in terrain_filepaths if not resources.isfile(terrain_filepath))
+
+    # Textures' sizes, out of the .mat files and the .dds headers.
+    texture_filepaths = set()
+    for mat_name, mat_tree in prefetch_mat_trees(resources, mat_names, max_workers).items():
+        if mat_tree is None:
+            # Recolorable materials (skin, armor…) have no .mat file of their own.
+            continue
+        texture_filepaths.update(mat_texture_filepaths(mat_tree))
+
+    def read_texture_size(texture_filepath):
+        dds_data = resources.read_bytes(texture_filepath, DDS_HEADER_SIZE)
+        if dds_data is None:
+            return None
+        try:
+            return dds_memory_size(parse_dds_header(dds_data))
+        except ValueError:
+            return -1
+
+    texture_bytes = 0
+    texture_count = 0
+    for texture_filepath, texture_size in read_concurrently(read_texture_size, texture_filepaths, max_workers).items():
+        if texture_size is None:
+            missing_files.add(texture_filepath)
+        elif texture_size < 0:
+            unreadable_files.add(texture_filepath)
+        else:
+            texture_bytes += texture_size
+            texture_count += 1
+
+    return {
+        "areas": len(json_filepaths) - len(unreadable_areas),
+        "elements": element_count,
+        "unique_assets": len(instances),
+        "instances": sum(instances.values()),
+        "instances_per_asset": dict(instances.most_common()),
+        "terrains": len(terrain_filepaths),
+        "unresolved_references": dict(unresolved.most_common()),
+        "missing_files": sorted(missing_files),
+        "unreadable_files": sorted(unreadable_files),
+        "unreadable_areas": unreadable_areas,
+        "materials": len(mat_names),
+        "mat_files": sum(1 for mat_name in mat_names if resources.isfile(MAT_FOLDERPATH + "/" + mat_name + ".mat")),
+        "vertices": vertex_count,
+        "vertex_bytes": vertex_bytes,
+        "index_bytes": index_bytes,
+        "textures": texture_count,
+        "texture_bytes": texture_bytes,
+        }
+
+
+def _megabytes(size):
+    return f"{size / (1024 * 1024):,.1f} MB"
+
+
+def format_report(report, top=20):
+    # The report as console text, listing the top most instanced assets
+    # (all of them if top is 0).
+    lines = [
+        f"AREAS:              {report['areas']}  ({report['elements']} elements)",
+        f"UNIQUE ASSETS:      {report['unique_assets']}  ({report['instances']} instances)",
+        f"TERRAINS:           {report['terrains']}",
+        f"MATERIALS:          {report['materials']}  ({report['mat_files']} with .mat files)",
+        f"VERTEX MEMORY:      {_megabytes(report['vertex_bytes'])}  ({report['vertices']} vertices)"
+        f" + {_megabytes(report['index_bytes'])} of indices",
+        f"TEXTURE MEMORY:     {_megabytes(report['texture_bytes'])}  ({report['textures']} textures)",
+        ]
+
+    instances_per_asset = list(report["instances_per_asset"].items())
+    if top:
+        instances_per_asset = instances_per_asset[:top]
+    lines += ["", "INSTANCES PER ASSET:"]
+    lines += [f"{count:8}  {swtor_filepath}" for swtor_filepath, count in instances_per_asset]
+
+    for title, items in (
+            ("UNRESOLVED REFERENCES:", [f"{count:8}  {path}" for path, count in report["unresolved_references"].items()]),
+            ("MISSING FILES:", ["  " + path for path in report["missing_files"]]),
+            ("UNREADABLE FILES:", ["  " + path for path in report["unreadable_files"]]),
+            ("UNREADABLE AREAS:", [f"  {path}: {error}" for path, error in report["unreadable_areas"].items()]),
+            ):
+        if items:
+            lines += ["", f"{title} {len(items)}"]
+            lines += items
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m swtor_area_assembler.area_analyzer",
+        description="Reports what importing some SWTOR areas involves, without Blender.",
+        )
+    parser.add_argument("json_files", nargs="+", help="Area .json files")
+    parser.add_argument("--resources", default="", help="Extracted SWTOR assets' resources folder")
+    parser.add_argument("--archives", default="", help=".zip pack, .tor archive, or folder of them")
+    parser.add_argument("--cache", default=None, help="Folder for the Area Assembler's indexes")
+    parser.add_argument("--keep-dbo", action="store_true", help="Include design blockout objects")
+    parser.add_argument("--top", type=int, default=20, help="Most instanced assets to list (0: all)")
+    parser.add_argument("--parallel", action="store_true", help="Preprocess the areas in parallel processes")
+    parser.add_argument("--json", action="store_true", help="Output the report as JSON")
+    args = parser.parse_args(argv)
+
+    addon_folderpath = os.path.dirname(os.path.abspath(__file__))
+    resources = open_resources_vfs(args.resources, args.archives, args.cache)
+    if not resources.backends:
+        parser.error("neither a resources folder nor archives were found")
+
+    report = analyze_areas(
+        args.json_files,
+        os.path.join(addon_folderpath, "spn_table.txt"),
+        os.path.join(addon_folderpath, "dyn.zip"),
+        resources,
+        skip_dbo_objects=not args.keep_dbo,
+        use_process_pool=args.parallel,
+        index_cache_folderpath=args.cache,
+        )
+    print(json.dumps(report, indent=1) if args.json else format_report(report, args.top))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,26 @@
 import bpy
-import json
 from math import degrees, radians
 from mathutils import Matrix
 from pathlib import Path
-from zipfile import ZipFile
-import copy
 import os
+
+from .addon_cache import get_cache_folderpath
+from .resources_vfs import open_resources_vfs
+from .local_cache import get_local_file_cache
+from .asset_failures import (open_asset_failure_cache,
+                             FAILURE_MISSING, FAILURE_FAILED, FAILURE_CRASHED)
+from .area_preprocess import preprocess_area_files
+from .asset_library import open_asset_library, prune_asset_libraries
+from .asset_library_io import load_library_asset, store_library_asset
+from .signed_cache import NOT_CACHED
+from .gr2_importer import get_gr2_importer, build_gr2_objects
+from .gr2_mesh import Gr2Decoder
+from .import_plan import plan_import, TERRAIN_FOLDERPATH, EXCLUDED_OBJECT_MATERIALS
+from .element_store import PARENT_ROOT, PARENT_MISSING
+from .element_kinds import KIND_MAG, KIND_SPN, KIND_DYN_PARENT, KIND_TERRAIN, KIND_LIGHT
 import time
 import datetime
+from concurrent.futures.process import BrokenProcessPool
 
 # These imports are for a "hide console output" fn
 import contextlib
@@ -59,21 +72,24 @@ class SWTOR_OT_area_assembler(Operator):
         self.HideAfterImport = context.scene.SAA_HideAfterImport
         self.ExcludeAfterImport = context.scene.SAA_ExcludeAfterImport
         self.ShowFullReport = context.scene.SAA_ShowFullReport
+        self.ParallelPreprocessing = context.scene.SAA_ParallelPreprocessing
+        self.UseBuiltinGr2Reader = context.scene.SAA_UseBuiltinGr2Reader
 
         context.window_manager.fileselect_add(self)
         return {'RUNNING_MODAL'}
 
 
-    # Checks that the 'resources' folder set in Preferences is valid
-    # and that the .gr2 importer addon's operator is available.
+    # Checks that the 'resources' folder or the archives set in Preferences
+    # exist and that the .gr2 importer addon's operator is available.
     # Greys-out the Import sub-menu otherwise.
     @classmethod
     def poll(cls,context):
         swtor_resources_folderpath = context.preferences.addons
         
         swtor_resources_folderpath = context.preferences.addons[__package__].preferences.swtor_resources_folderpath
+        swtor_archives_path = context.preferences.addons[__package__].preferences.swtor_archives_path
         
-        if Path(swtor_resources_folderpath).exists() and ("gr2" in dir(bpy.ops.import_mesh)):
+        if (Path(swtor_resources_folderpath).exists() or (swtor_archives_path and Path(swtor_archives_path).exists())) and ("gr2" in dir(bpy.ops.import_mesh)):
             return True
         else:
             return False
@@ -159,6 +175,16 @@ class SWTOR_OT_area_assembler(Operator):
         description="Resulting Collections are excluded (checkbox in Outliner, 'e' shortcut')\nto keep Blender fully responsive and be able to manage them without lag.\n\nExcluded Collections won't list their objects in the Outliner: that's normal.\n\nRecommended when importing a massive number of areas, such as whole worlds.\n\n(Excluding Collections resets the hide/show state of the Collections' contents.\nHide Objects After Importing won't have an effect if this option is on)",
         default=False,
     )
+    ParallelPreprocessing: BoolProperty(
+        name="Parallel File Preprocessing",
+        description="Reads and preprocesses the selected .json files in parallel worker processes,\none per CPU core, leaving only the objects' creation to Blender itself.\n\nRecommended when importing many areas at once",
+        default=False,
+    )
+    UseBuiltinGr2Reader: BoolProperty(
+        name="Built-in .gr2 Reader",
+        description="Reads static .gr2 objects (most of an area's) with the Area Assembler's own reader,\ndecoding them in parallel worker processes when there are many.\nThe .gr2 importer addon is still used for the rest.\n\nDisable to import every .gr2 object through the addon",
+        default=True,
+    )
 
     
     # Register some properties in the object class for helping
@@ -195,6 +221,8 @@ class SWTOR_OT_area_assembler(Operator):
         # self.HideAfterImport = context.scene.SAA_HideAfterImport
         # self.ExcludeAfterImport = context.scene.SAA_ExcludeAfterImport
         # self.ShowFullReport = context.scene.SAA_ShowFullReport
+        # self.ParallelPreprocessing = context.scene.SAA_ParallelPreprocessing
+        # self.UseBuiltinGr2Reader = context.scene.SAA_UseBuiltinGr2Reader
 
 
 
@@ -227,76 +255,107 @@ class SWTOR_OT_area_assembler(Operator):
         print()        
         bpy.context.window.cursor_set("WAIT")
 
-        # Open all the folders and files necessary for the addon's workings
-        spn_table_available = False
-        dyn_nodes__available = False
-
-
-        # get the folder
+        # Get the folder
         # We derive it from the filepath because when called as an
         # operator we don't get a directory from ImportHelper.
         # (os.path.dirname omits the separator after the directory)
         folder = (os.path.dirname(self.filepath))
 
-        # Get the extracted SWTOR assets' "resources" folder from the add-on's preferences. 
+        # Get the extracted SWTOR assets' "resources" folder and the
+        # (optional) archives to read assets from from the add-on's preferences. 
         swtor_resources_folderpath = context.preferences.addons[__package__].preferences.swtor_resources_folderpath
-
-        # Check that there is a terrain maps subfolder in the resources folder
-        terrain_folderpath = Path(swtor_resources_folderpath) / "world" / "heightmaps"
-        if not terrain_folderpath.exists():
+        swtor_archives_path = context.preferences.addons[__package__].preferences.swtor_archives_path
+
+        # Get the Area Assembler's cache folder from the add-on's preferences.
+        # Preprocessed areas are cached in a subfolder of it (see plan_cache.py),
+        # and the compiled spn table index and dyn visuals database in another
+        # (see spn_lookup.py and dyn_database.py). Assets read from
+        # archives are extracted into yet another one, and loaded assets
+        # are stored in the asset library in another (see asset_library.py).
+        swtor_cache_folderpath = context.preferences.addons[__package__].preferences.swtor_cache_folderpath
+        try:
+            plan_cache_folderpath = get_cache_folderpath(swtor_cache_folderpath, "plans")
+            index_cache_folderpath = get_cache_folderpath(swtor_cache_folderpath, "indexes")
+            extract_folderpath = get_cache_folderpath(swtor_cache_folderpath, "extracted")
+            asset_library_folderpath = get_cache_folderpath(swtor_cache_folderpath, "library")
+        except OSError:
+            print(" -- The cache folder couldn't be created. Areas will be preprocessed from scratch")  # Console.
+            plan_cache_folderpath = None
+            index_cache_folderpath = None
+            extract_folderpath = None
+            asset_library_folderpath = None
+
+        # Assets come from the resources folder (listed once, or just
+        # refreshed from the listing persisted in the cache, so that
+        # checking for files' existence doesn't hit the disk once per
+        # file) and/or from archives (see resources_vfs.py). If a local
+        # cache is set, the resources folder's files are read through
+        # copies in it (see local_cache.py).
+        local_cache = get_local_file_cache(
+            context.preferences.addons[__package__].preferences.swtor_local_cache_folderpath,
+            context.preferences.addons[__package__].preferences.swtor_local_cache_size * 1024 ** 3,
+            )
+        resources = open_resources_vfs(swtor_resources_folderpath, swtor_archives_path,
+                                       index_cache_folderpath, extract_folderpath, local_cache,
+                                       context.preferences.addons[__package__].preferences.swtor_local_cache_size * 1024 ** 3)
+
+        # Assets that were missing or that the importers failed or crashed
+        # on in earlier imports (and haven't changed since) are skipped
+        # up front (see asset_failures.py).
+        asset_failures = open_asset_failure_cache(index_cache_folderpath, resources.resources_key)
+
+        # Assets loaded in earlier imports are appended from the asset
+        # library (see asset_library.py), unless it is disabled (zero size).
+        # How they were loaded depends on some options, which key it.
+        asset_library_size = context.preferences.addons[__package__].preferences.swtor_asset_library_size * 1024 ** 3
+        asset_library = None
+        if asset_library_size:
+            asset_library = open_asset_library(asset_library_folderpath, resources.resources_key, {
+                "SkipDBOObjects": bool(self.SkipDBOObjects),
+                "MergeMultiMeshObjects": bool(self.MergeMultiMeshObjects),
+                "UseBuiltinGr2Reader": bool(self.UseBuiltinGr2Reader),
+                "AddonVersion": tuple(sys.modules[__package__].bl_info["version"]),
+                "BlenderVersion": tuple(bpy.app.version[:2]),
+                })
+
+        # Check that there is a terrain maps subfolder in the resources
+        # (.tor archives can't tell, so just try with them).
+        terrain_folderpath = TERRAIN_FOLDERPATH
+        if not resources.isdir(terrain_folderpath) and not resources.has_archives:
             terrain_folderpath = None
 
 
-        # Open the auxiliary files (zipped nodes and relationship tables)
+        # Auxiliary files (zipped nodes and relationship tables).
+        # They are opened by the preprocessing stage itself, which
+        # might be running in other processes.
 
         addon_pathfolder = os.path.dirname(__file__)
-        
-        # Open zipped dyn nodes folder
-        try:
-            dyn_zip = ZipFile(str(Path(addon_pathfolder) / "dyn.zip"), "r")
-            dyn_nodes__available = True
-        except FileNotFoundError:
-            print(" -- No dyn.zip file found inside the addon. Some objects will be omitted")  # Console.
 
+        dyn_nodes_folder = str(Path(addon_pathfolder) / Path("dyn.zip"))
+        spn_table_filepath = str(Path(addon_pathfolder) / "spn_table.txt")
 
-        # Open spn to pcl or dyn correspondence table
-        try:
-            with open(str(Path(addon_pathfolder) / "spn_table.txt"), "r") as spn_to_gr2_or_dyn:
-                print()
-                print("BUILDING TABLE OF INDIRECT OBJECT REFERENCES:")
-                print("---------------------------------------------")
-                print()
-                                    
-                spn_table_available = True
-                spn_table = {}
-                for dyn_obj in spn_to_gr2_or_dyn:
-                    key, value = dyn_obj.split(",")
-                    spn_table[key] = value.replace("\n", "")
-
-                print(LINEBACK + "DONE!")
-        except FileNotFoundError:
+        if not os.path.isfile(dyn_nodes_folder):
+            print(" -- No dyn.zip file found inside the addon. Some objects will be omitted")  # Console.
+        if not os.path.isfile(spn_table_filepath):
             print(" -- No spn_table file found inside the addon. Some objects will be omitted")  # Console.
 
-        
-        plc_nodes_folder = str(Path(addon_pathfolder) / Path("plc.zip"))
-        dyn_nodes_folder = str(Path(addon_pathfolder) / Path("dyn.zip"))
-
 
         # -------------------------------------------------------------------------------
         # PER-JSON FILE PREPROCESSING ---------------------------------------------------
         # -------------------------------------------------------------------------------
 
-        # Iterate through the selected files and build a full location data list
-        # plus a list of location names out of the .json filenames
-        # and appropriate Collections
-
-        swtor_location_data = []
-        json_names = []
-        dyn_file_data = []
+        # Iterate through the selected files and preprocess them, then
+        # plan the whole import out of them: which Collections and objects
+        # to create, out of which files, and how to transform, parent and
+        # name them (see import_plan.py). The rest of this operator just
+        # carries the plan out.
+        #
+        # The reading, filtering and expanding of indirect object references
+        # (see area_preprocess.py) can run in a pool of worker processes.
+        # Unchanged areas' results come straight from the plan cache.
 
-        # For console output formatting stuff
-        max_json_name_length = 0
-        max_swtor_name_length = 0
+        # (json_name, preprocessed area) pairs to plan the import of.
+        areas_to_plan = []
 
 
         print("\n\nMERGING DATA FROM .JSON FILES:\n------------------------------\n")
@@ -309,222 +368,83 @@ class SWTOR_OT_area_assembler(Operator):
         else:
             filepaths = self.files
 
+        # generate full paths to files
+        json_filepaths = [os.path.join(folder, filepath.name) for filepath in filepaths]
 
-        for filepath in filepaths:
+        preprocessed_areas = preprocess_area_files(
+            json_filepaths,
+            spn_table_filepath,
+            dyn_nodes_folder,
+            resources=resources,
+            skip_dbo_objects=self.SkipDBOObjects,
+            use_process_pool=self.ParallelPreprocessing,
+            plan_cache_folderpath=plan_cache_folderpath,
+            addon_version=sys.modules[__package__].bl_info["version"],
+            index_cache_folderpath=index_cache_folderpath,
+            )
 
-            # generate full path to file
-            json_filepath = (os.path.join(folder, filepath.name))
-            print(LINEBACK + filepath.name, end="")
+        for json_filepath, preprocessed_area in preprocessed_areas:
 
-            # Load .json file as a list of dictionary elements.
-            try:
-                with open(json_filepath, "r") as read_file:
-                    try:
-                        json_location_data = json.load(read_file)
-                        print()  # adds line feed to previous print()
-                    except:
-                        print(" -- EMPTY OR BADLY WRITTEN .JSON FILE. OMITTED.")
-                        continue
-            except FileNotFoundError:
+            print(LINEBACK + Path(json_filepath).name, end="")
+
+            if isinstance(preprocessed_area, FileNotFoundError):
                 print(" -- .json file not found")  # Console.
                 self.report( {"WARNING"}, (".json file '" + json_filepath + "' wasn't found.") )
                 return {"CANCELLED"}
-            
-            # Add the name of the .json file to this list.
-            json_name = Path(json_filepath).stem
-            json_names.append(json_name)
-
-            # For console output formatting stuff
-            if len(json_name) > max_json_name_length:
-                max_json_name_length = len(json_name)
+            elif isinstance(preprocessed_area, Exception):
+                print(" -- EMPTY OR BADLY WRITTEN .JSON FILE. OMITTED.")
+                continue
+            else:
+                print()  # adds line feed to previous print()
 
+            # The name of the .json file names its Collections.
+            areas_to_plan.append( (Path(json_filepath).stem, preprocessed_area) )
 
-            # Flag to decide to create a terrain Collection for this .json area
-            # if the user has selected to have sub-Collections.
-            has_terrain = False
+        print(LINEBACK + "DONE!")
 
+        import_plan = plan_import(
+            areas_to_plan,
+            skip_dbo_objects=self.SkipDBOObjects,
+            create_lights=self.CreateSceneLights,
+            collection_objects=self.CollectionObjects,
+            )
+        json_names = import_plan.json_names
 
-            # -------------------------------------------------------------------------------
-            # PER-ELEMENT FILE PREPROCESSING ------------------------------------------------
-            # -------------------------------------------------------------------------------
-            # Loop through the .json file's elements,
-            # filter out some obvious discardables,
-            # and pre-process indirect object references
-            
-            indirect_object_elements = []
-            
-            for element in json_location_data:
-                if "assetName" in element:
-                    element["make_dyn_empty"] = False
-                    swtor_filepath = element["assetName"]
-                    # delete preceding directory separator if it exists. It shouldn't vary so much
-                    # but SWTOR is a mess, separator types-wise.
-                    if swtor_filepath.startswith("/") or swtor_filepath.startswith("\\"):
-                        swtor_filepath = swtor_filepath[1:]
-                    element["assetName"] = swtor_filepath
-                    
-                    # Add json_name to element
-                    element["json_name"] = json_name
-
-
-                    if (
-                        (".gr2" in swtor_filepath or
-                         ".hms" in swtor_filepath or
-                         ".lit" in swtor_filepath or
-                         ".mag" in swtor_filepath or
-                         ".spn_p" in swtor_filepath or
-                         ("dbo" in swtor_filepath and self.SkipDBOObjects == False) )
-                         and not "_fadeportal_" in swtor_filepath
-                        ):
-                    
-                        
-                        # Calculate max name length For console output formatting
-                        swtor_name_length = len(Path(element["assetName"]).stem) + 2
-                        if swtor_name_length > max_swtor_name_length:
-                            max_swtor_name_length = swtor_name_length
-
-                        if ".hms" in swtor_filepath:
-                            has_terrain = True
-
-
-
-                        # Pre-process item for indirect object types
-                        # (.mag, .spn to plc, .spn to .plc to .dyn, etc.)
-                        # Use the most indirect first so that their results
-                        # are processed by the least indirect afterwards
-                        # as a temporary solution for their lack of
-                        # recursivity.
-                        
-                        swtor_id = element["id"]
-                        swtor_parent_id = element["parent"]
-                                                    
-                        if swtor_filepath.endswith(".spn_p"):
-                            # .SPN_P OBJECT REFERENCE (non-NPC .SPN)
-                            
-                            if swtor_filepath in spn_table:
-                                if spn_table[swtor_filepath][-3:] == "dyn":
-                                    
-                                    # pre-process dyn objects
-                                    # WARNING: ZIP files internally use forward slashes as separators.
-                                    # We have to cater to that when defining paths inside them.
-                                    try:
-                                        zipped_filepath = spn_table[swtor_filepath].replace(".dyn", ".json").replace("\\", "/")
-                                        with dyn_zip.open(zipped_filepath, "r" ) as read_dyn_file:
-                                            dyn_file_data = json.load(read_dyn_file)
-                                    except FileNotFoundError:
-                                        print(".json file not found")  # Console.
-                                        continue
-
-                                    dyn_element = copy.deepcopy(element)
-
-                                    for idx, dyn_obj in enumerate(dyn_file_data["dynPlaceable"]["dynVisualList"]["value"]["list"]):
-                                        if "dynVisualFqn" in dyn_obj:
-                                            dyn_element["assetName"] = dyn_obj["dynVisualFqn"]["value"]
-                                            if ".gr2" in dyn_element["assetName"] or ".mag" in dyn_element["assetName"]:
-                                                dyn_element["parent"] = swtor_id
-                                                dyn_element["id"] = swtor_id + "-" + str(idx)
-                                                
-                                                if "dynPosition" in dyn_obj:
-                                                    dyn_element["position"][0] = dyn_obj["dynPosition"]["value"]["x"]
-                                                    dyn_element["position"][1] = dyn_obj["dynPosition"]["value"]["y"]
-                                                    dyn_element["position"][2] = dyn_obj["dynPosition"]["value"]["z"]
-                                                else:
-                                                    dyn_element["position"] = [0,0,0]
-                                
-                                                if "dynRotation" in dyn_obj:
-                                                    dyn_element["rotation"][0] = dyn_obj["dynRotation"]["value"]["x"]
-                                                    dyn_element["rotation"][1] = dyn_obj["dynRotation"]["value"]["y"]
-                                                    dyn_element["rotation"][2] = dyn_obj["dynRotation"]["value"]["z"]
-                                                else:
-                                                    dyn_element["rotation"] = [0,0,0]
-
-                                                if "dynScale" in dyn_obj:
-                                                    dyn_element["scale"][0] = dyn_obj["dynScale"]["value"]["x"]
-                                                    dyn_element["scale"][1] = dyn_obj["dynScale"]["value"]["y"]
-                                                    dyn_element["scale"][2] = dyn_obj["dynScale"]["value"]["z"]
-                                                else:
-                                                    dyn_element["scale"] = [1,1,1]
-
-                                                dyn_element["make_dyn_empty"] = False
-                                                
-                                                indirect_object_elements.append(dyn_element)
-                                            else:
-                                                continue
-                                        
-                                    element["make_dyn_empty"] = True
-
-                            
-                                elif ".gr2" in spn_table[swtor_filepath] or ".mag" in spn_table[swtor_filepath]:
-                                    element["make_dyn_empty"] = False
-                                    swtor_filepath = spn_table[swtor_filepath]
-                                    
-                                if swtor_filepath.startswith("/") or swtor_filepath.startswith("\\"):
-                                    swtor_filepath = swtor_filepath[1:]
-                                element["assetName"] = swtor_filepath
-                                swtor_name = Path(swtor_filepath).stem
-                                
-                            else:
-                                continue
-                            
-            json_location_data += indirect_object_elements
-            
-            swtor_location_data += (json_location_data)
+        # For console output formatting stuff
+        max_json_name_length = import_plan.max_json_name_length
+        max_swtor_name_length = import_plan.max_swtor_name_length
 
 
+        # Weird case of all empty or invalid .json, but hey, could happen.
+        if len(import_plan.store) == 0:
+            self.report({"WARNING"}, "The selected .json files contain no data.")
+            return {"CANCELLED"}
 
-            # Create Collections.
 
-            # Main location collection inside the Scene's root "Scene Collection".
-            if not json_name in bpy.data.collections:
-                location_collection = bpy.data.collections.new(json_name)
-                bpy.context.collection.children.link(location_collection)
-            else:
-                location_collection = bpy.data.collections[json_name]
 
-            if self.CollectionObjects == True:
-                # Location's lights if the user wants them (yes by default)
-                if self.CreateSceneLights == True:
-                    if not (json_name + " - Lights") in bpy.data.collections:
-                        location_lights_collection  = bpy.data.collections.new(json_name + " - Lights")
-                        location_collection.children.link(location_lights_collection)
-                    else:
-                        location_lights_collection  = bpy.data.collections[json_name + " - Lights"]
+        # Create Collections.
+        # Main location collection inside the Scene's root "Scene Collection",
+        # and, if objects are separated by type, children ones for its
+        # lights, terrain and objects.
 
-                # Location's terrain.
-                if has_terrain == True:
-                    if not (json_name + " - Terrain") in bpy.data.collections:
-                        location_terrains_collection = bpy.data.collections.new(json_name + " - Terrain")
-                        location_collection.children.link(location_terrains_collection)
+        for planned_area in import_plan.areas:
+            for collection_name, parent_collection_name in planned_area.collections:
+                if not collection_name in bpy.data.collections:
+                    collection = bpy.data.collections.new(collection_name)
+                    if parent_collection_name is None:
+                        bpy.context.collection.children.link(collection)
                     else:
-                        location_terrains_collection = bpy.data.collections[json_name + " - Terrain"]
-
-                # Location's objects.
-                if not (json_name + " - Objects") in bpy.data.collections:
-                    location_objects_collection = bpy.data.collections.new(json_name + " - Objects")
-                    location_collection.children.link(location_objects_collection)
-                else:
-                    location_objects_collection = bpy.data.collections[json_name + " - Objects"]
-
-
+                        bpy.data.collections[parent_collection_name].children.link(collection)
 
             # Create a Light data block to base Light objects on. Having one per .json file instead of
             # a single one for all the Addon's run is a bit arbitrary, but it might be interesting for,
             # say, setting a common light intensity and color per room and the like.
 
             if self.CreateSceneLights == True:
-                light_data = bpy.data.lights.new(name= json_name, type= "POINT")
+                light_data = bpy.data.lights.new(name= planned_area.json_name, type= "POINT")
                 light_data.energy = 2
 
-                Lights_count = 0
-
-        print(LINEBACK + "DONE!")
-
-
-
-        # Weird case of all empty or invalid .json, but hey, could happen.
-        if len(swtor_location_data) == 0:
-            self.report({"WARNING"}, "The selected .json files contain no data.")
-            return {"CANCELLED"}
+        Lights_count = 0
 
 
 
@@ -535,456 +455,465 @@ class SWTOR_OT_area_assembler(Operator):
         # ACTUAL PROCESSING OF THE ELEMENTS IN THE AREA DATA ----------------------------
         # -------------------------------------------------------------------------------
 
+        # The import goes in phases, each with its own progress and timing:
+        # - Plan (done above): the areas' objects, and the unique
+        #   assets (.gr2 objects and terrains) they are instances of.
+        # - Load: importing each unique asset exactly once, keeping
+        #   its mesh data and dropping the importers' objects.
+        # - Instance: creating every object out of the loaded mesh
+        #   data (or as a light or an Empty) in a single tight loop.
+
         # SOME VARIABLES:
 
-        # Many Hero Engine utility object types can't be determined by
-        # their names, but oftentimes their materials'names are a good
-        # criteria (these are all the invisible-type ones in .mat files).
-        materials_to_exclude_objects_by = [
-            "collision",
-            "dbo_universal_superexclusion_test",
-            "mote_mote_a01_v01",
-            "occluder",
-            "occluder_terrain",
-            "occluder_wall",
-            "portal",
-            "util_blue_hidden",
-            "util_collision_hidden",
-            "util_collision_none",
-            "util_green_hidden",
-            "util_red_hidden",
-            "util_white_hidden",
-            "util_yellow_hidden",
-            "white_utility_hidden",
-        ]
-
-        # More filters to apply, by <derived> type:
-        shaders_to_exclude_objects_by = [
-            "OpacityFade",
-        ]
-
-        # Deduplication dict to keep track of already imported objects
-        # and avoid reimporting thorugh timewasting .gr2 importer.
-        # Key: value is:
-        # object's filepath: imported object's mesh data
+        # Loaded unique assets, to create their instances out of.
+        # Key: asset path. Value:
+        # a list of the mesh data of its object and, if a multi-object,
+        # of the rest of its objects (to be parented to the first one),
         # or
-        # multi-object's filepath: [parent object's name]: 
-        already_existing_objects = {}
+        # an empty list if all its objects were discardables (colliders, etc.),
+        # or
+        # None if its instances are to be Empties (dbo objects being skipped).
+        # Assets that couldn't be loaded aren't in it.
+        loaded_assets = {}
 
-        # List to hold the terrain objects being imported
-        terrains = []
+        # Signatures of the assets just imported, to store them in the
+        # asset library with, and count of the ones appended from it.
+        imported_asset_signatures = {}
+        library_loaded_count = 0
 
+        # Collection that importers' objects are caught in (see
+        # capture_new_objects()), rather than finding them out by
+        # comparing all of bpy.data.objects before and after every
+        # import, which gets slower the more objects have been imported.
+        capture_collection = create_capture_collection()
 
-        # Percentage of progress stuff. It's based on number
-        # of elements, although most will be discarded (non-objects). 
-        amount_to_process = len(swtor_location_data)
-        amount_processed = 0
+        # For timing stats
+        plan_time = time.time() - start_time
 
+        print(f"\n{len(import_plan)} OBJECTS PLANNED OUT OF {len(import_plan.assets)} UNIQUE ASSETS IN {plan_time:.2f} SECONDS")
 
-        # LOOP THROUGH ELEMENTS STARTS HERE ----------------------------------------
 
+        # LOOP THROUGH UNIQUE ASSETS STARTS HERE -----------------------------------
 
-        print("\n\nPROCESSING AREA OBJECTS' DATA:\n------------------------------\n")
 
-        for element in swtor_location_data:
-            amount_processed += 1
+        print("\n\nLOADING UNIQUE ASSETS:\n----------------------\n")
 
-            # For .json file elements with transforms but no assetName at all.
-            # Last time it happened it was a bug in Jedipedia. Just in case…
-            if not "assetName" in element:
-                print("WARNING: item with id "+ element["id"] + " lacks assetName")
-                continue
+        load_start_time = time.time()
 
-            # Set some variables that will be used per element constantly.
-            swtor_filepath = element["assetName"]
-            if not (swtor_filepath.endswith(".gr2") or
-                    swtor_filepath.endswith(".lit") or
-                    swtor_filepath.endswith(".hms") or
-                    swtor_filepath.endswith(".mag") or
-                    swtor_filepath.endswith(".spn_p") or
-                    ("dbo" in swtor_filepath and self.SkipDBOObjects == False)
-                    ):
-                continue
-            # delete preceding directory separator if it exists. It shouldn't vary so much
-            # but SWTOR is a mess, separator types-wise.
-            if swtor_filepath.startswith("/") or swtor_filepath.startswith("\\"):
-                swtor_filepath = swtor_filepath[1:]
+        # The .gr2 importer addon's loader function is called directly
+        # if possible, sparing its operator's overhead (see gr2_importer.py).
+        import_gr2, gr2_importer_is_direct = get_gr2_importer()
+        if gr2_importer_is_direct:
+            print("(Calling the .gr2 importer addon's loader directly)\n")
 
-            swtor_id = element["id"]
-            swtor_parent_id = element["parent"]
-            swtor_name = Path(swtor_filepath).stem
+        # Static .gr2 objects are read by the built-in reader if so
+        # chosen, decoded ahead in worker processes (see gr2_mesh.py)
+        # unless expected to come from the asset library (those that
+        # turn out not to are decoded when reached). The rest, and
+        # whatever it can't read, go through the addon.
+        use_builtin_gr2_reader = bool(self.UseBuiltinGr2Reader)
+        gr2_filepaths_to_decode = {}
+        if use_builtin_gr2_reader:
+            for swtor_filepath, instances in import_plan.assets.items():
+                if import_plan.objects[instances[0]].kind == KIND_TERRAIN:
+                    continue
+                asset_signature = resources.signature(swtor_filepath)
+                if asset_failures.failure(swtor_filepath, asset_signature) is not None:
+                    continue
+                if asset_library is not None and asset_library.get(swtor_filepath, asset_signature) is not NOT_CACHED:
+                    continue
+                asset_filepath = resources.filepath(swtor_filepath)
+                if asset_filepath is not None:
+                    gr2_filepaths_to_decode[swtor_filepath] = asset_filepath
+        gr2_decoder = Gr2Decoder(gr2_filepaths_to_decode)
+        builtin_read_count = 0
+
+        # Percentage of progress stuff.
+        amount_to_process = max(len(import_plan.assets), 1)
+        amount_processed = 0
 
-            json_name = element["json_name"]
+        for swtor_filepath, instances in import_plan.assets.items():
+            amount_processed += 1
 
+            # The asset's first instance tells about it in the console.
+            first_instance = import_plan.objects[instances[0]]
+            swtor_id = first_instance.swtor_id
+            swtor_name = first_instance.asset_name
+            json_name = first_instance.json_name
 
-            # Unlikely to happen, but…
-            if swtor_id in bpy.data.objects:
-                continue
+            if first_instance.kind == KIND_TERRAIN:
 
-            
+                # TERRAIN OBJECT. ---------------------------------
 
+                print(f'{LINEBACK}{amount_processed * 100 / amount_to_process:6.2f} %   AREA: {json_name:<{max_json_name_length}}   ID: {swtor_id}   -- TERRAIN OBJECT --   ', end="")
 
-            if swtor_filepath.endswith(".lit"):
+                if terrain_folderpath is None:
+                    print("WARNING: NO RESOURCES\\WORLD\\HEIGHTMAPS FOLDER AVAILABLE")
+                    continue
 
-                # LIGHT OBJECT. ----------------------------------
+                importer = import_obj
+                importer_name = "Blender's .obj importer"
+            else:
 
-                if self.CreateSceneLights == True:
-                    # Collection where the light object will be moved to
-                    if self.CollectionObjects == True:
-                        location_lights_collection  = bpy.data.collections[json_name + " - Lights"]
-                    else:
-                        location_lights_collection  = bpy.data.collections[json_name]
+                # MESH OBJECT  ----------------------------------
 
-                    light_data = bpy.data.lights[json_name]
-                    blender_object = bpy.data.objects.new(name=swtor_id, object_data = light_data)
+                print(f'{LINEBACK}{amount_processed * 100 / amount_to_process:6.2f} %   INSTANCES: {len(instances):<6}   NAME: {swtor_name:{max_swtor_name_length}}', end="")
 
-                    link_objects_to_collection(blender_object, location_lights_collection, move = True)
+                importer = import_gr2
+                importer_name = "the .gr2 importer addon"
 
-                    Lights_count += 1
-                else:
+            asset_signature = resources.signature(swtor_filepath)
+            known_failure = asset_failures.failure(swtor_filepath, asset_signature)
+            if known_failure is not None:
+                print(f"{known_failure.upper()} IN AN EARLIER IMPORT. DISCARDED")
+                continue
+
+            # Assets stored in the asset library by earlier imports
+            # are appended from it rather than imported again.
+            if asset_library is not None:
+                library_asset = asset_library.asset(swtor_filepath, asset_signature)
+                if library_asset is not NOT_CACHED:
+                    library_asset = load_library_asset(asset_library, swtor_filepath, library_asset)
+                if library_asset is not NOT_CACHED:
+                    loaded_assets[swtor_filepath] = library_asset
+                    library_loaded_count += 1
+                    print("FROM ASSET LIBRARY")
                     continue
 
+            asset_filepath = resources.filepath(swtor_filepath)
+            if asset_filepath is None:
+                print("FILE NOT FOUND. DISCARDED")
+                asset_failures.put(swtor_filepath, asset_signature, FAILURE_MISSING)
+                continue
 
-            elif swtor_filepath.endswith(".hms"):
+            # ACTUAL IMPORTING:
+            # …through the built-in reader for static .gr2 objects,
+            # Blender's .obj importer for terrains and
+            # Darth Atroxa's .gr2 importer addon for the rest.
+            gr2_model = None
+            if use_builtin_gr2_reader and first_instance.kind != KIND_TERRAIN:
+                try:
+                    gr2_model = gr2_decoder.model(swtor_filepath, asset_filepath)
+                except (OSError, ValueError):
+                    pass
+                except BrokenProcessPool:
+                    print("\n\nWARNING: the built-in .gr2 reader's worker processes stopped working.")
+                    print("The .gr2 importer addon will import the rest of the objects\n")
+                    use_builtin_gr2_reader = False
+            if gr2_model is not None:
+                imported_objects, failure = build_gr2_objects(gr2_model), None
+                builtin_read_count += 1
+            else:
+                imported_objects, failure = import_asset(importer, asset_filepath, capture_collection)
+            if failure == FAILURE_FAILED:
+                print(f"\n\nWARNING: {importer_name} failed to import {swtor_id} - {asset_filepath}\n")
+                asset_failures.put(swtor_filepath, asset_signature, FAILURE_FAILED)
+                continue
+            if failure == FAILURE_CRASHED:
+                print(f"\n\nWARNING: {importer_name} CRASHED while importing:\n{swtor_id} - {asset_filepath}\n")
+                print("Despite that, the Area Importer addon will keep on importing the rest of the objects")
+                asset_failures.put(swtor_filepath, asset_signature, FAILURE_CRASHED)
+                continue
+            print("IMPORTED    ", end="")
+            imported_asset_signatures[swtor_filepath] = asset_signature
 
-                # TERRAIN OBJECT. ---------------------------------
 
-                print(f'{LINEBACK}{amount_processed * 100 / amount_to_process:6.2f} %   AREA: {json_name:<{max_json_name_length}}   ID: {swtor_id}   -- TERRAIN OBJECT --   ', end="")
 
-                if terrain_folderpath is None:
-                    print("WARNING: NO RESOURCES\\WORLD\\HEIGHTMAPS FOLDER AVAILABLE")
-                    continue
+            # Single object vs. multi-object processing ---------------------------------------------
+
+            if first_instance.kind == KIND_TERRAIN:
+                loaded_assets[swtor_filepath] = [imported_objects[0].data]
+                print()  # adds line feed to previous print()
+
 
-                # Collection where the terrain object will be moved to
-                if self.CollectionObjects == True:
-                    location_terrains_collection  = bpy.data.collections[json_name + " - Terrain"]
+            elif len(imported_objects) == 0:  # collider objects, depending on .gr2 importer settings
+                loaded_assets[swtor_filepath] = []
+                print()  # adds line feed to previous print()
+
+
+            elif len(imported_objects) == 1:
+
+                # SINGLE OBJECT -------
+
+                # If object is a dbo, its instances will be Empties
+                # to cover for them being parent objects
+                if swtor_name.startswith("dbo") and self.SkipDBOObjects == True:
+                    loaded_assets[swtor_filepath] = None
+                    print("DBO to EMPTY ", end="")
                 else:
-                    location_terrains_collection  = bpy.data.collections[json_name]
+                    loaded_assets[swtor_filepath] = [imported_objects[0].data]
+                    if swtor_name.startswith("dbo"):
+                        print("DBO ", end="")
 
-                terrain_path = str(terrain_folderpath / Path(swtor_id + ".obj") )
+                print()  # adds line feed to previous print()
+            else:
 
-                # ACTUAL IMPORTING:
-                # …through Blender's bpy.ops.import_scene.obj addon.
-                # Does a after-minus-before bpy.data.objects check to determine
-                # the objects resulting from the importing, as the addon doesn't
-                # return that information.
+                # IMPORTED MULTI-OBJECT ----------------------------------
 
-                objects_before_importing = list(bpy.data.objects)
-                try:
-                    with suppress_stdout():  # To silence .obj importing outputs
-                        result = bpy.ops.wm.obj_import(filepath=terrain_path)  # .obj importer
-                    if result == "CANCELLED":
-                        print(f"\n           WARNING: Blender's .obj importer failed to import {swtor_id} - {str( Path(swtor_resources_folderpath) / Path(swtor_filepath) )}\n")
+                print("MULTI-OBJECT ", end="")
+
+                # imported_objects_by_meshname will store:
+                # Key = object's mesh's name.
+                # Value = object.
+                # to help determine which object will act as parent by
+                # finding the one whose mesh data name (which spares us
+                # the usual .00x suffixes) is closest to the filename.
+                imported_objects_by_meshname = {}
+
+
+                # List to fill with objects to discard
+                # if set so in the relevant checkbox
+                discardables = []
+
+                for imported_object in imported_objects:
+
+                    # Check object's name and materials to detect discardable ones.
+                    is_discardable = False
+                    if self.SkipDBOObjects == True:
+                        if imported_object.name.startswith("dbo"):
+                            is_discardable = True
+                        else:
+                            if imported_object.material_slots:
+                                for material_slot in imported_object.material_slots:
+                                    if material_slot.name in EXCLUDED_OBJECT_MATERIALS:
+                                        is_discardable = True
+
+                    # Add object to list of discardables if checkbox is true.
+                    if is_discardable == True:
+                        discardables.append(imported_object)
                         continue
                     else:
-                        print("IMPORTED")
-                except:
-                    print(f"\n\n           WARNING: Blender's .obj Importer CRASHED while trying to import it.")
-                    print("           Despite that, the Area Importer addon will keep on importing the rest of the objects.\n")
+                        imported_objects_by_meshname[imported_object.data.name] = imported_object
+
+                # Delete discardables from imported_objects and from bpy.data.objects
+                if discardables:
+                    remove_objects(discardables)
+                    imported_objects = [imported_object for imported_object in imported_objects if imported_object not in discardables]
+
+
+
+                # It can happen that a multi-object is entirely composed of non-renderable
+                # objects, so, imported_objects might be actually empty after discarding them.
+                if len(imported_objects) == 0:
+                    loaded_assets[swtor_filepath] = []
+                    print("DISCARDED")
                     continue
-                objects_after_importing = list(bpy.data.objects)
-                imported_objects_amount = 1
-                blender_object = list(set(objects_after_importing) - set(objects_before_importing))[0]
-                blender_object.name = swtor_id
 
-                link_objects_to_collection(blender_object, location_terrains_collection, move = True)
-                
+                # Also, there could be a single object left.
+                if len(imported_objects) == 1:
+                    loaded_assets[swtor_filepath] = [imported_objects[0].data]
 
-            elif element["make_dyn_empty"] == True:
-                
-                # DYN PARENT. ---------------------------------
-                
-                # As some indirect objects result into multiple .gr2, .mag, etc.
-                # an Empty is necessary to parent them and pass them transforms.
-                # .dyn are the only case so far, but there could be more.
 
-                blender_object = bpy.data.objects.new(swtor_id, None)
-                blender_object.empty_display_size = 0.1
-                blender_object.empty_display_type = 'CUBE'
-                
-                # Collection where the Empty will be moved to
-                if self.CollectionObjects == True:
-                    location_objects_collection = bpy.data.collections[json_name + " - Objects"]
-                else:
-                    location_objects_collection = bpy.data.collections[json_name]
+                # If there are more than one, and we've chosen not to
+                # merge them into a single object, we need to select
+                # a main one to parent the rest to. We go for the one
+                # whose name is closest to the .gr2 filename.
+                elif self.MergeMultiMeshObjects == False:
+                    parent_object = imported_objects_by_meshname[ find_closest_match(list(imported_objects_by_meshname), swtor_name) ]
 
-                link_objects_to_collection(blender_object, location_objects_collection, move = True)
+                    multi_object_data_list = [parent_object.data]
+                    for imported_object in imported_objects:
+                        if imported_object != parent_object:
+                            multi_object_data_list.append(imported_object.data)
 
-            else:
+                    loaded_assets[swtor_filepath] = multi_object_data_list
 
-                # MESH OBJECT  ----------------------------------
 
-                print(f'{LINEBACK}{amount_processed * 100 / amount_to_process:6.2f} %   AREA: {json_name:<{max_json_name_length}}   ID: {swtor_id}   NAME: {swtor_name:{max_swtor_name_length}}', end="")
+                else:
+                    # Join objects into a single one (using bpy.ops because
+                    # the alternative is sisyphean: meshes, materials…).
+                    # They need to be in the View Layer for that.
+                    link_objects_to_collection(imported_objects, capture_collection)
+                    deselectall()
+                    for imported_object in imported_objects:
+                        imported_object.select_set(state= True)
+                    bpy.context.view_layer.objects.active = imported_objects[0]
+                    bpy.ops.object.join()
+                    joined_object = bpy.context.view_layer.objects.active
+                    deselectall()
+                    loaded_assets[swtor_filepath] = [joined_object.data]
+                    imported_objects = [joined_object]
 
+                print()  # adds line feed to previous print()
 
-                if swtor_filepath.endswith(".mag"):
-                    # .MAG OBJECT REFERENCE
-                    try:
-                        with open( str( Path(swtor_resources_folderpath) / Path(swtor_filepath) ), "r") as read_mag_file:
-                            if ".gr2" in read_mag_file:
-                                for dyn_obj in read_mag_file:
-                                    if ".gr2" in dyn_obj:
-                                        swtor_filepath = dyn_obj.split("Mesh=")[1]
-                                        if swtor_filepath.startswith("/") or swtor_filepath.startswith("\\"):
-                                            swtor_filepath = swtor_filepath[1:]
-                                        element["assetName"] = swtor_filepath
-                                        break
-                            else:
-                                print("  WARNING: NO .GR2 OBJECT REFERENCED IN FILE")
-                                continue
-                    except FileNotFoundError:
-                        print(" -- file not found")  # Console.
-                        continue
+            # The importers' objects are done with: their mesh data
+            # is what the instances will be made of.
+            remove_objects(imported_objects)
 
 
+        gr2_decoder.close()
 
+        load_time = time.time() - load_start_time
 
-                # Collection where the objects will be moved to
-                if self.CollectionObjects == True:
-                    location_objects_collection = bpy.data.collections[json_name + " - Objects"]
-                else:
-                    location_objects_collection = bpy.data.collections[json_name]
+        print(LINEBACK + f"DONE! {len(loaded_assets)} OF {len(import_plan.assets)} UNIQUE ASSETS LOADED IN {load_time:.2f} SECONDS")
 
-                if swtor_filepath not in already_existing_objects:
+        bpy.data.collections.remove(capture_collection)
 
-                    # IMPORTING NEW OBJECTS:
-                    # …through Darth Atroxa's bpy.ops.import_mesh.gr2.
-                    # Does a after-minus-before bpy.data.objects check to determine
-                    # the objects resulting from the importing, as the addon doesn't
-                    # return that information.
-                    
-                    objects_before_importing = list(bpy.data.objects)
-                    gr2_filepath = str( Path(swtor_resources_folderpath) / Path(swtor_filepath) )
-                    if os.path.isfile(gr2_filepath):
-                        try:
-                            with suppress_stdout():  # To silence Darth Atroxa's print() outputs
-                                result = bpy.ops.import_mesh.gr2(filepath=gr2_filepath)
-                            if result == "CANCELLED":
-                                print(f"\n\nWARNING: .gr2 importer addon failed to import {swtor_id} - {str( Path(swtor_resources_folderpath) / Path(swtor_filepath) )}\n")
-                                continue
-                            else:
-                                print("IMPORTED    ", end="")
-                        except:
-                            print(f"\n\nWARNING: the .gr2 Importer addon CRASHED while importing:\n{swtor_id} - {str( Path(swtor_resources_folderpath) / Path(swtor_filepath) )}\n")
-                            print("Despite that, the Area Importer addon will keep on importing the rest of the objects")
-                            continue
-                        objects_after_importing = list(bpy.data.objects)
-                        imported_objects = list(set(objects_after_importing) - set(objects_before_importing))
-                        imported_objects_amount = len(imported_objects)
-
-                        link_objects_to_collection(imported_objects, location_objects_collection, move = True)
-                    else:
-                        print("FILE NOT FOUND. DISCARDED")
-                        continue
+        asset_failures.save()
 
-                else:
-                    
-                    # DUPLICATING ALREADY IMPORTED OBJECTS AS INSTANCES:
-                    # …To make the importing faster. If object's path is in the already_existing_objects dict,
-                    # don't import through the .gr2 Addon and just duplicate from mesh data.
-
-                    # If the mesh data is None that means that the original object was made of discardables
-                    # (colliders, etc.) that the user decided to exclude, so, we don't duplicate it. 
-                    if already_existing_objects[swtor_filepath] == "":
-                        print("DISCARDED")
-                        continue
 
+        # Store the newly imported assets in the asset library,
+        # keeping it under its size cap.
+        if asset_library is not None:
+            print("\n\nSTORING ASSETS IN THE ASSET LIBRARY:\n------------------------------------\n")
 
-                    print("DUPLICATED  ", end="")
+            store_start_time = time.time()
+            stored_count = 0
+            for swtor_filepath, asset_signature in imported_asset_signatures.items():
+                if swtor_filepath in loaded_assets:
+                    if store_library_asset(asset_library, swtor_filepath, asset_signature, loaded_assets[swtor_filepath]):
+                        stored_count += 1
+            asset_library.save()
+            library_size, library_asset_count = prune_asset_libraries(asset_library_folderpath, asset_library_size)
+            load_time += time.time() - store_start_time
 
-                    imported_objects = [ bpy.data.objects.new(name= swtor_id, object_data= already_existing_objects[swtor_filepath][0]) ]
-                    imported_objects_amount = 1
+            print(LINEBACK + f"DONE! {stored_count} ASSETS STORED. THE ASSET LIBRARY HOLDS {library_asset_count} ASSETS ({library_size / 1024 ** 2:.1f} MB)")
 
-                    link_objects_to_collection(imported_objects, location_objects_collection, move = True)
 
-                    # If the already existing object was a multi-object (the dict's value lists more than a single mesh data block)
-                    # create children objects out of them using the meshes' names as their names, and parent them to the first object
-                    # created just before. In this way, the parent can be processed as a single object by the rest of the code and
-                    # the children objects go a long for the ride.
-                    if len(already_existing_objects[swtor_filepath]) > 1:
-                        for i in range( 1, len(already_existing_objects[swtor_filepath]) ):
-                            multi_object_child = bpy.data.objects.new(
-                                name= already_existing_objects[swtor_filepath][i].name,
-                                object_data= already_existing_objects[swtor_filepath][i]
-                                )
 
-                            link_objects_to_collection(multi_object_child, location_objects_collection, move = True)
+        # LOOP THROUGH ELEMENTS STARTS HERE ----------------------------------------
 
-                            parent_with_transformations(multi_object_child, imported_objects[0], inherit_transformations = False)
 
-                        print("MULTI-OBJECT", end="")
+        print("\n\nCREATING AREA OBJECTS:\n----------------------\n")
 
+        instance_start_time = time.time()
 
+        # Percentage of progress stuff. It's based on number
+        # of planned objects, although some will be discarded.
+        amount_to_process = max(len(import_plan), 1)
+        amount_processed = 0
 
-                # Single object vs. multi-object processing ---------------------------------------------
+        for planned_object in import_plan.objects:
+            amount_processed += 1
 
-                if imported_objects_amount == 0:  # collider objects, depending on .gr2 importer settings
-                    print()  # adds line feed to previous print()
-                    continue
+            # Set some variables that will be used per object constantly.
+            # (Elements lacking an assetName were discarded when reading the .json files,
+            # and assetNames made canonical and resolved to .gr2 files when preprocessing them)
+            swtor_filepath = planned_object.import_path
+            element_kind = planned_object.kind
 
+            swtor_id = planned_object.swtor_id
+            swtor_parent_id = planned_object.parent_id
+            swtor_name = planned_object.asset_name
 
-                if imported_objects_amount == 1:
+            json_name = planned_object.json_name
 
-                    # SINGLE OBJECT (OR ALREADY EXISTING MULTI-OBJECT) -------
 
-                    blender_object = imported_objects[0]
-                    # Add imported object's path and mesh data to dedupe dict.
-                    already_existing_objects[swtor_filepath] = [blender_object.data]
+            # Unlikely to happen, but…
+            if swtor_id in bpy.data.objects:
+                continue
 
-                    # If object is a dbo, replace it with an Empty to
-                    # cover for it being a parent object
-                    if swtor_name.startswith("dbo"):
-                        if self.SkipDBOObjects == True:
-                            blender_object = replace_with_empty(blender_object)
+            # Collection where the object will be linked to
+            object_collection = bpy.data.collections[planned_object.collection_name]
 
-                            link_objects_to_collection(blender_object, location_objects_collection, move = True)
 
-                            print("DBO to EMPTY ", end="")
-                        else:
-                            print("DBO ", end="")
+            if element_kind == KIND_LIGHT:
 
-                    blender_object.name = swtor_id
-                    print()  # adds line feed to previous print()
-                else:
+                # LIGHT OBJECT. ----------------------------------
 
-                    # IMPORTED MULTI-OBJECT ----------------------------------
+                if self.CreateSceneLights == True:
+                    light_data = bpy.data.lights[json_name]
+                    blender_object = bpy.data.objects.new(name=swtor_id, object_data = light_data)
 
-                    print("MULTI-OBJECT ", end="")
+                    object_collection.objects.link(blender_object)
 
-                    # imported_objects_meshnames_and_names will store:
-                    # Key = object's mesh's name.
-                    # Value = object's name.
-                    # to help determine which object will act as parent by
-                    # finding the one whose mesh data name (which spares us
-                    # the usual .00x suffixes) is closest to the filename.
-                    imported_objects_meshnames_and_names = {}
+                    Lights_count += 1
+                else:
+                    continue
 
 
-                    # List to fill with objects to discard
-                    # if set so in the relevant checkbox
-                    discardables = []
+            elif element_kind == KIND_DYN_PARENT:
 
-                    for imported_object in imported_objects:
+                # DYN PARENT. ---------------------------------
 
-                        # Check object's name and materials to detect discardable ones.
-                        is_discardable = False
-                        if self.SkipDBOObjects == True:
-                            if imported_object.name.startswith("dbo"):
-                                is_discardable = True
-                            else:
-                                if imported_object.material_slots:
-                                    for material_slot in imported_object.material_slots:
-                                        if material_slot.name in materials_to_exclude_objects_by:
-                                            is_discardable = True
-
-                        # Add object to list of discardables if checkbox is true,
-                        # otherwise rename them with their meshes' names (which could produce .00x suffixes)
-                        if is_discardable == True:
-                            discardables.append(imported_object)
-                            continue
-                        else:
-                            imported_objects_meshnames_and_names[imported_object.data.name] = imported_object.name
+                # As some indirect objects result into multiple .gr2, .mag, etc.
+                # an Empty is necessary to parent them and pass them transforms.
+                # .dyn are the only case so far, but there could be more.
 
-                    # Delete discardables from imported_objects and from bpy.data.objects
-                    if discardables:
-                        for discardable in discardables:
-                            bpy.data.objects.remove(discardable, do_unlink=True)
-                            imported_objects.remove(discardable)
-                    
+                blender_object = bpy.data.objects.new(swtor_id, None)
+                blender_object.empty_display_size = 0.1
+                blender_object.empty_display_type = 'CUBE'
 
+                object_collection.objects.link(blender_object)
 
-                    # It can happen that a multi-object is entirely composed of non-renderable
-                    # objects, so, objects_to_group might be actually empty after discarding them.
-                    if len(imported_objects) == 0:
-                        already_existing_objects[swtor_filepath] = ""
-                        print("DISCARDED")
-                        continue
+            else:
+
+                # MESH OR TERRAIN OBJECT  ----------------------------------
+
+                print(f'{LINEBACK}{amount_processed * 100 / amount_to_process:6.2f} %   AREA: {json_name:<{max_json_name_length}}   ID: {swtor_id}   NAME: {swtor_name:{max_swtor_name_length}}', end="")
 
-                    # Also, there could be a single object left.
-                    if len(imported_objects) == 1:
-                        blender_object = imported_objects[0]
-                        blender_object.name = swtor_id
-                        already_existing_objects[swtor_filepath] = [blender_object.data]
-                        print()  # adds line feed to previous print()
 
+                if element_kind == KIND_SPN:
+                    # .SPN_P REFERENCE THAT PREPROCESSING COULDN'T RESOLVE
+                    print("UNRESOLVED REFERENCE. DISCARDED")
+                    continue
 
+                if element_kind == KIND_MAG:
+                    # .MAG OBJECT REFERENCE THAT PREPROCESSING COULDN'T RESOLVE
+                    # (file not found or no .gr2 object referenced in it)
+                    print("UNRESOLVED .MAG FILE. DISCARDED")
+                    continue
 
+                if swtor_filepath not in loaded_assets:
+                    print("NOT LOADED. DISCARDED")
+                    continue
 
-                    # If there are more than one, and we've chosen not to
-                    # merge them into a single object, we need to select
-                    # a main one to parent the rest to. We go for the one
-                    # whose name is closest to the .gr2 filename.
-                    if len(imported_objects) > 1:
-                        if self.MergeMultiMeshObjects == False:
-                            multi_object_data_list = []
+                asset_meshes = loaded_assets[swtor_filepath]
 
-                            parent_name = imported_objects_meshnames_and_names[ find_closest_match(list(imported_objects_meshnames_and_names), swtor_name) ]
-                            
-                            blender_object = bpy.data.objects[parent_name]
-                            multi_object_data_list.append(blender_object.data)
+                if asset_meshes is None:
+                    # A dbo object being skipped is replaced with an
+                    # Empty to cover for it being a parent object.
+                    blender_object = bpy.data.objects.new(swtor_id, None)
+                    blender_object.empty_display_size = 1.0
+                    blender_object.empty_display_type = 'CUBE'
 
-                            for imported_object in imported_objects:
-                                if imported_object.name != parent_name:
-                                    parent_with_transformations(imported_object, blender_object, inherit_transformations = False)
-                                    multi_object_data_list.append(imported_object.data)
+                    object_collection.objects.link(blender_object)
 
-                            already_existing_objects[swtor_filepath] = multi_object_data_list
+                    print("DBO to EMPTY")
 
+                elif not asset_meshes:
+                    # The asset was made of discardables (colliders, etc.)
+                    # that the user decided to exclude.
+                    print("DISCARDED")
+                    continue
 
-                        else:
-                            # Join objects into a single one (using bpy.ops because
-                            # the alternative is sisyphean: meshes, materials…).
-                            deselectall()
-                            for imported_object in imported_objects:
-                                imported_object.select_set(state= True)
-                            bpy.context.view_layer.objects.active = imported_objects[0]
-                            bpy.ops.object.join()
-                            blender_object = bpy.context.view_layer.objects.active
-                            deselectall()
-                            already_existing_objects[swtor_filepath] = [blender_object.data]
+                else:
+                    blender_object = bpy.data.objects.new(name= swtor_id, object_data= asset_meshes[0])
 
+                    object_collection.objects.link(blender_object)
 
-                        blender_object.name = swtor_id
-                        
-                        print()  # adds line feed to previous print()
+                    # If the asset is a multi-object create children objects out of the rest
+                    # of its meshes using their names as their names, and parent them to the
+                    # object created just before. In this way, the parent can be processed as a
+                    # single object by the rest of the code and the children objects go a long for the ride.
+                    for multi_object_mesh in asset_meshes[1:]:
+                        multi_object_child = bpy.data.objects.new(name= multi_object_mesh.name, object_data= multi_object_mesh)
 
+                        object_collection.objects.link(multi_object_child)
 
+                        parent_with_transformations(multi_object_child, blender_object, inherit_transformations = False)
 
+                    if len(asset_meshes) > 1:
+                        print("MULTI-OBJECT")
+                    else:
+                        print("INSTANCED")
 
 
 
             # After all this processing, there's only one object,
-            # to transform, no matter if imported, duplicated, and
-            # parenting the rest of a multi-object.
+            # to transform, no matter if a mesh or parenting the
+            # rest of a multi-object.
             #
-            # Position, Rotate and Scale the object.
+            # Position, Rotate and Scale the object as planned.
             # we are delaying the usual 90º rotation in the X axis
             # to the very end of the whole process, as doing it now
             # would lead to extra nested rotations after the general
             # parenting stage that we don't know how to correct.
 
-            if not swtor_name.endswith(".hms"):
-                position = [element["position"][0], 
-                            element["position"][1],
-                            element["position"][2]]
-            
-                rotation = [radians( element["rotation"][0]), 
-                            radians( element["rotation"][1]),
-                            radians( element["rotation"][2])]
-
-                scale =    [element["scale"][0], 
-                            element["scale"][1],
-                            element["scale"][2]]
-            else:
-                scale = [0.001, 0.001, 0.001]
-            blender_object.location = position
+            blender_object.location = planned_object.location
             blender_object.rotation_mode = 'ZXY'
-            blender_object.rotation_euler = rotation
-            blender_object.scale = scale
-
-            # Resize lights to something more reasonable
-            if swtor_name.endswith(".lit"):
-                scale = scale / 10
+            blender_object.rotation_euler = planned_object.rotation
+            blender_object.scale = planned_object.scale
 
             # Fill custom properties to the object to facilitate
             # other processes.
@@ -1003,7 +932,9 @@ class SWTOR_OT_area_assembler(Operator):
             # blender_object["swtor_finalPositionZ"] = str(item["finalPosition"]["2"])
 
 
-        print(LINEBACK + "DONE!")
+        instance_time = time.time() - instance_start_time
+
+        print(LINEBACK + f"DONE! {amount_processed} OBJECTS PROCESSED IN {instance_time:.2f} SECONDS")
 
         # -------------------------------------------------------------------------------
         # FINAL PROCESSING PASSES -------------------------------------------------------
@@ -1015,18 +946,18 @@ class SWTOR_OT_area_assembler(Operator):
         print("\n\nPARENTING OBJECTS:\n------------------\n")
 
         amount_processed = 0
-        for element in swtor_location_data:
+        for planned_object in import_plan.objects:
             amount_processed += 1
-            swtor_id = element["id"]
+            swtor_id = planned_object.swtor_id
             if swtor_id in bpy.data.objects:
-                swtor_parent_id = element["parent"]
-                if swtor_parent_id != "0":
-                    if swtor_parent_id in bpy.data.objects:
+                swtor_parent_id = planned_object.parent_id
+                if planned_object.parent != PARENT_ROOT:
+                    if planned_object.parent != PARENT_MISSING and swtor_parent_id in bpy.data.objects:
                         print(f"{LINEBACK}{amount_processed * 100 / amount_to_process:6.2f} %  Parenting  {swtor_id}  to  {swtor_parent_id}")
                         parent_with_transformations(bpy.data.objects[swtor_id], bpy.data.objects[swtor_parent_id], inherit_transformations = True)
                     else:
                         print(f"{LINEBACK}{amount_processed * 100 / amount_to_process:6.2f} %  Parenting  {swtor_id}  to  {swtor_parent_id}  FAILED!!! Parent doesn't exist")
-                        print(f"          AREA: {element['json_name']:<{max_json_name_length}}   ORPHANED OBJECT: {str(Path(element['assetName']).stem):{max_swtor_name_length}}")
+                        print(f"          AREA: {planned_object.json_name:<{max_json_name_length}}   ORPHANED OBJECT: {planned_object.asset_name:{max_swtor_name_length}}")
                         print()
         bpy.ops.object.select_all(action="DESELECT")
         bpy.context.view_layer.objects.active = None
@@ -1040,12 +971,12 @@ class SWTOR_OT_area_assembler(Operator):
         print("\n\nRENAMING OBJECTS:\n-----------------\n")
 
         amount_processed = 0
-        for element in swtor_location_data:
+        for planned_object in import_plan.objects:
             amount_processed += 1
-            swtor_id = element["id"]
+            swtor_id = planned_object.swtor_id
             if swtor_id in bpy.data.objects:
-                swtor_name = Path(element["assetName"]).stem
-                if swtor_name != "heightmap":
+                swtor_name = planned_object.final_name
+                if swtor_name is not None:
                     bpy.data.objects[swtor_id].name = swtor_name
                     print(f"{LINEBACK}{amount_processed * 100 / amount_to_process:6.2f} %  Renaming  {swtor_id}  {swtor_name}")
 
@@ -1157,6 +1088,8 @@ class SWTOR_OT_area_assembler(Operator):
         print("APPLY SCENE SCALE: ", str(self.ApplySceneScale))
         print("HIDE OBJECTS AFTER IMPORT: ", str(self.HideAfterImport))
         print("EXCLUDE COLLECTIONS AFTER IMPORT: ", str(self.ExcludeAfterImport))
+        print("PARALLEL FILE PREPROCESSING: ", str(self.ParallelPreprocessing))
+        print("BUILT-IN .GR2 READER: ", str(self.UseBuiltinGr2Reader))
         print("------------------------------------------")
         if self.CreateSceneLights and Lights_count > 100:
             print("Number of lights in the area exceeds 100.")
@@ -1167,6 +1100,10 @@ class SWTOR_OT_area_assembler(Operator):
         end_time = time.time()
         total_time = end_time - start_time
 
+        print(f"Planning:   {plan_time:8.2f} s  ({len(import_plan)} objects, {len(import_plan.assets)} unique assets)")
+        print(f"Loading:    {load_time:8.2f} s  ({len(loaded_assets)} assets loaded, {builtin_read_count} by the built-in .gr2 reader, {library_loaded_count} from the asset library)")
+        print(f"Instancing: {instance_time:8.2f} s")
+        print("------------------------------------------")
         print(f"Task executed in hh:mm:ss.ms = {str(datetime.timedelta(seconds=total_time))[:-3]}")
         print("------------------------------------------")
         print("\nALL DONE!\n\nHAVE A NICE DAY.\n\nBYE <3!")
@@ -1226,6 +1163,14 @@ def register():
         description="If checked, a full length report will be produced, including not just errors but importing successes, too.\n\nFull length reports may exceed the Console's default capacity and become truncated.\nTo avoid that, increase that setting accordingly, around 500 lines per expected .json file,\nin your Operating System's Terminal app or in your IDE (Integrated Development Environment)",
         default=False,
     )
+    bpy.types.Scene.SAA_ParallelPreprocessing = bpy.props.BoolProperty(
+        description="Reads and preprocesses the selected .json files in parallel worker processes,\none per CPU core, leaving only the objects' creation to Blender itself.\n\nRecommended when importing many areas at once",
+        default=False,
+    )
+    bpy.types.Scene.SAA_UseBuiltinGr2Reader = bpy.props.BoolProperty(
+        description="Reads static .gr2 objects (most of an area's) with the Area Assembler's own reader,\ndecoding them in parallel worker processes when there are many.\nThe .gr2 importer addon is still used for the rest.\n\nDisable to import every .gr2 object through the addon",
+        default=True,
+    )
 
     bpy.utils.register_class(SWTOR_OT_area_assembler)
     
@@ -1244,6 +1189,8 @@ def unregister():
     del bpy.types.Scene.SAA_HideAfterImport
     del bpy.types.Scene.SAA_ExcludeAfterImport
     del bpy.types.Scene.SAA_ShowFullReport
+    del bpy.types.Scene.SAA_ParallelPreprocessing
+    del bpy.types.Scene.SAA_UseBuiltinGr2Reader
 
 
 
@@ -1461,6 +1408,71 @@ def hide_collection_children(collection):
     for child in collection.children:
         child.hide_viewport = True
 
+def create_capture_collection(name = "SWTOR Area Assembler Import"):
+    # Creates an (empty) Collection for capture_new_objects() in the
+    # Scene's root "Scene Collection", so that it is in the View Layer
+    # (importers select the objects they create).
+    capture_collection = bpy.data.collections.new(name)
+    bpy.context.scene.collection.children.link(capture_collection)
+    return capture_collection
+
+
+@contextlib.contextmanager
+def capture_new_objects(capture_collection, captured_objects):
+    # Makes capture_collection the active Collection while running
+    # the code in the with block, so that the objects that importers
+    # create are linked to it, and then moves them out of it into the
+    # captured_objects list (even if the block fails), leaving them
+    # in no Collection. Costs as much as objects were created,
+    # no matter how many there are in the scene.
+    # Usage is:
+    # imported_objects = []
+    # with capture_new_objects(capture_collection, imported_objects):
+    #     <importer call here>
+    view_layer = bpy.context.view_layer
+    previous_layer_collection = view_layer.active_layer_collection
+    view_layer.active_layer_collection = view_layer.layer_collection.children[capture_collection.name]
+    try:
+        yield captured_objects
+    finally:
+        view_layer.active_layer_collection = previous_layer_collection
+        captured_objects.extend(capture_collection.objects)
+        for captured_object in captured_objects:
+            capture_collection.objects.unlink(captured_object)
+
+
+def import_obj(filepath):
+    # Imports an .obj file (terrains) through Blender's .obj importer.
+    return bpy.ops.wm.obj_import(filepath=filepath)
+
+
+def import_asset(importer, filepath, capture_collection):
+    # Imports a file through an importer function (see gr2_importer.py,
+    # import_obj()), catching the objects it creates (see
+    # capture_new_objects()) and silencing its console output.
+    # Returns (list of the objects, None), or ([], FAILURE_FAILED or
+    # FAILURE_CRASHED) if the importer cancelled or raised, having
+    # deleted whatever it left behind.
+    imported_objects = []
+    try:
+        with capture_new_objects(capture_collection, imported_objects):
+            with suppress_stdout():
+                result = importer(filepath)
+    except Exception:
+        remove_objects(imported_objects)
+        return [], FAILURE_CRASHED
+    if "CANCELLED" in result:
+        remove_objects(imported_objects)
+        return [], FAILURE_FAILED
+    return imported_objects, None
+
+
+def remove_objects(objects):
+    # Deletes objects (say, what a failed import left behind).
+    for object in objects:
+        bpy.data.objects.remove(object, do_unlink=True)
+
+
 def link_objects_to_collection (objects, collection, move = False):
     """
     Links objects to a Collection. If move == True,
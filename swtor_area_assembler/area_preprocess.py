@@ -0,0 +1,313 @@
+# Per-.json file preprocessing of area data.
+#
+# Reads an area .json file's asset elements, normalizes their
+# assetNames and resolves indirect object references (.spn_p to
+# .gr2 / .mag / .dyn, .dyn to its visuals, .mag to .gr2; see
+# asset_resolver.py). The results are
+# returned in a compact, picklable form (see element_store.py)
+# so that this stage can run in a process pool when importing
+# many areas at once, leaving only the bpy work to Blender's
+# main thread.
+#
+# No bpy here: worker processes can't import it.
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from zipfile import ZipFile
+
+from .area_reader import iter_area_elements
+from .asset_resolver import AssetResolver
+from .dyn_database import get_dyn_database_filepath, open_dyn_database
+from .dyn_templates import DynTemplateCache, ZippedDynSource
+from .mag_cache import open_mag_mesh_cache
+from .spn_lookup import get_spn_index
+from .element_store import AreaElementStore, ELEMENT_ASSET, ELEMENT_DYN_PARENT
+from .plan_cache import plan_cache_key, load_area_plan, save_area_plan
+
+
+def open_dyn_zip(dyn_zip_filepath):
+    # Returns the zipped dyn nodes archive, or None if it doesn't exist.
+    try:
+        return ZipFile(dyn_zip_filepath, "r")
+    except FileNotFoundError:
+        return None
+
+
+def open_dyn_templates(dyn_zip_filepath, dyn_database_filepath=None):
+    # Returns a .dyn templates cache reading from the dyn visuals
+    # database if there is one (see dyn_database.py), or else
+    # from the zipped dyn nodes.
+    dyn_source = open_dyn_database(dyn_database_filepath) if dyn_database_filepath else None
+    if dyn_source is None:
+        dyn_zip = open_dyn_zip(dyn_zip_filepath)
+        if dyn_zip is not None:
+            dyn_source = ZippedDynSource(dyn_zip)
+    return DynTemplateCache(dyn_source)
+
+
+def open_asset_resolver(spn_table_filepath, dyn_zip_filepath, resources=None,
+                        index_cache_folderpath=None, dyn_database_filepath=None):
+    # Returns an AssetResolver using the spn table, the .dyn visuals
+    # (from their database if there's one) and the .mag resolutions
+    # cached in index_cache_folderpath (if set), reading .mag files
+    # from resources (if set).
+    return AssetResolver(
+        get_spn_index(spn_table_filepath, index_cache_folderpath),
+        open_dyn_templates(dyn_zip_filepath, dyn_database_filepath),
+        resources,
+        open_mag_mesh_cache(index_cache_folderpath, resources.resources_key if resources is not None else None),
+        )
+
+
+def preprocess_area_file(json_filepath, resolver, skip_dbo_objects=True, mag_filepaths=None):
+    """
+    Preprocesses an area .json file, resolving its indirect object
+    references (.spn_p, .dyn, .mag) through resolver (an AssetResolver,
+    see asset_resolver.py). If mag_filepaths (a set) is given, the
+    .mag files that the resolutions depend on are added to it.
+
+    Returns a tuple of:
+    • an AreaElementStore with the area's elements.
+    • whether the area has terrain objects.
+    • the longest asset name's length (for console output formatting).
+
+    Raises FileNotFoundError if the file doesn't exist
+    and ValueError if it is empty or badly written.
+    """
+    # The elements are streamed into a compact store as they are,
+    # so that the whole file's side files can be read up front and
+    # concurrently (see AssetResolver.prefetch()), rather than one by
+    # one as they turn up while resolving, without keeping every
+    # element's dict around in the meantime.
+    read_store = AreaElementStore()
+    has_terrain = False
+    max_swtor_name_length = 0
+
+    for element in iter_area_elements(json_filepath, skip_dbo_objects):
+        read_store.append(
+            element["id"],
+            element["parent"],
+            element["assetName"],
+            element["position"],
+            element["rotation"],
+            element["scale"],
+            )
+
+    resolver.prefetch(read_store.asset_paths)
+
+    store = AreaElementStore()
+    placeable_elements = []
+
+    for i in range(len(read_store)):
+        swtor_filepath = read_store.asset_path(i)
+        swtor_id = read_store.ids[i]
+
+        # Calculate max name length For console output formatting
+        swtor_name_length = len(read_store.asset_name(i)) + 2
+        if swtor_name_length > max_swtor_name_length:
+            max_swtor_name_length = swtor_name_length
+
+        if ".hms" in swtor_filepath:
+            has_terrain = True
+
+        # Resolve indirect object types (.spn_p to .gr2, .mag or .dyn,
+        # .mag to .gr2, .dyn to its visuals, etc.) all the way down.
+        # Placeables keep their own path and become parent Empties.
+        resolution = resolver.resolve(swtor_filepath)
+        if mag_filepaths is not None:
+            mag_filepaths.update(resolver.mag_dependencies(swtor_filepath))
+        if resolution.children is None:
+            swtor_filepath = resolution.asset_path
+            element_type = ELEMENT_ASSET
+        else:
+            placeable_elements.append((swtor_id, resolution.children))
+            element_type = ELEMENT_DYN_PARENT
+
+        store.append(
+            swtor_id,
+            read_store.parent_ids[i],
+            swtor_filepath,
+            read_store.position(i),
+            read_store.rotation(i),
+            read_store.scale(i),
+            element_type,
+            )
+
+    for swtor_id, children in placeable_elements:
+        _append_placeable_children(store, swtor_id, children)
+
+    return store, has_terrain, max_swtor_name_length
+
+
+def _append_placeable_children(store, parent_id, children):
+    # Appends a placeable's visuals as children of its element (every
+    # placement of a same placeable shares its resolution), and those
+    # visuals' own children if they are placeables too.
+    for idx, position, rotation, scale, resolution in children:
+        swtor_id = parent_id + "-" + str(idx)
+        store.append(
+            swtor_id,
+            parent_id,
+            resolution.asset_path,
+            position,
+            rotation,
+            scale,
+            ELEMENT_ASSET if resolution.children is None else ELEMENT_DYN_PARENT,
+            )
+        if resolution.children is not None:
+            _append_placeable_children(store, swtor_id, resolution.children)
+
+
+
+
+# PROCESS POOL ------------------------------------------------------------------
+
+# Per-worker process resources, opened once by the pool's initializer.
+_worker_resolver = None
+_worker_skip_dbo_objects = True
+
+
+def _init_worker(spn_table_filepath, dyn_zip_filepath, dyn_database_filepath, resources,
+                 skip_dbo_objects, index_cache_folderpath):
+    global _worker_resolver, _worker_skip_dbo_objects
+    _worker_resolver = open_asset_resolver(spn_table_filepath, dyn_zip_filepath, resources,
+                                           index_cache_folderpath, dyn_database_filepath)
+    _worker_skip_dbo_objects = skip_dbo_objects
+
+
+def _preprocess_in_worker(json_filepath):
+    # Returns (result, .mag files it depends on, new .mag
+    # resolutions). Exceptions are returned
+    # rather than raised so that a single bad file doesn't abort the
+    # whole map(). The .mag resolutions go to the main process, which
+    # saves them once for all workers, rather than every worker
+    # rewriting the same cache file after every area.
+    mag_filepaths = set()
+    try:
+        result = preprocess_area_file(json_filepath, _worker_resolver, _worker_skip_dbo_objects, mag_filepaths)
+    except (OSError, ValueError) as error:
+        result = error
+    return result, mag_filepaths, _worker_resolver.mag_cache.take_new_entries()
+
+
+def preprocess_area_files(json_filepaths, spn_table_filepath, dyn_zip_filepath,
+                          resources=None, skip_dbo_objects=True, use_process_pool=False, max_workers=None,
+                          plan_cache_folderpath=None, addon_version=(), index_cache_folderpath=None):
+    """
+    Yields (json_filepath, result) pairs in the same order as json_filepaths,
+    result being preprocess_area_file()'s return value or the
+    OSError / ValueError exception that it raised.
+
+    If use_process_pool is True and there are several files, they are
+    preprocessed in parallel worker processes (which must be able to
+    import this module without bpy).
+
+    If plan_cache_folderpath is set, unchanged files' results are read
+    from the plan cache there (see plan_cache.py) instead of being
+    preprocessed again, and new results are stored in it. Plans are
+    also checked against the current signatures of the .mag files
+    they resolved.
+
+    The compiled spn index (see spn_lookup.py), the dyn visuals
+    database (see dyn_database.py) and the .mag resolutions cache
+    (see mag_cache.py) are kept in index_cache_folderpath, if set.
+
+    .mag references are resolved by reading them from resources
+    (a ResourcesVFS, see resources_vfs.py), if set.
+    """
+    json_filepaths = list(json_filepaths)
+
+    def mag_signature(mag_filepath):
+        return resources.signature(mag_filepath) if resources is not None else None
+
+    # Look for already preprocessed plans first.
+    cache_keys = {}
+    cached_results = {}
+    if plan_cache_folderpath:
+        options = {
+            "SkipDBOObjects": bool(skip_dbo_objects),
+            "Resources": resources.resources_key if resources is not None else "",
+            }
+        for json_filepath in json_filepaths:
+            key = plan_cache_key(json_filepath, addon_version, options, (spn_table_filepath, dyn_zip_filepath))
+            if key is None:
+                continue
+            cache_keys[json_filepath] = key
+            cached_result = load_area_plan(plan_cache_folderpath, key, mag_signature)
+            if cached_result is not None:
+                cached_results[json_filepath] = cached_result
+
+    pending_filepaths = [json_filepath for json_filepath in json_filepaths if json_filepath not in cached_results]
+
+    if pending_filepaths:
+        preprocessed = _preprocess(pending_filepaths, spn_table_filepath, dyn_zip_filepath,
+                                   resources, skip_dbo_objects, use_process_pool, max_workers, index_cache_folderpath)
+    else:
+        preprocessed = iter(())
+
+    for json_filepath in json_filepaths:
+        if json_filepath in cached_results:
+            yield json_filepath, cached_results.pop(json_filepath)
+            continue
+
+        _, result, mag_filepaths = next(preprocessed)
+        if json_filepath in cache_keys and not isinstance(result, Exception):
+            save_area_plan(plan_cache_folderpath, cache_keys[json_filepath], result,
+                           {mag_filepath: mag_signature(mag_filepath) for mag_filepath in mag_filepaths})
+        yield json_filepath, result
+
+
+def _preprocess(json_filepaths, spn_table_filepath, dyn_zip_filepath,
+                resources, skip_dbo_objects, use_process_pool, max_workers, index_cache_folderpath):
+    # Yields (json_filepath, result, set of the .mag files it depends
+    # on), preprocessing the files in this process or in a pool of
+    # worker processes.
+
+    # Compiled if needed and loaded once per session (see spn_lookup.py).
+    # When using worker processes, this makes sure they all find
+    # an up to date index file to map.
+    get_spn_index(spn_table_filepath, index_cache_folderpath)
+
+    # Same for the dyn visuals database, built here once if needed.
+    dyn_database_filepath = get_dyn_database_filepath(dyn_zip_filepath, index_cache_folderpath)
+
+    if not use_process_pool or len(json_filepaths) < 2:
+        # A single resolver for all files, so that
+        # they share their assets' resolutions.
+        resolver = open_asset_resolver(spn_table_filepath, dyn_zip_filepath, resources,
+                                       index_cache_folderpath, dyn_database_filepath)
+        try:
+            for json_filepath in json_filepaths:
+                mag_filepaths = set()
+                try:
+                    result = preprocess_area_file(json_filepath, resolver, skip_dbo_objects, mag_filepaths)
+                except (OSError, ValueError) as error:
+                    result = error
+                yield json_filepath, result, mag_filepaths
+        finally:
+            resolver.mag_cache.save()
+            resolver.dyn_templates.close()
+        return
+
+    if max_workers is None:
+        max_workers = min(len(json_filepaths), os.cpu_count() or 1)
+
+    mag_cache = open_mag_mesh_cache(index_cache_folderpath, resources.resources_key if resources is not None else None)
+
+    # "spawn" is the only start method that works everywhere
+    # (and the only safe one when forking Blender itself).
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers,
+                                 mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_init_worker,
+                                 initargs=(spn_table_filepath, dyn_zip_filepath, dyn_database_filepath, resources,
+                                           skip_dbo_objects, index_cache_folderpath),
+                                 ) as executor:
+            for json_filepath, (result, mag_filepaths, mag_entries) in zip(
+                    json_filepaths, executor.map(_preprocess_in_worker, json_filepaths)):
+                for mag_filepath, (signature, gr2_filepath) in mag_entries.items():
+                    mag_cache.put(mag_filepath, signature, gr2_filepath)
+                yield json_filepath, result, mag_filepaths
+    finally:
+        mag_cache.save()
@@ -0,0 +1,155 @@
+# Incremental reader for Jedipedia.net-exported area .json files.
+#
+# Area files can weigh several MegaBytes each, and most of their
+# elements aren't assets at all (sound emitters, triggers, etc.).
+# Instead of json.load()-ing a whole file and keeping every element
+# around, this reader decodes the top-level array one element at
+# a time, drops the non-asset ones as it goes and keeps only the
+# fields the Area Assembler actually uses.
+#
+# No bpy here: this module must stay importable outside Blender.
+
+import json
+
+from .asset_paths import canonical_asset_path
+
+
+# Fields of an area element that the Area Assembler uses.
+# Anything else in the .json file is discarded while reading.
+ASSET_ELEMENT_KEYS = ("id", "parent", "assetName", "position", "rotation", "scale")
+
+# Size of the text chunks read from disk while decoding.
+READ_CHUNK_SIZE = 1 << 20
+
+_json_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+# Characters a number can go on with.
+_NUMBER_CHARACTERS = frozenset("0123456789+-.eE")
+
+
+def is_asset_filepath(swtor_filepath, skip_dbo_objects):
+    """
+    Returns True if an element's assetName points to something
+    the Area Assembler knows how to turn into an object.
+    """
+    return (
+        (".gr2" in swtor_filepath or
+         ".hms" in swtor_filepath or
+         ".lit" in swtor_filepath or
+         ".mag" in swtor_filepath or
+         ".spn_p" in swtor_filepath or
+         ("dbo" in swtor_filepath and skip_dbo_objects == False) )
+        and not "_fadeportal_" in swtor_filepath
+        )
+
+
+def iter_json_array(json_filepath, chunk_size=READ_CHUNK_SIZE):
+    """
+    Yields the elements of a .json file's top-level array one at a time,
+    reading the file in chunks instead of loading it whole.
+
+    Raises ValueError (json.JSONDecodeError) if the file is empty,
+    isn't a top-level array, is badly written or has anything but
+    whitespace after the array.
+    """
+    with open(json_filepath, "r") as read_file:
+        buffer = ""
+        pos = 0
+        eof = False
+
+        def fill():
+            # Drop what's been consumed already and append a new chunk.
+            nonlocal buffer, pos, eof
+            chunk = read_file.read(chunk_size)
+            if not chunk:
+                eof = True
+            buffer = buffer[pos:] + chunk
+            pos = 0
+
+        def skip_whitespace():
+            nonlocal pos
+            while True:
+                while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                    pos += 1
+                if pos < len(buffer) or eof:
+                    return
+                fill()
+
+        def check_end():
+            # Only whitespace may follow the array.
+            nonlocal pos
+            pos += 1
+            skip_whitespace()
+            if pos < len(buffer):
+                raise json.JSONDecodeError("Extra data", buffer, pos)
+
+        skip_whitespace()
+        if pos >= len(buffer) or buffer[pos] != "[":
+            raise json.JSONDecodeError("Expecting a top-level array", buffer, pos)
+        pos += 1
+
+        expecting_element = True
+        skip_whitespace()
+        if pos < len(buffer) and buffer[pos] == "]":
+            check_end()
+            return
+
+        while True:
+            skip_whitespace()
+            if pos >= len(buffer):
+                raise json.JSONDecodeError("Unterminated array", buffer, pos)
+
+            if not expecting_element:
+                if buffer[pos] == "]":
+                    check_end()
+                    return
+                if buffer[pos] != ",":
+                    raise json.JSONDecodeError("Expecting ',' delimiter", buffer, pos)
+                pos += 1
+                expecting_element = True
+                continue
+
+            # Decode the next element. If it's cut short by the end of the
+            # buffer, or it ends exactly there or is a number followed by
+            # what could be more of it (say, split right after its "." or
+            # "e"), read more and try again.
+            while True:
+                try:
+                    element, end = _json_decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                    fill()
+                    continue
+                if not eof and (end == len(buffer) or (
+                        isinstance(element, (int, float)) and buffer[end] in _NUMBER_CHARACTERS)):
+                    fill()
+                    continue
+                break
+
+            pos = end
+            expecting_element = False
+            yield element
+
+
+def iter_area_elements(json_filepath, skip_dbo_objects=True):
+    """
+    Yields the asset elements of an area .json file, already filtered
+    and trimmed down to the fields in ASSET_ELEMENT_KEYS.
+    Elements without an assetName or with one that the Area Assembler
+    doesn't deal with are dropped. assetNames are turned into their
+    canonical form (see asset_paths.py).
+
+    Raises ValueError if the file is empty or badly written.
+    """
+    for element in iter_json_array(json_filepath):
+        if not isinstance(element, dict) or not "assetName" in element:
+            continue
+
+        swtor_filepath = canonical_asset_path(element["assetName"])
+        if not is_asset_filepath(swtor_filepath, skip_dbo_objects):
+            continue
+
+        asset_element = {key: element[key] for key in ASSET_ELEMENT_KEYS if key in element}
+        asset_element["assetName"] = swtor_filepath
+        yield asset_element
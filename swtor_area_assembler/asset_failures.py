@@ -0,0 +1,67 @@
+# Persistent negative cache of assets that can't be imported.
+#
+# Assets whose files are missing, or that make the .gr2 / .obj importers
+# fail or crash, used to be found out again on every import of any area
+# using them, paying for the lookup, the import attempt and the crash
+# each time. They are remembered instead, per resources location, in a
+# small .json file in the cache folder (see signed_cache.py), keyed by
+# their path and their file's size and modification time, so that later
+# imports skip them up front for as long as their files don't change.
+#
+# No bpy here.
+
+import os
+
+from .addon_cache import cache_key
+from .signed_cache import SignedCache, NOT_CACHED
+
+
+ASSET_FAILURES_VERSION = 1
+
+ASSET_FAILURES_PREFIX = "asset_failures_"
+
+# Failure reasons
+FAILURE_MISSING = "missing"    # No such file.
+FAILURE_FAILED = "failed"      # The importer cancelled.
+FAILURE_CRASHED = "crashed"    # The importer raised an exception.
+
+
+class AssetFailureCache(SignedCache):
+    """
+    Asset path: (signature, failure reason) mapping, signature being
+    the asset's ResourcesVFS.signature() (None for missing files).
+    """
+
+    version = ASSET_FAILURES_VERSION
+
+    def failure(self, swtor_filepath, signature):
+        # The reason an asset with that signature failed before, or None.
+        reason = self.get(swtor_filepath, signature)
+        return None if reason is NOT_CACHED else reason
+
+
+def open_asset_failure_cache(cache_folderpath, resources_key):
+    # Returns the AssetFailureCache of a resources location (see
+    # ResourcesVFS.resources_key), persisted in cache_folderpath
+    # if set (in memory only if not).
+    if not cache_folderpath or not resources_key:
+        return AssetFailureCache()
+    return AssetFailureCache(os.path.join(cache_folderpath, ASSET_FAILURES_PREFIX + cache_key(resources_key) + ".json"))
+
+
+def clear_asset_failure_caches(cache_folderpath):
+    # Deletes every resources location's AssetFailureCache file
+    # in cache_folderpath. Returns how many there were.
+    cleared = 0
+    try:
+        filenames = os.listdir(cache_folderpath)
+    except OSError:
+        return 0
+    for filename in filenames:
+        if filename.startswith(ASSET_FAILURES_PREFIX) and filename.endswith(".json"):
+            try:
+                os.remove(os.path.join(cache_folderpath, filename))
+                cleared += 1
+            except OSError:
+                pass
+    return cleared
@@ -0,0 +1,150 @@
+# Persistent library of loaded assets.
+#
+# Importing an area loads each of its unique assets once (see the
+# importer's Load phase), but the next import, say of a neighboring
+# area tomorrow, used to import the same shared props through the .gr2
+# importer all over again. Loaded assets are stored instead in a library
+# of .blend files in the cache folder, one per asset, holding its meshes
+# with their material slots, and later imports append them from it.
+#
+# An index (see signed_cache.py) records, per asset path and file
+# signature (size and modification time), how the asset was loaded: the
+# names of its meshes (the first one being the main object's, the rest a
+# multi-object's other objects) and of their materials, an empty list if
+# all its objects were discarded, or None if it became an Empty. Assets
+# whose files change are loaded and stored again.
+#
+# How assets are loaded depends on the resources' location and on some
+# of the importer's options, so each combination of them gets a library
+# of its own, in a subfolder. All libraries together are capped in size,
+# their least recently used files being deleted first when exceeding it.
+#
+# The .blend files themselves are written and read by the importer, with
+# bpy.data.libraries. No bpy here.
+
+import os
+import shutil
+import time
+
+from .addon_cache import cache_key
+from .signed_cache import SignedCache, NOT_CACHED
+
+
+ASSET_LIBRARY_VERSION = 1
+
+ASSET_LIBRARY_INDEX_FILENAME = "index.json"
+
+
+class AssetLibrary(SignedCache):
+    """
+    Library of loaded assets in folderpath (see this module's header):
+    an asset path: (signature, loaded asset description) mapping saved
+    in the library's index, plus the assets' .blend files.
+    """
+
+    version = ASSET_LIBRARY_VERSION
+
+    def __init__(self, folderpath):
+        self.folderpath = folderpath
+        super().__init__(os.path.join(folderpath, ASSET_LIBRARY_INDEX_FILENAME))
+
+    def blend_filepath(self, swtor_filepath):
+        # Path of an asset's .blend file.
+        return os.path.join(self.folderpath, cache_key(swtor_filepath) + ".blend")
+
+    def asset(self, swtor_filepath, signature):
+        """
+        Returns the description of a stored asset with that signature
+        (a list of [mesh name, list of material names] pairs, or None),
+        or NOT_CACHED if it isn't stored or its .blend file is gone.
+        Records the .blend file's use, for pruning.
+        """
+        description = self.get(swtor_filepath, signature)
+        if description is NOT_CACHED or not description:
+            return description
+        try:
+            now = time.time_ns()
+            os.utime(self.blend_filepath(swtor_filepath), ns=(now, now))
+        except OSError:
+            return NOT_CACHED
+        return description
+
+
+def asset_library_key(resources_key, options):
+    # Key of the library for a resources location and a dict of the
+    # options that affect how assets are loaded.
+    return cache_key(resources_key + "|" + repr(sorted(options.items())))
+
+
+def open_asset_library(asset_library_folderpath, resources_key, options):
+    # Returns the AssetLibrary for a resources location (see
+    # ResourcesVFS.resources_key) and the importer's options, in a
+    # subfolder of asset_library_folderpath, or None if it can't be created.
+    if not asset_library_folderpath or not resources_key:
+        return None
+    folderpath = os.path.join(asset_library_folderpath, asset_library_key(resources_key, options))
+    try:
+        os.makedirs(folderpath, exist_ok=True)
+    except OSError:
+        return None
+    return AssetLibrary(folderpath)
+
+
+def _list_blend_files(asset_library_folderpath):
+    # (access time, size, path) of every library's .blend files.
+    files = []
+    for folderpath, _, filenames in os.walk(asset_library_folderpath):
+        for filename in filenames:
+            if not filename.endswith(".blend"):
+                continue
+            filepath = os.path.join(folderpath, filename)
+            try:
+                stat = os.stat(filepath)
+            except OSError:
+                continue
+            files.append((stat.st_atime_ns, stat.st_size, filepath))
+    return files
+
+
+def asset_library_size(asset_library_folderpath):
+    # Returns (size in bytes, number of assets) of all libraries.
+    files = _list_blend_files(asset_library_folderpath)
+    return sum(size for _, size, _ in files), len(files)
+
+
+def prune_asset_libraries(asset_library_folderpath, max_size):
+    """
+    Deletes the least recently used .blend files of all libraries
+    until they take at most max_size bytes (90% of it, if exceeded,
+    so as not to prune on every import). Returns (size in bytes,
+    number of assets) left. Their index entries are left alone:
+    assets whose files are gone are just loaded and stored again.
+    """
+    files = sorted(_list_blend_files(asset_library_folderpath))
+    size = sum(file_size for _, file_size, _ in files)
+    count = len(files)
+    if size <= max_size:
+        return size, count
+    target_size = max_size * 9 // 10
+    for _, file_size, filepath in files:
+        if size <= target_size:
+            break
+        try:
+            os.remove(filepath)
+            size -= file_size
+            count -= 1
+        except OSError:
+            pass
+    return size, count
+
+
+def clear_asset_libraries(asset_library_folderpath):
+    # Deletes all libraries. Returns how many assets they held.
+    _, count = asset_library_size(asset_library_folderpath)
+    try:
+        folder_entries = os.listdir(asset_library_folderpath)
+    except OSError:
+        return 0
+    for folder_entry in folder_entries:
+        shutil.rmtree(os.path.join(asset_library_folderpath, folder_entry), ignore_errors=True)
+    return count
@@ -0,0 +1,85 @@
+# Writing and reading of the asset library's .blend files.
+#
+# See asset_library.py. A loaded asset's meshes are written, with their
+# materials, to a .blend file of its own through bpy.data.libraries.write()
+# and appended back from it through bpy.data.libraries.load(). Appended
+# materials that already exist in the scene by name (say, used by other
+# assets) would come in as .001 duplicates, so the existing ones replace
+# them, as the importers would have reused them, too.
+
+import os
+
+import bpy
+
+from .signed_cache import NOT_CACHED
+
+
+def asset_description(meshes):
+    # An AssetLibrary description of a loaded asset (see the importer's
+    # loaded_assets): [mesh name, material names] pairs, or None.
+    if meshes is None:
+        return None
+    return [
+        [mesh.name, [material.name if material is not None else None for material in mesh.materials]]
+        for mesh in meshes
+        ]
+
+
+def store_library_asset(asset_library, swtor_filepath, signature, meshes):
+    """
+    Stores a loaded asset (see the importer's loaded_assets) in an
+    AssetLibrary: its meshes in its .blend file and its description
+    in the library's index. Returns False if it couldn't be written.
+    """
+    if meshes:
+        blend_filepath = asset_library.blend_filepath(swtor_filepath)
+        temp_filepath = blend_filepath + ".%d.tmp" % os.getpid()
+        try:
+            bpy.data.libraries.write(temp_filepath, set(meshes), fake_user=True)
+            os.replace(temp_filepath, blend_filepath)
+        except (OSError, RuntimeError):
+            try:
+                os.remove(temp_filepath)
+            except OSError:
+                pass
+            return False
+    asset_library.put(swtor_filepath, signature, asset_description(meshes))
+    return True
+
+
+def load_library_asset(asset_library, swtor_filepath, description):
+    """
+    Appends a stored asset's meshes from an AssetLibrary, given its
+    description (see AssetLibrary.asset()). Returns them as the
+    importer's loaded_assets would hold them, or NOT_CACHED if
+    they couldn't be read.
+    """
+    if not description:
+        return description
+
+    mesh_names = [mesh_name for mesh_name, _ in description]
+    try:
+        with bpy.data.libraries.load(asset_library.blend_filepath(swtor_filepath), link=False) as (data_from, data_to):
+            data_to.meshes = [mesh_name for mesh_name in mesh_names if mesh_name in data_from.meshes]
+    except (OSError, RuntimeError):
+        return NOT_CACHED
+
+    meshes = data_to.meshes
+    if len(meshes) != len(mesh_names) or any(mesh is None for mesh in meshes):
+        for mesh in meshes:
+            if mesh is not None:
+                bpy.data.meshes.remove(mesh)
+        return NOT_CACHED
+
+    for mesh, (_, material_names) in zip(meshes, description):
+        mesh.use_fake_user = False
+        for slot_index, material_name in enumerate(material_names[:len(mesh.materials)]):
+            appended_material = mesh.materials[slot_index]
+            existing_material = bpy.data.materials.get(material_name) if material_name else None
+            if existing_material is None or existing_material == appended_material:
+                continue
+            mesh.materials[slot_index] = existing_material
+            if appended_material is not None and appended_material.users == 0:
+                bpy.data.materials.remove(appended_material)
+
+    return meshes
@@ -0,0 +1,36 @@
+# Canonical asset paths.
+#
+# Asset paths arrive with mixed leading slashes, backslashes and letter
+# case from Jedipedia's exports, the spn table, .dyn and .mag files and
+# .mat files, so that one same asset can be spelled several ways. Every
+# lookup (deduplication, tables, caches, file access) goes through the
+# canonical form produced here instead:
+#   • forward slashes as separators (they work on every OS),
+#   • no leading or repeated separators,
+#   • lowercase (SWTOR's own file names are case-insensitive),
+# interned, so that equal paths are one same string object.
+#
+# No bpy here.
+
+import sys
+from functools import lru_cache
+from pathlib import Path
+
+
+@lru_cache(maxsize=1 << 17)
+def canonical_asset_path(swtor_filepath):
+    """
+    Returns the canonical, interned form of an asset path
+    (see this module's header).
+    """
+    swtor_filepath = swtor_filepath.strip().replace("\\", "/").lower()
+    if "//" in swtor_filepath:
+        swtor_filepath = "/".join(part for part in swtor_filepath.split("/") if part)
+    else:
+        swtor_filepath = swtor_filepath.lstrip("/")
+    return sys.intern(swtor_filepath)
+
+
+def resources_filepath(swtor_resources_folderpath, swtor_filepath):
+    # Full filepath of an asset inside the extracted 'resources' folder.
+    return str(Path(swtor_resources_folderpath) / canonical_asset_path(swtor_filepath))
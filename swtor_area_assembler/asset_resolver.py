@@ -0,0 +1,219 @@
+# Recursive resolution of indirect asset references.
+#
+# Area elements often don't point to a .gr2 object directly but to
+# a chain of references: an .spn_p resolves (through the spn table,
+# which already folds the .plc step in) to a .gr2, a .mag or a .dyn
+# placeable, a .dyn's visuals can be .gr2, .mag or further .spn_p or
+# .dyn references, and a .mag names the .gr2 it shows. The resolver
+# walks the whole chain once per distinct asset path and memoizes the
+# result, so that every other element referencing the same asset only
+# costs a dict lookup, and so that .mag files are read once, here,
+# rather than in the importer's main loop (and, with a mag_cache.py
+# cache, not even that as long as they don't change).
+#
+# No bpy here.
+
+from collections import namedtuple
+
+from .asset_paths import canonical_asset_path
+from .mag_cache import MAG_NOT_CACHED
+from .prefetch import read_concurrently, PREFETCH_MAX_WORKERS
+from .spn_lookup import SPN_TARGET_GR2, SPN_TARGET_MAG, SPN_TARGET_DYN, spn_target_kind
+
+
+# An asset path's resolution:
+#   asset_path: the .gr2 it ends up at, or the placeable's (or the
+#               unresolvable reference's) own path.
+#   children:   None, or, for placeables, a tuple of (visual index,
+#               position, rotation, scale, ResolvedAsset) tuples.
+#   resolved:   whether the chain ended at something importable.
+ResolvedAsset = namedtuple("ResolvedAsset", ("asset_path", "children", "resolved"))
+
+
+def parse_mag_mesh(mag_data):
+    """
+    Returns the canonical path of the .gr2 object that a .mag file's
+    contents (bytes) reference, or None if they don't reference any.
+    """
+    for line in mag_data.decode("utf-8", errors="replace").splitlines():
+        if ".gr2" in line and "Mesh=" in line:
+            return canonical_asset_path(line.split("Mesh=", 1)[1])
+    return None
+
+
+class AssetResolver:
+    """
+    Memoized resolver of asset references (see this module's header).
+
+    spn_index is an SpnIndex (or None), dyn_templates a DynTemplateCache,
+    and resources the ResourcesVFS .mag files are read from (if None,
+    .mag references are left unresolved). mag_cache, if set, is
+    a MagMeshCache holding earlier .mag resolutions.
+    """
+
+    def __init__(self, spn_index, dyn_templates, resources=None, mag_cache=None):
+        self.spn_index = spn_index
+        self.dyn_templates = dyn_templates
+        self.resources = resources
+        self.mag_cache = mag_cache
+        self._resolutions = {}
+        # Paths being resolved, to break reference cycles.
+        self._resolving = set()
+        # .mag files' .gr2 paths (or None), by .mag path.
+        self._mag_meshes = {}
+        # .mag files each resolution read, by path (see mag_dependencies()).
+        self._mag_dependencies = {}
+
+    def prefetch(self, swtor_filepaths, max_workers=PREFETCH_MAX_WORKERS):
+        """
+        Reads the side files (.dyn visuals, .mag files) that resolving
+        swtor_filepaths is going to need, one level of references at
+        a time, concurrently (see prefetch.py), so that resolving them
+        afterwards doesn't wait on any file.
+        """
+        pending = set(swtor_filepaths)
+        seen = set()
+        while pending:
+            dyn_filepaths = []
+            mag_filepaths = []
+            next_pending = set()
+
+            for swtor_filepath in pending:
+                if swtor_filepath in seen or swtor_filepath in self._resolutions:
+                    continue
+                seen.add(swtor_filepath)
+
+                if swtor_filepath.endswith(".spn_p"):
+                    spn_entry = self.spn_index.lookup(swtor_filepath) if self.spn_index is not None else None
+                    if spn_entry is not None:
+                        next_pending.add(spn_entry[1])
+                    continue
+
+                target_kind = spn_target_kind(swtor_filepath)
+                if target_kind == SPN_TARGET_MAG and swtor_filepath not in self._mag_meshes:
+                    mag_filepaths.append(swtor_filepath)
+                elif target_kind == SPN_TARGET_DYN and self.dyn_templates is not None:
+                    dyn_filepaths.append(swtor_filepath)
+
+            if mag_filepaths:
+                self._mag_meshes.update(read_concurrently(self._read_mag, mag_filepaths, max_workers))
+
+            if dyn_filepaths:
+                self.dyn_templates.prefetch(dyn_filepaths, max_workers)
+                for dyn_filepath in dyn_filepaths:
+                    dyn_template = self.dyn_templates.get(dyn_filepath)
+                    if dyn_template is not None:
+                        next_pending.update(visual[1] for visual in dyn_template)
+
+            pending = next_pending
+
+    def resolve(self, swtor_filepath):
+        # Returns a (canonical) asset path's ResolvedAsset.
+        try:
+            return self._resolutions[swtor_filepath]
+        except KeyError:
+            pass
+
+        if swtor_filepath in self._resolving:
+            return ResolvedAsset(swtor_filepath, None, False)
+
+        self._resolving.add(swtor_filepath)
+        try:
+            resolution = self._resolve(swtor_filepath)
+        finally:
+            self._resolving.discard(swtor_filepath)
+
+        self._resolutions[swtor_filepath] = resolution
+        self._mag_dependencies[swtor_filepath] = self._find_mag_dependencies(swtor_filepath)
+        return resolution
+
+    def mag_dependencies(self, swtor_filepath):
+        """
+        Returns the frozenset of .mag paths that an already resolved
+        path's resolution depends on (directly or through .spn_p and
+        .dyn references), whether they named a .gr2 or not: if any of
+        them changes, so may the resolution.
+        """
+        return self._mag_dependencies.get(swtor_filepath, frozenset())
+
+    def _find_mag_dependencies(self, swtor_filepath):
+        # The references a path resolves through are resolved (and
+        # so have their own dependencies) by the time it is.
+        if swtor_filepath.endswith(".spn_p"):
+            spn_entry = self.spn_index.lookup(swtor_filepath) if self.spn_index is not None else None
+            return self.mag_dependencies(spn_entry[1]) if spn_entry is not None else frozenset()
+
+        target_kind = spn_target_kind(swtor_filepath)
+
+        if target_kind == SPN_TARGET_MAG:
+            return frozenset((swtor_filepath,))
+
+        if target_kind == SPN_TARGET_DYN:
+            dyn_template = self.dyn_templates.get(swtor_filepath) if self.dyn_templates is not None else None
+            if dyn_template is None:
+                return frozenset()
+            return frozenset().union(*(self.mag_dependencies(visual[1]) for visual in dyn_template))
+
+        return frozenset()
+
+    def _resolve(self, swtor_filepath):
+        if swtor_filepath.endswith(".spn_p"):
+            spn_entry = self.spn_index.lookup(swtor_filepath) if self.spn_index is not None else None
+            if spn_entry is not None:
+                target = self.resolve(spn_entry[1])
+                if target.resolved:
+                    return target
+            return ResolvedAsset(swtor_filepath, None, False)
+
+        target_kind = spn_target_kind(swtor_filepath)
+
+        if target_kind == SPN_TARGET_GR2:
+            return ResolvedAsset(swtor_filepath, None, True)
+
+        if target_kind == SPN_TARGET_MAG:
+            try:
+                gr2_filepath = self._mag_meshes[swtor_filepath]
+            except KeyError:
+                gr2_filepath = self._mag_meshes[swtor_filepath] = self._read_mag(swtor_filepath)
+            if gr2_filepath is not None:
+                return ResolvedAsset(gr2_filepath, None, True)
+            return ResolvedAsset(swtor_filepath, None, False)
+
+        if target_kind == SPN_TARGET_DYN:
+            dyn_template = self.dyn_templates.get(swtor_filepath) if self.dyn_templates is not None else None
+            if dyn_template is None:
+                return ResolvedAsset(swtor_filepath, None, False)
+            children = tuple(
+                (idx, position, rotation, scale, self.resolve(dyn_asset_name))
+                for idx, dyn_asset_name, position, rotation, scale in dyn_template
+                )
+            return ResolvedAsset(swtor_filepath, children, True)
+
+        # Lights, terrains, dbos and anything else stay as they are.
+        return ResolvedAsset(swtor_filepath, None, False)
+
+    def mag_filepaths(self):
+        # The .mag files resolved so far that name a .gr2 object.
+        return [mag_filepath for mag_filepath, gr2_filepath in self._mag_meshes.items() if gr2_filepath is not None]
+
+    def _read_mag(self, mag_filepath):
+        if self.resources is None:
+            return None
+
+        signature = self.resources.signature(mag_filepath)
+        if self.mag_cache is not None:
+            gr2_filepath = self.mag_cache.get(mag_filepath, signature)
+            if gr2_filepath is not MAG_NOT_CACHED:
+                return gr2_filepath
+
+        gr2_filepath = None
+        if signature is not None:
+            mag_data = self.resources.read_bytes(mag_filepath)
+            if mag_data is not None:
+                gr2_filepath = parse_mag_mesh(mag_data)
+            if gr2_filepath is not None and spn_target_kind(gr2_filepath) != SPN_TARGET_GR2:
+                gr2_filepath = None
+
+        if self.mag_cache is not None:
+            self.mag_cache.put(mag_filepath, signature, gr2_filepath)
+        return gr2_filepath
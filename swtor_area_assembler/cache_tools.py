@@ -0,0 +1,82 @@
+import bpy
+
+from .addon_cache import get_cache_folderpath
+from .asset_failures import clear_asset_failure_caches
+from .asset_library import asset_library_size, prune_asset_libraries, clear_asset_libraries
+
+
+class SWTOR_OT_clear_asset_failures(bpy.types.Operator):
+    bl_idname = "swtor.clear_asset_failures"
+    bl_label = "Clear Failed Assets Cache"
+    bl_description = "Forgets the assets that were missing or that the .gr2 / .obj importers failed or crashed on\nin earlier imports, so that the next import tries them again.\n\n• Use it after installing a new version of the .gr2 Importer Add-on, for example"
+    bl_options = {'REGISTER'}
+
+    def execute(self, context):
+        swtor_cache_folderpath = context.preferences.addons[__package__].preferences.swtor_cache_folderpath
+        try:
+            index_cache_folderpath = get_cache_folderpath(swtor_cache_folderpath, "indexes")
+        except OSError:
+            self.report({"WARNING"}, "The cache folder couldn't be accessed.")
+            return {"CANCELLED"}
+
+        cleared = clear_asset_failure_caches(index_cache_folderpath)
+        self.report({"INFO"}, f"Failed assets cache cleared ({cleared} resources locations).")
+        return {"FINISHED"}
+
+
+class SWTOR_OT_prune_asset_library(bpy.types.Operator):
+    bl_idname = "swtor.prune_asset_library"
+    bl_label = "Report / Prune Asset Library"
+    bl_description = "Reports the size of the library of already imported assets, deleting\nthe least recently used ones if it exceeds the Asset Library Size setting"
+    bl_options = {'REGISTER'}
+
+    def execute(self, context):
+        preferences = context.preferences.addons[__package__].preferences
+        try:
+            asset_library_folderpath = get_cache_folderpath(preferences.swtor_cache_folderpath, "library")
+        except OSError:
+            self.report({"WARNING"}, "The cache folder couldn't be accessed.")
+            return {"CANCELLED"}
+
+        size_before, count_before = asset_library_size(asset_library_folderpath)
+        size, count = prune_asset_libraries(asset_library_folderpath, preferences.swtor_asset_library_size * 1024 ** 3)
+        report = f"Asset library: {count} assets, {size / 1024 ** 2:.1f} MB"
+        if count < count_before:
+            report += f" ({count_before - count} assets, {(size_before - size) / 1024 ** 2:.1f} MB pruned)"
+        self.report({"INFO"}, report + ".")
+        return {"FINISHED"}
+
+
+class SWTOR_OT_clear_asset_library(bpy.types.Operator):
+    bl_idname = "swtor.clear_asset_library"
+    bl_label = "Clear Asset Library"
+    bl_description = "Deletes the library of already imported assets, so that the next imports import them again.\n\n• Use it after installing a new version of the .gr2 Importer Add-on, for example"
+    bl_options = {'REGISTER'}
+
+    def execute(self, context):
+        swtor_cache_folderpath = context.preferences.addons[__package__].preferences.swtor_cache_folderpath
+        try:
+            asset_library_folderpath = get_cache_folderpath(swtor_cache_folderpath, "library")
+        except OSError:
+            self.report({"WARNING"}, "The cache folder couldn't be accessed.")
+            return {"CANCELLED"}
+
+        cleared = clear_asset_libraries(asset_library_folderpath)
+        self.report({"INFO"}, f"Asset library cleared ({cleared} assets).")
+        return {"FINISHED"}
+
+
+# Registrations
+
+def register():
+    bpy.utils.register_class(SWTOR_OT_clear_asset_failures)
+    bpy.utils.register_class(SWTOR_OT_prune_asset_library)
+    bpy.utils.register_class(SWTOR_OT_clear_asset_library)
+
+def unregister():
+    bpy.utils.unregister_class(SWTOR_OT_clear_asset_library)
+    bpy.utils.unregister_class(SWTOR_OT_prune_asset_library)
+    bpy.utils.unregister_class(SWTOR_OT_clear_asset_failures)
+
+if __name__ == "__main__":
+    register()
@@ -0,0 +1,91 @@
+# Reader of .dds textures' headers.
+#
+# Estimating how much memory an area's textures take only needs their
+# dimensions, mipmap count and pixel format, all of which are in the
+# first 148 bytes of a .dds file.
+#
+# Layout (little-endian): "DDS " magic, then a 124-byte DDS_HEADER
+# (uint32 size, flags, height, width, pitch, depth, mipmap count,
+# 11 reserved, then the DDS_PIXELFORMAT: uint32 size, flags, FourCC,
+# RGB bit count, 4 masks), optionally followed by a 20-byte DX10
+# header (uint32 DXGI format first) if the FourCC is "DX10".
+#
+# No bpy here.
+
+import struct
+from collections import namedtuple
+
+
+DDS_MAGIC = b"DDS "
+
+# Bytes needed to parse any header.
+DDS_HEADER_SIZE = 148
+
+_DDS_HEADER = struct.Struct("<4s7I44x2I4sI16x")
+_DX10_FORMAT = struct.Struct("<I")
+_DX10_HEADER_OFFSET = 128
+
+# Bytes per 4x4 block of the block-compressed formats.
+_FOURCC_BLOCK_SIZES = {
+    b"DXT1": 8, b"DXT2": 16, b"DXT3": 16, b"DXT4": 16, b"DXT5": 16,
+    b"ATI1": 8, b"BC4U": 8, b"BC4S": 8, b"ATI2": 16, b"BC5U": 16, b"BC5S": 16,
+}
+# DXGI formats' block sizes (BC1 to BC7, all variants).
+_DXGI_BLOCK_SIZES = {
+    **dict.fromkeys(range(70, 73), 8),    # BC1
+    **dict.fromkeys(range(73, 79), 16),   # BC2, BC3
+    **dict.fromkeys(range(79, 82), 8),    # BC4
+    **dict.fromkeys(range(82, 85), 16),   # BC5
+    **dict.fromkeys(range(94, 100), 16),  # BC6H, BC7
+}
+_DDPF_FOURCC = 0x4
+
+# A .dds texture's header:
+#   width, height, mipmap_count: as they say.
+#   block_size:     bytes per 4x4 block if block-compressed, else None.
+#   bits_per_pixel: bits per pixel if not block-compressed.
+DdsHeader = namedtuple("DdsHeader", ("width", "height", "mipmap_count", "block_size", "bits_per_pixel"))
+
+
+def parse_dds_header(data):
+    """
+    Returns the DdsHeader of a .dds file's first DDS_HEADER_SIZE bytes
+    (or more). Raises ValueError if they aren't a .dds file's.
+    """
+    try:
+        (magic, _, _, height, width, _, _, mipmap_count,
+         _, pixel_format_flags, fourcc, bit_count) = _DDS_HEADER.unpack_from(data)
+    except struct.error:
+        raise ValueError("Truncated .dds header")
+    if magic != DDS_MAGIC:
+        raise ValueError("Not a .dds file")
+
+    block_size = None
+    if pixel_format_flags & _DDPF_FOURCC:
+        if fourcc == b"DX10":
+            try:
+                dxgi_format, = _DX10_FORMAT.unpack_from(data, _DX10_HEADER_OFFSET)
+            except struct.error:
+                raise ValueError("Truncated .dds DX10 header")
+            block_size = _DXGI_BLOCK_SIZES.get(dxgi_format)
+            if block_size is None:
+                bit_count = 32
+        else:
+            block_size = _FOURCC_BLOCK_SIZES.get(fourcc)
+            if block_size is None:
+                # Float and other uncompressed FourCC formats: assume the widest common one.
+                bit_count = 64
+    return DdsHeader(width, height, max(mipmap_count, 1), block_size, bit_count)
+
+
+def dds_memory_size(header):
+    # Bytes the texture's pixel data take, mipmaps included.
+    size = 0
+    for level in range(header.mipmap_count):
+        width = max(header.width >> level, 1)
+        height = max(header.height >> level, 1)
+        if header.block_size is not None:
+            size += ((width + 3) // 4) * ((height + 3) // 4) * header.block_size
+        else:
+            size += (width * height * header.bits_per_pixel + 7) // 8
+    return size
@@ -0,0 +1,186 @@
+# Indexed database of .dyn placeables' visuals.
+#
+# dyn.zip holds the full .json exports of thousands of .dyn files, but
+# the Area Assembler only needs their visuals' asset paths and local
+# transforms. Those are distilled, on first use (or whenever dyn.zip
+# changes), into a small SQLite database in the cache folder, indexed
+# by canonical .dyn path, so that getting a .dyn's visuals is a single
+# indexed query instead of decompressing and parsing a zip member.
+#
+# The database can also be built beforehand from the command line:
+#   python -m swtor_area_assembler.dyn_database <dyn.zip> <database file>
+#
+# No bpy here.
+
+import json
+import os
+import sqlite3
+import sys
+from zipfile import ZipFile, BadZipFile
+
+from .addon_cache import file_signature
+from .asset_paths import canonical_asset_path
+from .dyn_templates import iter_dyn_visuals
+
+
+DYN_DATABASE_FILENAME = "dyn_visuals.sqlite"
+
+# Stored as the database's user_version. Bump when the schema
+# or the way visuals are distilled change.
+DYN_DATABASE_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE source (size INTEGER NOT NULL, mtime INTEGER NOT NULL);
+CREATE TABLE dyns (dyn_id INTEGER PRIMARY KEY, path TEXT NOT NULL UNIQUE);
+CREATE TABLE visuals (
+    dyn_id INTEGER NOT NULL,
+    idx INTEGER NOT NULL,
+    path TEXT NOT NULL,
+    px REAL, py REAL, pz REAL,
+    rx REAL, ry REAL, rz REAL,
+    sx REAL, sy REAL, sz REAL,
+    PRIMARY KEY (dyn_id, idx)
+    ) WITHOUT ROWID;
+"""
+
+
+def dyn_filepath_of_member(zipped_filepath):
+    # Canonical .dyn path of a dyn.zip member's name
+    # (the reverse of ZippedDynSource's mapping).
+    dyn_filepath = canonical_asset_path(zipped_filepath)
+    if dyn_filepath.endswith(".json"):
+        dyn_filepath = dyn_filepath[:-len(".json")] + ".dyn"
+    return dyn_filepath
+
+
+def build_dyn_database(dyn_zip_filepath, database_filepath):
+    """
+    Distills dyn.zip into a database file, replacing any older one.
+    Members that can't be parsed are left out (as if they didn't exist).
+    Raises OSError if either file can't be read or written and
+    BadZipFile if dyn.zip isn't a valid archive.
+    """
+    signature = file_signature(dyn_zip_filepath)
+    if signature is None:
+        raise FileNotFoundError(dyn_zip_filepath)
+
+    temp_filepath = database_filepath + ".%d.tmp" % os.getpid()
+    if os.path.exists(temp_filepath):
+        os.remove(temp_filepath)
+
+    connection = sqlite3.connect(temp_filepath)
+    try:
+        connection.executescript(_SCHEMA)
+        connection.execute("INSERT INTO source VALUES (?, ?)", signature)
+
+        with ZipFile(dyn_zip_filepath, "r") as dyn_zip:
+            for dyn_id, zipped_filepath in enumerate(dyn_zip.namelist()):
+                if not zipped_filepath.lower().endswith(".json"):
+                    continue
+                try:
+                    with dyn_zip.open(zipped_filepath, "r") as read_dyn_file:
+                        visuals = list(iter_dyn_visuals(json.load(read_dyn_file)))
+                except (KeyError, TypeError, ValueError):
+                    continue
+
+                connection.execute("INSERT OR IGNORE INTO dyns VALUES (?, ?)",
+                                   (dyn_id, dyn_filepath_of_member(zipped_filepath)))
+                connection.executemany(
+                    "INSERT OR IGNORE INTO visuals VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    ((dyn_id, idx, path) + tuple(position) + tuple(rotation) + tuple(scale)
+                     for idx, path, position, rotation, scale in visuals),
+                    )
+
+        connection.execute("PRAGMA user_version = %d" % DYN_DATABASE_VERSION)
+        connection.commit()
+    except BaseException:
+        connection.close()
+        os.remove(temp_filepath)
+        raise
+    connection.close()
+
+    os.replace(temp_filepath, database_filepath)
+
+
+class DynDatabase:
+    """
+    Read-only access to a dyn visuals database, usable as
+    a DynTemplateCache's source (see dyn_templates.py).
+    Lookups are indexed queries: there's no point in running
+    them from several threads (nor can a connection be shared).
+    """
+
+    thread_safe = False
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.signature = connection.execute("SELECT size, mtime FROM source").fetchone()
+
+    def visuals(self, dyn_filepath):
+        # Returns a .dyn's visuals (see dyn_templates.iter_dyn_visuals()),
+        # or None if it isn't in the database.
+        row = self.connection.execute("SELECT dyn_id FROM dyns WHERE path = ?", (dyn_filepath,)).fetchone()
+        if row is None:
+            return None
+        return [
+            (idx, sys.intern(path), (px, py, pz), (rx, ry, rz), (sx, sy, sz))
+            for idx, path, px, py, pz, rx, ry, rz, sx, sy, sz in self.connection.execute(
+                "SELECT idx, path, px, py, pz, rx, ry, rz, sx, sy, sz FROM visuals WHERE dyn_id = ? ORDER BY idx",
+                (row[0],),
+                )
+            ]
+
+    def close(self):
+        self.connection.close()
+
+
+def open_dyn_database(database_filepath):
+    # Opens a database file read-only. Returns None if it's unusable.
+    if not os.path.isfile(database_filepath):
+        return None
+    try:
+        connection = sqlite3.connect("file:" + database_filepath.replace("\\", "/") + "?mode=ro", uri=True)
+    except sqlite3.Error:
+        return None
+    try:
+        if connection.execute("PRAGMA user_version").fetchone()[0] != DYN_DATABASE_VERSION:
+            raise sqlite3.DatabaseError("Old dyn visuals database")
+        return DynDatabase(connection)
+    except (sqlite3.Error, TypeError):
+        connection.close()
+        return None
+
+
+def get_dyn_database_filepath(dyn_zip_filepath, cache_folderpath):
+    """
+    Returns the path to an up to date dyn visuals database for
+    dyn_zip_filepath in cache_folderpath, building it if needed, or
+    None if there's no dyn.zip or the database couldn't be built.
+    """
+    signature = file_signature(dyn_zip_filepath)
+    if signature is None or not cache_folderpath:
+        return None
+
+    database_filepath = os.path.join(cache_folderpath, DYN_DATABASE_FILENAME)
+    dyn_database = open_dyn_database(database_filepath)
+    if dyn_database is not None:
+        up_to_date = dyn_database.signature == signature
+        dyn_database.close()
+        if up_to_date:
+            return database_filepath
+
+    try:
+        build_dyn_database(dyn_zip_filepath, database_filepath)
+    except (OSError, BadZipFile, sqlite3.Error) as error:
+        print(" -- The dyn visuals database couldn't be built:", error)  # Console.
+        return None
+    return database_filepath
+
+
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python -m swtor_area_assembler.dyn_database <dyn.zip> <database file>")
+        sys.exit(2)
+    build_dyn_database(sys.argv[1], sys.argv[2])
@@ -0,0 +1,126 @@
+# Cache of parsed .dyn placeables.
+#
+# A .dyn placeable can be placed hundreds of times in a single area
+# (fleets, strongholds…). Each distinct .dyn is read and parsed only
+# once into an immutable template (its visuals' asset paths and local
+# transforms), and every placement is expanded from that template by
+# reference.
+#
+# The visuals are read from the dyn visuals database when there is one
+# (see dyn_database.py), or else straight out of the add-on's dyn.zip.
+#
+# No bpy here.
+
+import json
+
+from .asset_paths import canonical_asset_path
+from .prefetch import read_concurrently, PREFETCH_MAX_WORKERS
+from .spn_lookup import spn_target_kind, SPN_TARGET_OTHER
+
+
+class DynTemplateCache:
+    """
+    Parsed .dyn templates, read from a source of .dyn visuals
+    (a ZippedDynSource or a DynDatabase, or None if there's none).
+
+    A template is a tuple of (visual index, asset path, position,
+    rotation, scale) tuples, holding only the .gr2 and .mag visuals
+    and the .spn_p and .dyn references (see asset_resolver.py).
+    """
+
+    def __init__(self, dyn_source):
+        self.dyn_source = dyn_source
+        self._templates = {}
+
+    def get(self, dyn_filepath):
+        # Returns a .dyn's template, or None if it isn't available.
+        try:
+            return self._templates[dyn_filepath]
+        except KeyError:
+            template = self._templates[dyn_filepath] = self._read(dyn_filepath)
+            return template
+
+    def prefetch(self, dyn_filepaths, max_workers=PREFETCH_MAX_WORKERS):
+        # Reads the templates of several .dyn files at once, concurrently
+        # if the source allows it (see prefetch.py).
+        dyn_filepaths = [dyn_filepath for dyn_filepath in dyn_filepaths if dyn_filepath not in self._templates]
+        if self.dyn_source is None or not dyn_filepaths:
+            return
+        if not self.dyn_source.thread_safe:
+            max_workers = 1
+        self._templates.update(read_concurrently(self._read, dyn_filepaths, max_workers))
+
+    def _read(self, dyn_filepath):
+        if self.dyn_source is None:
+            return None
+
+        visuals = self.dyn_source.visuals(dyn_filepath)
+        if visuals is None:
+            return None
+        return tuple(visual for visual in visuals if is_template_visual(visual[1]))
+
+    def close(self):
+        if self.dyn_source is not None:
+            self.dyn_source.close()
+            self.dyn_source = None
+
+
+class ZippedDynSource:
+    """
+    .dyn visuals read out of the add-on's zipped dyn nodes (the .dyn
+    files' full exports as .json files), decompressing and parsing
+    a whole member per .dyn. Members can be read from several threads.
+    """
+
+    thread_safe = True
+
+    def __init__(self, dyn_zip):
+        self.dyn_zip = dyn_zip
+        # WARNING: ZIP files internally use forward slashes as separators.
+        # Canonical paths use them too, but the members' letter case
+        # might not match, hence this lookup table of members' names
+        # by their canonical form.
+        self._zipped_filepaths = {canonical_asset_path(name): name for name in dyn_zip.namelist()}
+
+    def visuals(self, dyn_filepath):
+        # Returns a .dyn's visuals (see iter_dyn_visuals()), or None.
+        zipped_filepath = self._zipped_filepaths.get(canonical_asset_path(dyn_filepath).replace(".dyn", ".json"))
+        if zipped_filepath is None:
+            return None
+        try:
+            with self.dyn_zip.open(zipped_filepath, "r") as read_dyn_file:
+                return list(iter_dyn_visuals(json.load(read_dyn_file)))
+        except (FileNotFoundError, KeyError, TypeError, ValueError):
+            return None
+
+    def close(self):
+        self.dyn_zip.close()
+
+
+def is_template_visual(dyn_asset_name):
+    # Whether a visual is something that can be resolved into objects.
+    return spn_target_kind(dyn_asset_name) != SPN_TARGET_OTHER or dyn_asset_name.endswith(".spn_p")
+
+
+def _vector(dyn_obj, key, default):
+    if key in dyn_obj:
+        value = dyn_obj[key]["value"]
+        return (value["x"], value["y"], value["z"])
+    return default
+
+
+def iter_dyn_visuals(dyn_file_data):
+    """
+    Yields a .dyn's exported data's visuals, whatever their type, as
+    (visual index, canonical asset path, position, rotation, scale)
+    tuples.
+    """
+    for idx, dyn_obj in enumerate(dyn_file_data["dynPlaceable"]["dynVisualList"]["value"]["list"]):
+        if "dynVisualFqn" in dyn_obj:
+            yield (
+                idx,
+                canonical_asset_path(dyn_obj["dynVisualFqn"]["value"]),
+                _vector(dyn_obj, "dynPosition", (0, 0, 0)),
+                _vector(dyn_obj, "dynRotation", (0, 0, 0)),
+                _vector(dyn_obj, "dynScale", (1, 1, 1)),
+                )
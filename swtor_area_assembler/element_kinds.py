@@ -0,0 +1,83 @@
+# Single-pass classification of area elements.
+#
+# Every element gets its kind exactly once, out of its asset path's
+# extension (worked out once per distinct asset path, not per element)
+# and its element type, and elements are bucketed by kind so that the
+# later stages don't repeat the string checks on every element.
+#
+# No bpy here.
+
+from array import array
+
+from .element_store import ELEMENT_DYN_PARENT
+
+
+# Element kinds
+KIND_SKIPPED = 0      # Nothing the Area Assembler makes objects out of.
+KIND_MESH = 1         # .gr2 object.
+KIND_MAG = 2          # .mag reference that couldn't be resolved.
+KIND_SPN = 3          # .spn_p reference that couldn't be resolved.
+KIND_DYN_PARENT = 4   # Empty parenting a .dyn placeable's visuals.
+KIND_TERRAIN = 5      # .hms heightmap terrain.
+KIND_LIGHT = 6        # .lit light.
+KIND_DBO = 7          # Design blockout object (only if not skipping them).
+
+# Kinds of elements that can become objects.
+OBJECT_KINDS = (KIND_MESH, KIND_MAG, KIND_SPN, KIND_DYN_PARENT, KIND_TERRAIN, KIND_LIGHT, KIND_DBO)
+
+KIND_NAMES = {
+    KIND_SKIPPED: "skipped",
+    KIND_MESH: "mesh",
+    KIND_MAG: "mag",
+    KIND_SPN: "spn",
+    KIND_DYN_PARENT: "dyn parent",
+    KIND_TERRAIN: "terrain",
+    KIND_LIGHT: "light",
+    KIND_DBO: "dbo",
+}
+
+
+def classify_asset_path(swtor_filepath, skip_dbo_objects=True):
+    # Kind of an asset path on its own (that is, regardless of element type).
+    if swtor_filepath.endswith(".gr2"):
+        return KIND_MESH
+    if swtor_filepath.endswith(".lit"):
+        return KIND_LIGHT
+    if swtor_filepath.endswith(".hms"):
+        return KIND_TERRAIN
+    if swtor_filepath.endswith(".mag"):
+        return KIND_MAG
+    if swtor_filepath.endswith(".spn_p"):
+        return KIND_SPN
+    if "dbo" in swtor_filepath and skip_dbo_objects == False:
+        return KIND_DBO
+    return KIND_SKIPPED
+
+
+def classify_elements(store, skip_dbo_objects=True):
+    """
+    Fills an AreaElementStore's kinds column and returns a dict of
+    kind: array of element indices (in element order) for every kind.
+    """
+    asset_kinds = [classify_asset_path(swtor_filepath, skip_dbo_objects) for swtor_filepath in store.asset_paths]
+
+    kinds = bytearray(len(store))
+    elements_by_kind = {kind: array("i") for kind in KIND_NAMES}
+
+    asset_index = store.asset_index
+    element_types = store.element_types
+    for element in range(len(store)):
+        if element_types[element] == ELEMENT_DYN_PARENT:
+            kind = KIND_DYN_PARENT
+        else:
+            kind = asset_kinds[asset_index[element]]
+        kinds[element] = kind
+        elements_by_kind[kind].append(element)
+
+    store.kinds = kinds
+    return elements_by_kind
+
+
+def elements_of_kinds(elements_by_kind, kinds):
+    # Indices of the elements of any of the given kinds, in element order.
+    return sorted(element for kind in kinds for element in elements_by_kind[kind])
@@ -0,0 +1,174 @@
+# Compact, array-backed store of area elements.
+#
+# Instead of a list of per-element dicts (with extra keys added along
+# the way, deep copies for .dyn children and Path(...).stem recomputed
+# pass after pass), elements are kept column-wise:
+#   • ids and parent ids as lists of strings,
+#   • asset paths interned in a table (plus their names, computed once)
+#     and referenced by index,
+#   • positions, rotations and scales in float32 arrays, 3 floats each,
+#   • element type codes in a bytearray,
+#   • parents as element indices once link_parents() has been called,
+#   • element kinds once classified (see element_kinds.py).
+#
+# The stores are picklable, which is how preprocessed areas travel
+# back from worker processes.
+#
+# No bpy here.
+
+import sys
+from array import array
+from pathlib import Path
+
+
+# Element type codes.
+ELEMENT_ASSET = 0       # Object made out of the asset (or its resolution).
+ELEMENT_DYN_PARENT = 1  # Empty parenting a .dyn placeable's visuals.
+
+# Special parent indices.
+PARENT_ROOT = -1        # Parent id "0": no parent.
+PARENT_MISSING = -2     # Parent id not present in the store.
+
+
+class AreaElementStore:
+
+    def __init__(self):
+        # Per-.json file data
+        self.json_names = []
+
+        # Asset paths table
+        self.asset_paths = []
+        self.asset_names = []
+        self._asset_lookup = {}
+
+        # Per-element columns
+        self.ids = []
+        self.parent_ids = []
+        self.json_index = array("i")
+        self.asset_index = array("i")
+        self.element_types = bytearray()
+        self.positions = array("f")
+        self.rotations = array("f")
+        self.scales = array("f")
+
+        # Filled by link_parents()
+        self.parent_index = array("i")
+
+        # Filled by element_kinds.classify_elements()
+        self.kinds = bytearray()
+
+
+    def __len__(self):
+        return len(self.ids)
+
+
+    # Asset paths ------------------------------------------------------
+
+    def intern_asset(self, swtor_filepath):
+        """
+        Returns the index of an asset path in the store's table,
+        adding it (and its name) if it isn't there yet.
+        """
+        index = self._asset_lookup.get(swtor_filepath)
+        if index is None:
+            swtor_filepath = sys.intern(swtor_filepath)
+            index = len(self.asset_paths)
+            self._asset_lookup[swtor_filepath] = index
+            self.asset_paths.append(swtor_filepath)
+            self.asset_names.append(Path(swtor_filepath).stem)
+        return index
+
+    def asset_path(self, i):
+        return self.asset_paths[self.asset_index[i]]
+
+    def asset_name(self, i):
+        return self.asset_names[self.asset_index[i]]
+
+    def set_asset(self, i, swtor_filepath):
+        # Replaces an element's asset (say, by what a .mag resolves to).
+        self.asset_index[i] = self.intern_asset(swtor_filepath)
+
+
+    # Elements ---------------------------------------------------------
+
+    def add_json(self, json_name):
+        # Registers an area .json file and returns its index.
+        self.json_names.append(json_name)
+        return len(self.json_names) - 1
+
+    def append(self, swtor_id, swtor_parent_id, swtor_filepath,
+               position, rotation, scale, element_type=ELEMENT_ASSET, json_index=0):
+        self.ids.append(swtor_id)
+        self.parent_ids.append(swtor_parent_id)
+        self.json_index.append(json_index)
+        self.asset_index.append(self.intern_asset(swtor_filepath))
+        self.element_types.append(element_type)
+        self.positions.extend(position)
+        self.rotations.extend(rotation)
+        self.scales.extend(scale)
+
+    def extend(self, other, json_name=None):
+        """
+        Appends all of another store's elements. If json_name is given,
+        they are assigned to that (new) area instead of keeping their own.
+        """
+        if json_name is not None:
+            new_json_index = self.add_json(json_name)
+            json_indices = array("i", [new_json_index]) * len(other)
+        else:
+            json_offset = len(self.json_names)
+            self.json_names.extend(other.json_names)
+            json_indices = array("i", (index + json_offset for index in other.json_index))
+
+        asset_remap = [self.intern_asset(swtor_filepath) for swtor_filepath in other.asset_paths]
+
+        self.ids.extend(other.ids)
+        self.parent_ids.extend(other.parent_ids)
+        self.json_index.extend(json_indices)
+        self.asset_index.extend(array("i", (asset_remap[index] for index in other.asset_index)))
+        self.element_types.extend(other.element_types)
+        self.positions.extend(other.positions)
+        self.rotations.extend(other.rotations)
+        self.scales.extend(other.scales)
+
+    def json_name(self, i):
+        return self.json_names[self.json_index[i]]
+
+    def position(self, i):
+        return tuple(self.positions[3 * i:3 * i + 3])
+
+    def rotation(self, i):
+        return tuple(self.rotations[3 * i:3 * i + 3])
+
+    def scale(self, i):
+        return tuple(self.scales[3 * i:3 * i + 3])
+
+
+    # Hierarchy --------------------------------------------------------
+
+    def link_parents(self):
+        """
+        Fills parent_index with each element's parent element index,
+        or PARENT_ROOT / PARENT_MISSING. If an id is repeated,
+        the first element having it wins.
+        """
+        index_by_id = {}
+        for i, swtor_id in enumerate(self.ids):
+            index_by_id.setdefault(swtor_id, i)
+
+        self.parent_index = array("i", (
+            PARENT_ROOT if swtor_parent_id == "0" else index_by_id.get(swtor_parent_id, PARENT_MISSING)
+            for swtor_parent_id in self.parent_ids
+            ))
+
+
+    # Pickling (the lookup dict is rebuilt rather than sent) ------------
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_asset_lookup"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._asset_lookup = {swtor_filepath: index for index, swtor_filepath in enumerate(self.asset_paths)}
@@ -0,0 +1,163 @@
+# Reader of SWTOR .gr2 files' headers.
+#
+# SWTOR's .gr2 objects aren't Granny files proper but a simpler format
+# of its own ("GAWB"), whose header and mesh headers tell, without
+# decoding any geometry, which materials an object uses and how big
+# its meshes are. That's what the working set extraction (finding the
+# .mat files an area needs) and the offline analyzer (estimating
+# vertex memory) need to know.
+#
+# Layout (little-endian, offsets from the start of the file):
+#   0x00  "GAWB" magic, uint32 major and minor versions
+#   0x14  uint32 type (0 = static mesh, 1 = skinned mesh, 2 = skeleton)
+#   0x18  uint16 mesh count, material count, bone count, attachment count
+#   0x30  8 floats: bounding box (min xyz w, max xyz w)
+#   0x50  uint32 offsets of the cached offsets, the mesh headers,
+#         the material name offsets, the bones and the attachments
+# Mesh header (0x28 bytes each):
+#   uint32 name offset, float, uint16 piece count, uint16 used bones
+#   count, uint16 vertex flags, uint16 vertex size, uint32 vertex count,
+#   uint32 index count, uint32 offsets of the vertices, the pieces,
+#   the (uint16) indices and the used bones.
+# Names are zero-terminated strings.
+#
+# Reading headers only takes the start of each file: a first chunk
+# usually holds all of it, and if the offsets point further, a longer
+# start is read (rather than the whole file, vertices and all).
+#
+# No bpy here.
+
+import struct
+from collections import namedtuple
+
+from .prefetch import read_concurrently, PREFETCH_MAX_WORKERS
+
+
+GR2_MAGIC = b"GAWB"
+
+GR2_TYPE_STATIC = 0
+GR2_TYPE_SKINNED = 1
+GR2_TYPE_SKELETON = 2
+
+_GR2_HEADER = struct.Struct("<4sII8xIHHHH16x8f5I")
+_GR2_MESH_HEADER = struct.Struct("<IfHHHHIIIIII")
+
+# Size of the first chunk of a .gr2 file read for its header.
+GR2_HEADER_READ_SIZE = 16 * 1024
+
+# Room left for the last name when working out how much to read.
+_GR2_NAME_READ_SIZE = 256
+
+
+# A .gr2 file's header:
+#   gr2_type:     one of the GR2_TYPE_* values.
+#   meshes:       tuple of Gr2MeshHeader.
+#   materials:    tuple of material names.
+#   bounding_box: (min x, min y, min z, max x, max y, max z).
+Gr2Header = namedtuple("Gr2Header", ("gr2_type", "meshes", "materials", "bounding_box"))
+
+Gr2MeshHeader = namedtuple("Gr2MeshHeader", (
+    "name", "piece_count", "vertex_flags", "vertex_size", "vertex_count", "index_count",
+    "vertices_offset", "pieces_offset", "indices_offset",
+    ))
+
+
+class Gr2HeaderTruncated(ValueError):
+    """
+    Raised by parse_gr2_header() when given the start of a file
+    that doesn't hold its whole header: needed_size is how much
+    of it is needed, as far as can be told.
+    """
+
+    def __init__(self, needed_size):
+        super().__init__("Truncated .gr2 header data")
+        self.needed_size = needed_size
+
+
+def read_c_string(data, offset, partial=False):
+    # Zero-terminated string at offset. If data is the start of a file
+    # (partial), one running past its end raises Gr2HeaderTruncated.
+    if partial and (offset >= len(data) or data.find(b"\x00", offset) < 0):
+        raise Gr2HeaderTruncated(max(offset + _GR2_NAME_READ_SIZE, 2 * len(data)))
+    if not 0 <= offset < len(data):
+        raise ValueError("String offset out of bounds")
+    end = data.find(b"\x00", offset)
+    if end < 0:
+        end = len(data)
+    return data[offset:end].decode("utf-8", errors="replace")
+
+
+def parse_gr2_header(data, partial=False):
+    """
+    Returns the Gr2Header of a .gr2 file's contents (bytes, of which
+    the header, mesh headers and names must be present).
+    Raises ValueError if they aren't a SWTOR .gr2 file's. If data
+    is just the start of the file (partial) and that isn't enough,
+    raises Gr2HeaderTruncated (a ValueError) instead.
+    """
+    try:
+        (magic, _, _, gr2_type, mesh_count, material_count, _, _,
+         min_x, min_y, min_z, _, max_x, max_y, max_z, _,
+         _, meshes_offset, material_names_offset, _, _) = _GR2_HEADER.unpack_from(data)
+    except struct.error:
+        if partial:
+            raise Gr2HeaderTruncated(_GR2_HEADER.size)
+        raise ValueError("Truncated .gr2 header")
+    if magic != GR2_MAGIC:
+        raise ValueError("Not a SWTOR .gr2 file")
+
+    if partial:
+        needed_size = max(meshes_offset + mesh_count * _GR2_MESH_HEADER.size,
+                          material_names_offset + material_count * 4)
+        if needed_size > len(data):
+            raise Gr2HeaderTruncated(needed_size)
+
+    try:
+        mesh_headers = [
+            _GR2_MESH_HEADER.unpack_from(data, meshes_offset + i * _GR2_MESH_HEADER.size)
+            for i in range(mesh_count)
+            ]
+        material_name_offsets = struct.unpack_from("<%dI" % material_count, data, material_names_offset)
+    except struct.error:
+        raise ValueError("Truncated .gr2 mesh headers or material names")
+
+    if partial:
+        # Ask for all the names at once rather than one at a time.
+        name_offsets = [mesh_header[0] for mesh_header in mesh_headers] + list(material_name_offsets)
+        if name_offsets and max(name_offsets) >= len(data):
+            raise Gr2HeaderTruncated(max(name_offsets) + _GR2_NAME_READ_SIZE)
+
+    meshes = []
+    for (name_offset, _, piece_count, _, vertex_flags, vertex_size, vertex_count, index_count,
+         vertices_offset, pieces_offset, indices_offset, _) in mesh_headers:
+        meshes.append(Gr2MeshHeader(
+            read_c_string(data, name_offset, partial), piece_count, vertex_flags, vertex_size,
+            vertex_count, index_count, vertices_offset, pieces_offset, indices_offset,
+            ))
+    materials = tuple(read_c_string(data, name_offset, partial) for name_offset in material_name_offsets)
+
+    return Gr2Header(gr2_type, tuple(meshes), materials, (min_x, min_y, min_z, max_x, max_y, max_z))
+
+
+def read_gr2_headers(resources, gr2_filepaths, max_workers=PREFETCH_MAX_WORKERS):
+    """
+    Reads the headers of the given .gr2 assets from resources (a
+    ResourcesVFS) concurrently, reading just as much of each file as
+    they take. Returns a dict of asset path: Gr2Header (or None if
+    there's no such file or it isn't a SWTOR .gr2 file).
+    """
+    def read_gr2_header(gr2_filepath):
+        read_size = GR2_HEADER_READ_SIZE
+        while True:
+            gr2_data = resources.read_bytes(gr2_filepath, read_size)
+            if gr2_data is None:
+                return None
+            try:
+                # Getting less than asked for means it's the whole file.
+                return parse_gr2_header(gr2_data, partial=len(gr2_data) == read_size)
+            except Gr2HeaderTruncated as truncated:
+                read_size = max(truncated.needed_size, 2 * read_size)
+            except ValueError:
+                return None
+
+    return read_concurrently(read_gr2_header, gr2_filepaths, max_workers)
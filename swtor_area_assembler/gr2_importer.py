@@ -0,0 +1,178 @@
+# Access to the .gr2 importer addon (io_scene_gr2) without its operator.
+#
+# Every bpy.ops.import_mesh.gr2 call carries operator dispatch, context
+# checks, an undo push and a view layer update, thousands of times per
+# area. Like most Blender importers, the addon's operator just hands its
+# file over to a module-level loader function, load(operator, context,
+# filepath), so, when that function is found, it is called directly,
+# with a stand-in for the operator that holds its properties' defaults.
+# If it isn't found or its signature doesn't fit (say, another version
+# of the addon), or if it turns out to need something of the operator's
+# that the stand-in lacks, the operator is called as usual, and the
+# console tells why. Only a loader that is an attribute of the operator
+# class' own module is found: one imported inside the operator's
+# execute() or living in a submodule isn't, and means using the operator.
+#
+# Either way, importing functions take a file path and return the
+# operator-style result set ({'FINISHED'}, {'CANCELLED'}).
+#
+# Static meshes decoded by the built-in reader (see gr2_mesh.py) are
+# turned into objects here, too, without the addon.
+
+import inspect
+import sys
+
+import bpy
+import numpy
+
+
+GR2_IMPORTER_IDNAME = "import_mesh.gr2"
+
+# Names the loader function might go by in the operator's module.
+GR2_LOADER_NAMES = ("load", "load_gr2")
+
+# Values of properties declared without a default.
+_PROPERTY_DEFAULTS = {
+    "BoolProperty": False,
+    "IntProperty": 0,
+    "FloatProperty": 0.0,
+    "StringProperty": "",
+}
+
+
+class OperatorStandIn:
+    """
+    Stands in for an operator when calling its loader function: it has
+    the operator's properties at their defaults and prints reports.
+    """
+
+    def __init__(self, operator_class):
+        for cls in reversed(operator_class.__mro__):
+            for name, annotation in getattr(cls, "__annotations__", {}).items():
+                keywords = getattr(annotation, "keywords", None)
+                function = getattr(annotation, "function", None)
+                if keywords is None or function is None:
+                    continue
+                setattr(self, name, keywords.get("default", _PROPERTY_DEFAULTS.get(function.__name__)))
+        self.bl_idname = GR2_IMPORTER_IDNAME
+
+    def report(self, type, message):
+        print(f"{', '.join(sorted(type))}: {message}")  # Console.
+
+
+def import_gr2_through_operator(filepath):
+    # Imports a .gr2 file through Darth Atroxa's .gr2 importer addon's operator.
+    return bpy.ops.import_mesh.gr2(filepath=filepath)
+
+
+def find_gr2_operator_class():
+    # The .gr2 importer addon's registered operator class, or None.
+    for operator_class in bpy.types.Operator.__subclasses__():
+        if getattr(operator_class, "bl_idname", None) == GR2_IMPORTER_IDNAME:
+            return operator_class
+    return None
+
+
+def get_gr2_importer():
+    """
+    Returns (function importing a .gr2 file, True if it calls the
+    addon's loader directly or False if it goes through its operator).
+    """
+    operator_class = find_gr2_operator_class()
+    if operator_class is None:
+        return import_gr2_through_operator, False
+
+    module = sys.modules.get(operator_class.__module__)
+    loader = None
+    for loader_name in GR2_LOADER_NAMES:
+        loader = getattr(module, loader_name, None)
+        if callable(loader):
+            break
+    if not callable(loader):
+        print(f"No .gr2 loader function found in {operator_class.__module__}. Using the .gr2 importer's operator")  # Console.
+        return import_gr2_through_operator, False
+
+    operator_stand_in = OperatorStandIn(operator_class)
+    try:
+        inspect.signature(loader).bind(operator_stand_in, bpy.context, filepath="")
+    except (TypeError, ValueError):
+        print(f"The .gr2 loader function in {operator_class.__module__} doesn't take an operator, a context and a filepath. Using the .gr2 importer's operator")  # Console.
+        return import_gr2_through_operator, False
+
+    use_loader = True
+
+    def import_gr2_directly(filepath):
+        # Imports a .gr2 file through the addon's loader function. If it
+        # misses something of the operator's that the stand-in lacks, it
+        # gives up on the loader for good, deletes the objects it had
+        # added to the active Collection before failing (and only those)
+        # and uses the operator instead.
+        nonlocal use_loader
+        if use_loader:
+            operator_stand_in.filepath = filepath
+            objects_before = set(bpy.context.collection.objects)
+            try:
+                result = loader(operator_stand_in, bpy.context, filepath=filepath)
+                return result if result is not None else {'FINISHED'}
+            except AttributeError as error:
+                print(f"The .gr2 importer addon's loader can't be called directly ({error}). Using its operator")  # Console.
+                use_loader = False
+                for leftover_object in set(bpy.context.collection.objects) - objects_before:
+                    bpy.data.objects.remove(leftover_object, do_unlink=True)
+        return import_gr2_through_operator(filepath)
+
+    return import_gr2_directly, True
+
+
+def build_gr2_objects(model):
+    """
+    Returns objects (linked to no Collection) made out of the meshes of
+    a Gr2StaticModel (see gr2_mesh.py), named after them. Their material
+    slots hold materials named like the .gr2 file's, reused if they
+    exist already, as the addon does, so that materials processing
+    works the same on them.
+    """
+    blender_objects = []
+    for gr2_mesh in model.meshes:
+        vertex_count = len(gr2_mesh.positions)
+        face_count = len(gr2_mesh.faces)
+        loop_vertices = gr2_mesh.faces.ravel()
+
+        mesh = bpy.data.meshes.new(gr2_mesh.name)
+        mesh.vertices.add(vertex_count)
+        mesh.vertices.foreach_set("co", gr2_mesh.positions.ravel())
+        mesh.loops.add(face_count * 3)
+        mesh.loops.foreach_set("vertex_index", loop_vertices)
+        mesh.polygons.add(face_count)
+        mesh.polygons.foreach_set("loop_start", numpy.arange(0, face_count * 3, 3, dtype=numpy.int32))
+        if bpy.app.version < (4, 0, 0):
+            # Read-only (and worked out from loop_start) since Blender 4.0.
+            mesh.polygons.foreach_set("loop_total", numpy.full(face_count, 3, dtype=numpy.int32))
+        mesh.polygons.foreach_set("use_smooth", numpy.ones(face_count, dtype=bool))
+
+        # Only the materials that the mesh's faces use, in order of use.
+        used_materials, slot_indices = numpy.unique(gr2_mesh.face_materials, return_inverse=True)
+        for material_index in used_materials:
+            if material_index < 0:
+                mesh.materials.append(None)
+                continue
+            material_name = model.materials[material_index]
+            mesh.materials.append(bpy.data.materials.get(material_name) or bpy.data.materials.new(material_name))
+        mesh.polygons.foreach_set("material_index", slot_indices.astype(numpy.int32))
+
+        if gr2_mesh.uvs is not None:
+            uv_layer = mesh.uv_layers.new(name="UVMap")
+            uv_layer.data.foreach_set("uv", gr2_mesh.uvs[loop_vertices].ravel())
+
+        mesh.validate(clean_customdata=False)
+        mesh.update()
+
+        if gr2_mesh.normals is not None:
+            if hasattr(mesh, "use_auto_smooth"):
+                # Custom normals need it before Blender 4.1.
+                mesh.use_auto_smooth = True
+            mesh.normals_split_custom_set_from_vertices(gr2_mesh.normals)
+
+        blender_objects.append(bpy.data.objects.new(gr2_mesh.name, mesh))
+
+    return blender_objects
@@ -0,0 +1,236 @@
+# Built-in reader of SWTOR .gr2 static meshes.
+#
+# Areas are mostly made of static (non-skinned) objects, whose meshes
+# are simple enough to be decoded straight into NumPy arrays here, in
+# worker processes if there are many, for gr2_importer.py to build
+# Blender meshes out of them with foreach_set(). That's much faster than
+# the .gr2 importer addon, which is pure, single-threaded Python and
+# remains the fallback for whatever isn't supported here (skinned
+# meshes, skeletons, unknown vertex formats): those raise ValueError.
+#
+# Layout (see gr2_header.py for the file and mesh headers):
+# Piece (0x30 bytes each, a run of a mesh's faces with one material):
+#   uint32 first face, uint32 face count, uint32 material index
+#   (0xFFFFFFFF if none), uint32 piece index, 8 floats bounding box.
+# Static vertices, by vertex size:
+#   12 bytes: float32 x3 position (collision and other helper meshes).
+#   24 bytes: float32 x3 position, uint8 x4 normal, uint8 x4 tangent,
+#             float16 x2 UV.
+# Indices are uint16, three per (triangular) face.
+#
+# No bpy here.
+
+import multiprocessing
+import os
+import struct
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy
+
+from .gr2_header import GR2_TYPE_STATIC, parse_gr2_header
+
+
+_GR2_PIECE = struct.Struct("<4I32x")
+
+_NO_MATERIAL = 0xFFFFFFFF
+
+_VERTEX_DTYPES = {
+    12: numpy.dtype([("position", "<f4", 3)]),
+    24: numpy.dtype([("position", "<f4", 3), ("normal", "u1", 4), ("tangent", "u1", 4), ("uv", "<f2", 2)]),
+}
+
+# Fewer files than this are decoded in this process, as starting
+# worker processes would take longer than decoding them.
+GR2_DECODING_POOL_MIN_FILES = 32
+
+# Files being (or done being) decoded ahead of their use, per worker:
+# enough to keep the workers busy, few enough that the decoded meshes
+# waiting to be used don't pile up in memory.
+GR2_DECODING_WINDOW_PER_WORKER = 4
+
+
+# A .gr2 file's static meshes:
+#   materials: tuple of material names.
+#   meshes:    tuple of Gr2MeshData.
+Gr2StaticModel = namedtuple("Gr2StaticModel", ("materials", "meshes"))
+
+# A static mesh's data:
+#   name:           mesh name.
+#   positions:      float32 array (vertex count, 3).
+#   normals:        float32 array (vertex count, 3), or None.
+#   uvs:            float32 array (vertex count, 2), or None.
+#   faces:          int32 array (face count, 3) of vertex indices.
+#   face_materials: int32 array (face count) of indices into the
+#                   model's materials (-1 if none).
+Gr2MeshData = namedtuple("Gr2MeshData", ("name", "positions", "normals", "uvs", "faces", "face_materials"))
+
+
+def _read_face_materials(data, mesh, face_count):
+    # Per-face material indices, out of the mesh's pieces.
+    face_materials = numpy.full(face_count, -1, dtype=numpy.int32)
+    first_face = 0
+    for i in range(mesh.piece_count):
+        piece_first, piece_face_count, material_index, _ = _GR2_PIECE.unpack_from(
+            data, mesh.pieces_offset + i * _GR2_PIECE.size)
+        # Pieces run through the faces in order.
+        if piece_first not in (first_face, first_face * 3) or first_face + piece_face_count > face_count:
+            raise ValueError("Unexpected .gr2 mesh pieces")
+        if material_index != _NO_MATERIAL:
+            face_materials[first_face:first_face + piece_face_count] = material_index
+        first_face += piece_face_count
+    return face_materials, first_face
+
+
+def decode_gr2_static_meshes(data):
+    """
+    Returns the Gr2StaticModel of a .gr2 file's contents (bytes).
+    Raises ValueError if they aren't a static SWTOR .gr2 file's
+    or use anything not supported here.
+    """
+    header = parse_gr2_header(data)
+    if header.gr2_type != GR2_TYPE_STATIC:
+        raise ValueError("Not a static .gr2 object")
+
+    meshes = []
+    try:
+        for mesh in header.meshes:
+            vertex_dtype = _VERTEX_DTYPES.get(mesh.vertex_size)
+            if vertex_dtype is None:
+                raise ValueError(f"Unsupported .gr2 vertex size {mesh.vertex_size}")
+            vertices = numpy.frombuffer(data, dtype=vertex_dtype, count=mesh.vertex_count, offset=mesh.vertices_offset)
+
+            # The header's count is of indices, or of faces in some
+            # files: the pieces' face counts tell which.
+            face_materials, piece_face_count = _read_face_materials(data, mesh, mesh.index_count)
+            if piece_face_count * 3 == mesh.index_count:
+                face_materials = face_materials[:piece_face_count]
+            elif piece_face_count != mesh.index_count:
+                raise ValueError("Inconsistent .gr2 face counts")
+            face_count = len(face_materials)
+
+            faces = numpy.frombuffer(data, dtype="<u2", count=face_count * 3, offset=mesh.indices_offset)
+            faces = faces.astype(numpy.int32).reshape(face_count, 3)
+            if face_count and faces.max() >= mesh.vertex_count:
+                raise ValueError("Out of range .gr2 vertex indices")
+
+            positions = vertices["position"].astype(numpy.float32)
+            if "normal" in vertex_dtype.names:
+                normals = vertices["normal"][:, :3].astype(numpy.float32) / 127.5 - 1.0
+                lengths = numpy.linalg.norm(normals, axis=1, keepdims=True)
+                normals /= numpy.where(lengths > 0, lengths, 1)
+                uvs = vertices["uv"].astype(numpy.float32)
+                uvs[:, 1] = 1.0 - uvs[:, 1]
+            else:
+                normals = None
+                uvs = None
+
+            meshes.append(Gr2MeshData(mesh.name, positions, normals, uvs, faces, face_materials))
+    except struct.error:
+        raise ValueError("Truncated .gr2 mesh data")
+
+    if any(len(mesh.face_materials) and mesh.face_materials.max() >= len(header.materials) for mesh in meshes):
+        raise ValueError("Out of range .gr2 material indices")
+
+    return Gr2StaticModel(header.materials, tuple(meshes))
+
+
+def read_gr2_static_model(filepath):
+    # decode_gr2_static_meshes() of a file. Raises OSError or ValueError.
+    with open(filepath, "rb") as gr2_file:
+        return decode_gr2_static_meshes(gr2_file.read())
+
+
+def _decode_in_worker(filepath):
+    # Exceptions are returned rather than raised (see area_preprocess.py).
+    try:
+        return read_gr2_static_model(filepath)
+    except (OSError, ValueError) as error:
+        return error
+
+
+class Gr2Decoder:
+    """
+    Decodes .gr2 files ahead of their use, in parallel worker processes
+    if there are enough of them (see GR2_DECODING_POOL_MIN_FILES).
+    filepaths is a dict of key (say, asset path): file path, in the
+    order they are going to be used in. Only a window of them is
+    decoded ahead at a time (see GR2_DECODING_WINDOW_PER_WORKER),
+    moving along as they're used. Use as a context manager, getting
+    each file's Gr2StaticModel with model().
+    """
+
+    def __init__(self, filepaths, use_process_pool=True, max_workers=None):
+        self.filepaths = dict(filepaths)
+        self._executor = None
+        self._futures = {}
+        # Keys not submitted yet, in order, and those used already.
+        self._unsubmitted_keys = deque()
+        self._used_keys = set()
+        self._window = 0
+        if use_process_pool and len(self.filepaths) >= GR2_DECODING_POOL_MIN_FILES:
+            if max_workers is None:
+                max_workers = os.cpu_count() or 1
+            # "spawn" is the only start method that works everywhere
+            # (and the only safe one when forking Blender itself).
+            self._executor = ProcessPoolExecutor(max_workers=max_workers,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+            self._unsubmitted_keys.extend(self.filepaths)
+            self._window = max_workers * GR2_DECODING_WINDOW_PER_WORKER
+            self._submit_ahead()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        # Pending files are cancelled by hand: shutdown()'s
+        # cancel_futures needs Python 3.9.
+        if self._executor is not None:
+            for future in self._futures.values():
+                future.cancel()
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self._futures = {}
+        self._unsubmitted_keys.clear()
+
+    def _submit_ahead(self):
+        # Tops the files being decoded up to the window's size.
+        while self._executor is not None and len(self._futures) < self._window and self._unsubmitted_keys:
+            key = self._unsubmitted_keys.popleft()
+            if key not in self._used_keys:
+                try:
+                    self._futures[key] = self._executor.submit(_decode_in_worker, self.filepaths[key])
+                except BrokenProcessPool:
+                    # Using the futures submitted already will tell.
+                    return
+
+    def model(self, key, filepath=None):
+        """
+        Returns the Gr2StaticModel of the file of key (decoded here and
+        now if it wasn't being decoded ahead, from filepath if it wasn't
+        given at all). Raises KeyError if it wasn't given and there's no
+        filepath, OSError or ValueError if it couldn't be read or
+        decoded, and BrokenProcessPool if a worker process died (after
+        which the decoder is closed).
+        """
+        future = self._futures.pop(key, None)
+        if future is None:
+            if key in self.filepaths or filepath is None:
+                filepath = self.filepaths[key]
+            if self._executor is not None:
+                self._used_keys.add(key)
+            result = _decode_in_worker(filepath)
+        else:
+            try:
+                result = future.result()
+            except BrokenProcessPool:
+                self.close()
+                raise
+        self._submit_ahead()
+        if isinstance(result, Exception):
+            raise result
+        return result
@@ -0,0 +1,191 @@
+# Planning of an area import.
+#
+# Everything about importing some areas that doesn't need Blender is
+# worked out here, out of their preprocessed data (see
+# area_preprocess.py): which Collections to create, which objects to
+# make out of which elements, in which Collection each goes, which
+# file each is imported from, which unique assets are instanced how
+# many times, how they are parented and how they are transformed and
+# named. The importer operator just carries the plan out with bpy,
+# and the plan can be built (and benchmarked, or tested) anywhere.
+#
+# No bpy here.
+
+from collections import namedtuple
+from math import radians
+
+from .element_kinds import (classify_elements, elements_of_kinds, OBJECT_KINDS,
+                            KIND_MESH, KIND_DBO, KIND_TERRAIN, KIND_LIGHT)
+from .element_store import AreaElementStore
+
+
+TERRAIN_FOLDERPATH = "world/heightmaps"
+
+# Many Hero Engine utility object types can't be determined by
+# their names, but oftentimes their materials'names are a good
+# criteria (these are all the invisible-type ones in .mat files).
+EXCLUDED_OBJECT_MATERIALS = frozenset((
+    "collision",
+    "dbo_universal_superexclusion_test",
+    "mote_mote_a01_v01",
+    "occluder",
+    "occluder_terrain",
+    "occluder_wall",
+    "portal",
+    "util_blue_hidden",
+    "util_collision_hidden",
+    "util_collision_none",
+    "util_green_hidden",
+    "util_red_hidden",
+    "util_white_hidden",
+    "util_yellow_hidden",
+    "white_utility_hidden",
+))
+
+
+# An area's Collections to create, in order, as (name, parent name)
+# pairs, the parent being None for the area's main Collection
+# (which goes in the scene's active one).
+PlannedArea = namedtuple("PlannedArea", ("json_name", "has_terrain", "collections"))
+
+# An object to make out of an element:
+#   element:         the element's index in the plan's store.
+#   kind:            the element's kind (see element_kinds.py).
+#   swtor_id, parent_id, json_name: as in the area's data.
+#   parent:          the parent element's index, or PARENT_ROOT / PARENT_MISSING.
+#   asset_path:      the element's (resolved) asset path.
+#   asset_name:      its file name without extension.
+#   import_path:     asset path of the file to import (.gr2 objects,
+#                    terrains' .obj), or None.
+#   collection_name: Collection the object goes in.
+#   location, rotation (radians, ZXY order), scale: its transforms.
+#   final_name:      the object's name after the renaming pass, or None
+#                    to keep its id as its name.
+PlannedObject = namedtuple("PlannedObject", (
+    "element", "kind", "swtor_id", "parent_id", "json_name", "parent",
+    "asset_path", "asset_name", "import_path", "collection_name",
+    "location", "rotation", "scale", "final_name",
+    ))
+
+
+class ImportPlan:
+    """
+    The plan of an import (see this module's header):
+      store:   AreaElementStore with all the areas' elements.
+      areas:   list of PlannedArea.
+      objects: list of PlannedObject, in element order.
+      assets:  dict of unique asset path to import (.gr2 objects,
+               terrains' .obj): list of the indices in objects of its
+               instances, in order.
+    """
+
+    def __init__(self, store, areas, objects, max_json_name_length=0, max_swtor_name_length=0):
+        self.store = store
+        self.areas = areas
+        self.objects = objects
+        # For console output formatting.
+        self.max_json_name_length = max_json_name_length
+        self.max_swtor_name_length = max_swtor_name_length
+
+        self.assets = {}
+        for i, planned_object in enumerate(objects):
+            if planned_object.import_path is not None:
+                self.assets.setdefault(planned_object.import_path, []).append(i)
+
+    def __len__(self):
+        return len(self.objects)
+
+    @property
+    def json_names(self):
+        return [area.json_name for area in self.areas]
+
+    def objects_of_kind(self, kind):
+        return [planned_object for planned_object in self.objects if planned_object.kind == kind]
+
+
+def terrain_asset_path(swtor_id):
+    # Terrains' .obj files are named after their elements' ids.
+    return TERRAIN_FOLDERPATH + "/" + swtor_id + ".obj"
+
+
+def area_collections(json_name, has_terrain, create_lights=False, collection_objects=False):
+    # An area's Collections, as (name, parent name) pairs.
+    collections = [(json_name, None)]
+    if collection_objects:
+        if create_lights:
+            collections.append((json_name + " - Lights", json_name))
+        if has_terrain:
+            collections.append((json_name + " - Terrain", json_name))
+        collections.append((json_name + " - Objects", json_name))
+    return tuple(collections)
+
+
+def object_collection_name(json_name, kind, collection_objects=False):
+    # Name of the Collection an object of some kind goes in.
+    if not collection_objects:
+        return json_name
+    if kind == KIND_LIGHT:
+        return json_name + " - Lights"
+    if kind == KIND_TERRAIN:
+        return json_name + " - Terrain"
+    return json_name + " - Objects"
+
+
+def plan_import(preprocessed_areas, skip_dbo_objects=True, create_lights=False, collection_objects=False):
+    """
+    Returns the ImportPlan of some areas, given as (json_name,
+    preprocess_area_file() result) pairs, for the importer's options.
+    """
+    store = AreaElementStore()
+    areas = []
+    max_json_name_length = 0
+    max_swtor_name_length = 0
+
+    for json_name, (area_store, has_terrain, swtor_name_length) in preprocessed_areas:
+        store.extend(area_store, json_name)
+        areas.append(PlannedArea(json_name, has_terrain,
+                                 area_collections(json_name, has_terrain, create_lights, collection_objects)))
+        max_json_name_length = max(max_json_name_length, len(json_name))
+        max_swtor_name_length = max(max_swtor_name_length, swtor_name_length)
+
+    # Give every element its kind (mesh, mag, light, etc.) once,
+    # and keep only the elements that can become objects.
+    elements_by_kind = classify_elements(store, skip_dbo_objects)
+    elements_to_process = elements_of_kinds(elements_by_kind, OBJECT_KINDS)
+
+    # Resolve parent ids into element indices once.
+    store.link_parents()
+
+    objects = []
+    for element in elements_to_process:
+        kind = store.kinds[element]
+        swtor_id = store.ids[element]
+        json_name = store.json_name(element)
+        asset_path = store.asset_path(element)
+        asset_name = store.asset_name(element)
+
+        if kind == KIND_TERRAIN:
+            import_path = terrain_asset_path(swtor_id)
+        elif kind in (KIND_MESH, KIND_DBO):
+            import_path = asset_path
+        else:
+            import_path = None
+
+        objects.append(PlannedObject(
+            element,
+            kind,
+            swtor_id,
+            store.parent_ids[element],
+            json_name,
+            store.parent_index[element],
+            asset_path,
+            asset_name,
+            import_path,
+            object_collection_name(json_name, kind, collection_objects),
+            store.position(element),
+            tuple(radians(angle) for angle in store.rotation(element)),
+            store.scale(element),
+            asset_name if asset_name != "heightmap" else None,
+            ))
+
+    return ImportPlan(store, areas, objects, max_json_name_length, max_swtor_name_length)
@@ -0,0 +1,203 @@
+# Local read-through cache of resources files.
+#
+# The resources folder often lives on network storage (a NAS), and every
+# import reads the same .gr2 objects, .obj terrains and .dds textures
+# over the network again. If a local cache folder is set in the add-on's
+# preferences, the files that Blender's importers and images.load() are
+# handed are copies in it instead, made the first time they're needed
+# and refreshed whenever the originals change (their size or
+# modification time, which the copies keep, differ).
+#
+# The cache is capped in size and evicts its least recently used files
+# first. Use is recorded in each copy's access time, set explicitly
+# (filesystems are often mounted without atime updates).
+#
+# Files extracted from archives (see resources_vfs.py) are kept in
+# a LocalFileCache of their own, too, so that they are capped alike.
+#
+# No bpy here.
+
+import os
+import shutil
+import threading
+import time
+
+from .asset_paths import canonical_asset_path
+
+
+class LocalFileCache:
+    """
+    Read-through cache of files in folderpath, holding at most
+    max_size bytes (see this module's header).
+    """
+
+    def __init__(self, folderpath, max_size):
+        self.folderpath = folderpath
+        self.max_size = max_size
+        # Total size of the cached files, measured on first use.
+        self._size = None
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        return {"folderpath": self.folderpath, "max_size": self.max_size}
+
+    def __setstate__(self, state):
+        self.__init__(state["folderpath"], state["max_size"])
+
+    def filepath(self, swtor_filepath, source_filepath):
+        """
+        Returns the path to a local copy of source_filepath (the file
+        of the asset swtor_filepath), copying it if needed. Returns
+        source_filepath itself if it can't be cached.
+        """
+        try:
+            source_stat = os.stat(source_filepath)
+        except OSError:
+            return source_filepath
+        if source_stat.st_size > self.max_size:
+            return source_filepath
+
+        local_filepath = self.local_filepath(swtor_filepath)
+        now = time.time_ns()
+        try:
+            local_stat = os.stat(local_filepath)
+        except OSError:
+            local_stat = None
+
+        if local_stat is not None and local_stat.st_size == source_stat.st_size \
+                and local_stat.st_mtime_ns == source_stat.st_mtime_ns:
+            try:
+                os.utime(local_filepath, ns=(now, local_stat.st_mtime_ns))
+            except OSError:
+                pass
+            return local_filepath
+
+        temp_filepath = local_filepath + ".%d.tmp" % os.getpid()
+        try:
+            os.makedirs(os.path.dirname(local_filepath), exist_ok=True)
+            shutil.copyfile(source_filepath, temp_filepath)
+            os.utime(temp_filepath, ns=(now, source_stat.st_mtime_ns))
+            os.replace(temp_filepath, local_filepath)
+        except OSError:
+            try:
+                os.remove(temp_filepath)
+            except OSError:
+                pass
+            return source_filepath
+
+        self._added(source_stat.st_size - (local_stat.st_size if local_stat is not None else 0))
+        return local_filepath
+
+    def local_filepath(self, swtor_filepath):
+        # Path of an asset's file in the cache (which might not exist).
+        return os.path.join(self.folderpath, *canonical_asset_path(swtor_filepath).split("/"))
+
+    def touch(self, local_filepath):
+        # Records the use of a cached file, keeping its modification time.
+        try:
+            os.utime(local_filepath, ns=(time.time_ns(), os.stat(local_filepath).st_mtime_ns))
+        except OSError:
+            pass
+
+    def store(self, swtor_filepath, data):
+        """
+        Writes data (bytes, say, extracted from an archive) as an asset's
+        file in the cache, evicting older files if needed. Returns its
+        path, or None if it couldn't be written.
+        """
+        local_filepath = self.local_filepath(swtor_filepath)
+        try:
+            old_size = os.stat(local_filepath).st_size
+        except OSError:
+            old_size = 0
+
+        temp_filepath = local_filepath + ".%d.tmp" % os.getpid()
+        try:
+            os.makedirs(os.path.dirname(local_filepath), exist_ok=True)
+            with open(temp_filepath, "wb") as local_file:
+                local_file.write(data)
+            os.replace(temp_filepath, local_filepath)
+        except OSError:
+            try:
+                os.remove(temp_filepath)
+            except OSError:
+                pass
+            return None
+
+        self._added(len(data) - old_size)
+        return local_filepath
+
+    def _added(self, size_delta):
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._list_files())
+            else:
+                self._size += size_delta
+            if self._size > self.max_size:
+                self._evict()
+
+    def _list_files(self):
+        # (access time, size, path) of every cached file.
+        files = []
+        for folderpath, _, filenames in os.walk(self.folderpath):
+            for filename in filenames:
+                filepath = os.path.join(folderpath, filename)
+                try:
+                    stat = os.stat(filepath)
+                except OSError:
+                    continue
+                files.append((stat.st_atime_ns, stat.st_size, filepath))
+        return files
+
+    def _evict(self):
+        # Deletes the least recently used files until the cache
+        # is back to 90% of its cap, so as not to evict on every copy.
+        files = sorted(self._list_files())
+        size = sum(size for _, size, _ in files)
+        target_size = self.max_size * 9 // 10
+        for _, file_size, filepath in files:
+            if size <= target_size:
+                break
+            try:
+                os.remove(filepath)
+                size -= file_size
+            except OSError:
+                pass
+        self._size = size
+
+    def prune(self):
+        # Evicts files if the cache holds more than its cap (say,
+        # after lowering it). Returns the cache's size.
+        with self._lock:
+            self._size = sum(size for _, size, _ in self._list_files())
+            if self._size > self.max_size:
+                self._evict()
+            return self._size
+
+
+# Local caches in use. Key: cache folder's path. Value: LocalFileCache.
+_local_caches = {}
+
+
+def get_local_file_cache(folderpath, max_size):
+    """
+    Returns the LocalFileCache in folderpath, sized max_size bytes
+    (reusing the one of earlier calls in the session), or None if
+    folderpath isn't set or can't be created.
+    """
+    if not folderpath:
+        return None
+    folderpath = os.path.abspath(folderpath)
+    try:
+        os.makedirs(folderpath, exist_ok=True)
+    except OSError:
+        print(" -- The local resources cache folder couldn't be created. Files will be read in place")  # Console.
+        return None
+
+    local_cache = _local_caches.get(folderpath)
+    if local_cache is None:
+        local_cache = _local_caches[folderpath] = LocalFileCache(folderpath, max_size)
+    elif local_cache.max_size != max_size:
+        local_cache.max_size = max_size
+        local_cache.prune()
+    return local_cache
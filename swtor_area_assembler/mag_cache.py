@@ -0,0 +1,42 @@
+# Persistent cache of .mag files' resolutions.
+#
+# A .mag file just names the .gr2 object it shows, but finding out
+# which means opening and scanning it. The results are kept across
+# Blender sessions in a small .json file per resources location (in the
+# cache folder, see signed_cache.py), keyed by each .mag's path, size
+# and modification time, and including negative results (missing .mag
+# files or ones with no .gr2 in them), so that areas full of .mag
+# references resolve without reading them again.
+#
+# No bpy here.
+
+import os
+
+from .addon_cache import cache_key
+from .signed_cache import SignedCache, NOT_CACHED
+
+
+MAG_CACHE_VERSION = 1
+
+# Returned by MagMeshCache.get() for .mag files it knows nothing about
+# (None being a valid, negative, result).
+MAG_NOT_CACHED = NOT_CACHED
+
+
+class MagMeshCache(SignedCache):
+    """
+    .mag path: (signature, .gr2 path or None) mapping, signature
+    being addon_cache.file_signature()'s value (None for missing
+    files). Loaded from and saved to cache_filepath, if set.
+    """
+
+    version = MAG_CACHE_VERSION
+
+
+def open_mag_mesh_cache(cache_folderpath, resources_key):
+    # Returns the MagMeshCache of a resources location (see
+    # ResourcesVFS.resources_key), persisted in cache_folderpath
+    # if set (in memory only if not).
+    if not cache_folderpath or not resources_key:
+        return MagMeshCache()
+    return MagMeshCache(os.path.join(cache_folderpath, "mag_meshes_" + cache_key(resources_key) + ".json"))
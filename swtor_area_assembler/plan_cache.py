@@ -0,0 +1,217 @@
+# Persistent binary cache of preprocessed areas.
+#
+# Preprocessing an area .json file (reading it, filtering its elements,
+# expanding .spn_p and .dyn references) gives the same result every time
+# as long as neither the file nor the things it depends on change. So,
+# the results are stored in a compact binary file per area, keyed by the
+# .json file's path, size and mtime, the add-on's version and the options
+# that affect preprocessing.
+#
+# Plans also depend on the .mag files they resolved (see asset_resolver.py),
+# which can't be known before preprocessing the area: their paths are
+# stored in the plan with a digest of their signatures at the time,
+# and a plan is discarded on loading if the digest no longer matches.
+#
+# Keys start with a part identifying the area and the options alone, so
+# that saving a new plan for them (say, once the .json file or the add-on
+# changed) deletes the one it supersedes, rather than leaving old plans
+# to pile up.
+#
+# Plan file layout (little-endian), mirroring AreaElementStore's columns:
+#   header:      magic, element count, string count, asset count, flags,
+#                max name length, .mag count, .mag signatures digest
+#   transforms:  float32 x 3 per element, for positions, then rotations,
+#                then scales
+#   assets:      int32 per element (index into the asset paths)
+#   types:       uint8 per element (element type code)
+#   strings:     uint32 offsets (string count + 1), then the utf-8 blob.
+#                The strings are the elements' ids, then their parent ids,
+#                then the asset paths, then the .mag paths.
+#
+# The arrays are copied straight out of a memory map of the file.
+#
+# No bpy here.
+
+import hashlib
+import mmap
+import os
+import struct
+from array import array
+
+from .addon_cache import cache_key, file_signature
+from .element_store import AreaElementStore
+
+
+PLAN_MAGIC = b"SAAPLAN3"
+PLAN_FILE_EXTENSION = ".plan"
+
+# Bump whenever preprocessing changes in ways that make old plans wrong.
+PLAN_FORMAT_VERSION = 7
+
+_HEADER = struct.Struct("<8sIIIIII20s")
+_FLAG_HAS_TERRAIN = 1
+
+_AREA_KEY_SEPARATOR = "_"
+
+
+def plan_cache_key(json_filepath, addon_version, options, dependency_filepaths=()):
+    """
+    Returns the cache key of an area .json file's preprocessed plan, or None
+    if the file doesn't exist. options is a dict of the settings that affect
+    preprocessing (such as SkipDBOObjects), and dependency_filepaths the
+    auxiliary files it reads (spn table, dyn.zip...).
+    """
+    json_signature = file_signature(json_filepath)
+    if json_signature is None:
+        return None
+
+    key_parts = [
+        str(PLAN_FORMAT_VERSION),
+        os.path.abspath(json_filepath),
+        repr(json_signature),
+        repr(tuple(addon_version)),
+        repr(sorted(options.items())),
+        ]
+    for dependency_filepath in dependency_filepaths:
+        key_parts.append(repr(file_signature(dependency_filepath)))
+
+    area_key = cache_key(os.path.abspath(json_filepath) + "\n" + repr(sorted(options.items())))
+    return area_key + _AREA_KEY_SEPARATOR + hashlib.sha1("\n".join(key_parts).encode("utf-8")).hexdigest()
+
+
+def _plan_filepath(cache_folderpath, key):
+    return os.path.join(cache_folderpath, key + PLAN_FILE_EXTENSION)
+
+
+def _delete_superseded_plans(cache_folderpath, key):
+    # Deletes the area's (and options') other plans.
+    area_prefix = key.split(_AREA_KEY_SEPARATOR, 1)[0] + _AREA_KEY_SEPARATOR
+    plan_filename = key + PLAN_FILE_EXTENSION
+    try:
+        filenames = os.listdir(cache_folderpath)
+    except OSError:
+        return
+    for filename in filenames:
+        if filename.startswith(area_prefix) and filename.endswith(PLAN_FILE_EXTENSION) and filename != plan_filename:
+            try:
+                os.remove(os.path.join(cache_folderpath, filename))
+            except OSError:
+                pass
+
+
+def _mag_signatures_digest(mag_signatures):
+    # Digest of (.mag path, signature) pairs, in the paths' order.
+    return hashlib.sha1(repr(mag_signatures).encode("utf-8")).digest()
+
+
+def save_area_plan(cache_folderpath, key, preprocessed_area, mag_signatures=None):
+    """
+    Stores a preprocess_area_file() result in the cache, replacing the
+    area's earlier plan, if any. mag_signatures is a dict of the .mag
+    files it depends on and their signatures. Failing to write it isn't
+    an error: the cache is just a shortcut.
+    """
+    store, has_terrain, max_swtor_name_length = preprocessed_area
+
+    mag_filepaths = sorted(mag_signatures) if mag_signatures else []
+    mag_digest = _mag_signatures_digest([(mag_filepath, mag_signatures[mag_filepath])
+                                         for mag_filepath in mag_filepaths])
+
+    strings = store.ids + store.parent_ids + store.asset_paths + mag_filepaths
+    encoded_strings = [string.encode("utf-8") for string in strings]
+    string_offsets = array("I", [0])
+    for encoded_string in encoded_strings:
+        string_offsets.append(string_offsets[-1] + len(encoded_string))
+
+    flags = _FLAG_HAS_TERRAIN if has_terrain else 0
+
+    plan_filepath = _plan_filepath(cache_folderpath, key)
+    temp_filepath = plan_filepath + ".%d.tmp" % os.getpid()
+    try:
+        with open(temp_filepath, "wb") as plan_file:
+            plan_file.write(_HEADER.pack(PLAN_MAGIC, len(store), len(strings), len(store.asset_paths),
+                                         flags, max_swtor_name_length, len(mag_filepaths), mag_digest))
+            plan_file.write(store.positions.tobytes())
+            plan_file.write(store.rotations.tobytes())
+            plan_file.write(store.scales.tobytes())
+            plan_file.write(store.asset_index.tobytes())
+            plan_file.write(bytes(store.element_types))
+            plan_file.write(string_offsets.tobytes())
+            plan_file.write(b"".join(encoded_strings))
+        os.replace(temp_filepath, plan_filepath)
+    except OSError:
+        try:
+            os.remove(temp_filepath)
+        except OSError:
+            pass
+        return
+
+    _delete_superseded_plans(cache_folderpath, key)
+
+
+def load_area_plan(cache_folderpath, key, mag_signature=None):
+    """
+    Returns a cached preprocess_area_file() result, or None if there
+    isn't one (or it's unreadable, or any of the .mag files it depends
+    on changed). mag_signature is a function returning a .mag file's
+    current signature (such as ResourcesVFS.signature).
+    """
+    plan_filepath = _plan_filepath(cache_folderpath, key)
+    try:
+        with open(plan_filepath, "rb") as plan_file:
+            if os.fstat(plan_file.fileno()).st_size < _HEADER.size:
+                return None
+            with mmap.mmap(plan_file.fileno(), 0, access=mmap.ACCESS_READ) as plan_map:
+                plan = _read_plan(plan_map)
+    except (OSError, ValueError, IndexError, struct.error, UnicodeDecodeError):
+        return None
+    if plan is None:
+        return None
+
+    preprocessed_area, mag_filepaths, mag_digest = plan
+    mag_signatures = [(mag_filepath, mag_signature(mag_filepath) if mag_signature is not None else None)
+                      for mag_filepath in mag_filepaths]
+    if _mag_signatures_digest(mag_signatures) != mag_digest:
+        return None
+    return preprocessed_area
+
+
+def _read_plan(plan_map):
+    # Returns (preprocess_area_file() result, .mag paths, .mag
+    # signatures digest), or None.
+    (magic, element_count, string_count, asset_count, flags, max_swtor_name_length,
+     mag_count, mag_digest) = _HEADER.unpack_from(plan_map, 0)
+    if magic != PLAN_MAGIC or string_count != 2 * element_count + asset_count + mag_count:
+        return None
+
+    store = AreaElementStore()
+
+    # Little-endian arrays are read and written as native ones:
+    # that's what every platform Blender runs on uses.
+    offset = _HEADER.size
+    for column in (store.positions, store.rotations, store.scales):
+        column.frombytes(plan_map[offset:offset + element_count * 3 * 4])
+        offset += element_count * 3 * 4
+    store.asset_index.frombytes(plan_map[offset:offset + element_count * 4])
+    offset += element_count * 4
+    store.element_types.extend(plan_map[offset:offset + element_count])
+    offset += element_count
+    string_offsets = array("I")
+    string_offsets.frombytes(plan_map[offset:offset + (string_count + 1) * 4])
+    offset += (string_count + 1) * 4
+    blob = plan_map[offset:offset + string_offsets[-1]]
+
+    strings = [blob[string_offsets[i]:string_offsets[i + 1]].decode("utf-8") for i in range(string_count)]
+
+    store.ids = strings[:element_count]
+    store.parent_ids = strings[element_count:2 * element_count]
+    for swtor_filepath in strings[2 * element_count:2 * element_count + asset_count]:
+        store.intern_asset(swtor_filepath)
+    store.json_index = array("i", [0]) * element_count
+
+    if len(store.positions) != 3 * element_count or len(store.element_types) != element_count:
+        return None
+
+    mag_filepaths = strings[2 * element_count + asset_count:]
+
+    return (store, bool(flags & _FLAG_HAS_TERRAIN), max_swtor_name_length), mag_filepaths, mag_digest
@@ -16,6 +16,51 @@ class addonPreferences(bpy.types.AddonPreferences):
         maxlen = 1024
     )
 
+    # archives path
+    swtor_archives_path: bpy.props.StringProperty(
+        name = "SWTOR Archives",
+        description = "Optional .zip pack of a SWTOR assets extraction, .tor archive, or folder holding any number of them\n(such as the game's Assets folder), to read the assets missing from the 'resources' folder from",
+        subtype = "FILE_PATH",
+        default = "",
+        maxlen = 1024
+    )
+
+    # cache folderpath
+    swtor_cache_folderpath: bpy.props.StringProperty(
+        name = "Cache Folder",
+        description = "Folder where the Area Assembler keeps its caches (preprocessed areas, indexes, etc.).\nLeave it empty to use a subfolder of the Operating System's temporary files folder",
+        subtype = "DIR_PATH",
+        default = "",
+        maxlen = 1024
+    )
+
+    # local cache folderpath
+    swtor_local_cache_folderpath: bpy.props.StringProperty(
+        name = "Local Cache Folder",
+        description = "Optional folder on a fast local disk where the resources folder's files are copied to as they are used,\nso that working with the same areas again doesn't read them from slow or network storage.\nLeave it empty to read the files in place",
+        subtype = "DIR_PATH",
+        default = "",
+        maxlen = 1024
+    )
+
+    # local cache size cap
+    swtor_local_cache_size: bpy.props.IntProperty(
+        name = "Local Cache Size (GB)",
+        description = "Maximum size of the local cache folder's contents, and of the files extracted from archives into the cache folder.\nThe least recently used files are deleted first when exceeded",
+        default = 20,
+        min = 1,
+        soft_max = 500,
+    )
+
+    # asset library size cap
+    swtor_asset_library_size: bpy.props.IntProperty(
+        name = "Asset Library Size (GB)",
+        description = "Maximum size of the library of already imported assets kept in the cache folder,\nwhich later imports append them from instead of importing them again.\nThe least recently used assets are deleted first when exceeded.\n\nSet it to 0 to disable the asset library",
+        default = 10,
+        min = 0,
+        soft_max = 200,
+    )
+
     # UI ----------------------------------------
     
     def draw(self, context):
@@ -29,6 +74,36 @@ class addonPreferences(bpy.types.AddonPreferences):
         col.label(text="produced by the Slicers GUI app, EasyMYP, or any similar tool.")
         pref_box.prop(self, 'swtor_resources_folderpath', expand=True)
 
+        # archives path preferences UI
+        pref_box = layout.box()
+        col=pref_box.column()
+        col.scale_y = 0.7
+        col.label(text="Optional .zip pack, .tor archive or folder of them (such as SWTOR's")
+        col.label(text="Assets folder) to read assets from without extracting them first.")
+        pref_box.prop(self, 'swtor_archives_path', expand=True)
+
+        # cache folderpath preferences UI
+        pref_box = layout.box()
+        col=pref_box.column()
+        col.scale_y = 0.7
+        col.label(text="Path to a folder for the Area Assembler's caches.")
+        col.label(text="If empty, the Operating System's temporary files folder is used.")
+        pref_box.prop(self, 'swtor_cache_folderpath', expand=True)
+        pref_box.operator("swtor.clear_asset_failures")
+        pref_box.prop(self, 'swtor_asset_library_size')
+        row = pref_box.row()
+        row.operator("swtor.prune_asset_library")
+        row.operator("swtor.clear_asset_library")
+
+        # local cache preferences UI
+        pref_box = layout.box()
+        col=pref_box.column()
+        col.scale_y = 0.7
+        col.label(text="Optional local folder to cache the 'resources' folder's files in,")
+        col.label(text="for when it is on a network drive or a slow disk.")
+        pref_box.prop(self, 'swtor_local_cache_folderpath', expand=True)
+        pref_box.prop(self, 'swtor_local_cache_size')
+
 
 # Registrations
 
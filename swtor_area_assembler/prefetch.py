@@ -0,0 +1,69 @@
+# Concurrent prefetching of side files.
+#
+# Areas and the objects imported from them depend on lots of small side
+# files (.dyn visuals, .mag files, .mat files) that used to be read one
+# at a time as the loops reached them, each read stalling on disk or
+# zip latency. Instead, the files that are going to be needed are
+# gathered beforehand and read (and parsed) by a pool of threads, so
+# that those latencies overlap. File reading, decompression and XML
+# parsing release the GIL often enough for threads to pay off.
+#
+# No bpy here.
+
+import os
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+
+from .asset_paths import canonical_asset_path
+
+
+# Threads to read side files with. I/O bound, so more than CPU cores.
+PREFETCH_MAX_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+
+def read_concurrently(read_function, items, max_workers=PREFETCH_MAX_WORKERS):
+    """
+    Returns a dict of item: read_function(item) for every distinct
+    item, calling read_function from a pool of threads.
+    read_function must deal with its own errors.
+    """
+    items = list(dict.fromkeys(items))
+    if len(items) < 2 or max_workers < 2:
+        return {item: read_function(item) for item in items}
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        return dict(zip(items, executor.map(read_function, items)))
+
+
+def parse_mat_tree(mat_data):
+    # Parsed .mat file contents, or None if they can't be parsed.
+    try:
+        return ET.ElementTree(ET.fromstring(mat_data))
+    except ET.ParseError:
+        return None
+
+
+def mat_texture_filepaths(mat_tree):
+    # Canonical asset paths of the textures (.dds) a parsed .mat file names.
+    return [
+        canonical_asset_path(mat_input.findtext("value") + ".dds")
+        for mat_input in mat_tree.getroot().findall("input")
+        if mat_input.findtext("type") == "texture" and mat_input.findtext("value")
+        ]
+
+
+def prefetch_mat_trees(resources, mat_names, max_workers=PREFETCH_MAX_WORKERS):
+    """
+    Reads and parses the .mat files of the named materials in the
+    resources' art/shaders/materials folder (resources being a
+    ResourcesVFS) concurrently. Returns a dict of material name:
+    ElementTree (or None if there's no such .mat file or it can't
+    be parsed).
+    """
+    def read_mat_tree(mat_filepath):
+        mat_data = resources.read_bytes(mat_filepath)
+        return parse_mat_tree(mat_data) if mat_data is not None else None
+
+    mat_filepaths = {mat_name: "art/shaders/materials/" + mat_name + ".mat" for mat_name in mat_names}
+    mat_trees = read_concurrently(read_mat_tree, mat_filepaths.values(), max_workers)
+    return {mat_name: mat_trees[mat_filepath] for mat_name, mat_filepath in mat_filepaths.items()}
@@ -3,11 +3,13 @@
 # So, without further ado…
 
 import bpy
-import pathlib
-import xml.etree.ElementTree as ET
 import addon_utils
 
 
+from .addon_cache import get_cache_folderpath
+from .prefetch import prefetch_mat_trees
+from .resources_vfs import open_resources_vfs
+from .local_cache import get_local_file_cache
 from .shd_EmissiveOnly import create_EmissiveOnly_nodegroup
 
 from .shd_AnimatedUV import create_AnimatedUV_nodegroup
@@ -91,11 +93,30 @@ class SWTOR_OT_process_named_mats(bpy.types.Operator):
         # --------------------------------------------------------------
         # Get the extracted SWTOR assets' "resources" folder from the add-on's preferences. 
         swtor_resources_folderpath = bpy.context.preferences.addons[__package__].preferences.swtor_resources_folderpath
+        swtor_archives_path = bpy.context.preferences.addons[__package__].preferences.swtor_archives_path
         
-        swtor_shaders_path = swtor_resources_folderpath + "/art/shaders/materials"
+        # Look files up in the resources folder (listed once, or just
+        # refreshed from the listing persisted in the cache) and/or
+        # in archives (see resources_vfs.py), reading the resources
+        # folder's through the local cache, if set (see local_cache.py).
+        swtor_cache_folderpath = bpy.context.preferences.addons[__package__].preferences.swtor_cache_folderpath
+        try:
+            index_cache_folderpath = get_cache_folderpath(swtor_cache_folderpath, "indexes")
+            extract_folderpath = get_cache_folderpath(swtor_cache_folderpath, "extracted")
+        except OSError:
+            index_cache_folderpath = None
+            extract_folderpath = None
+        local_cache = get_local_file_cache(
+            bpy.context.preferences.addons[__package__].preferences.swtor_local_cache_folderpath,
+            bpy.context.preferences.addons[__package__].preferences.swtor_local_cache_size * 1024 ** 3,
+            )
+        resources = open_resources_vfs(swtor_resources_folderpath, swtor_archives_path,
+                                       index_cache_folderpath, extract_folderpath, local_cache,
+                                       bpy.context.preferences.addons[__package__].preferences.swtor_local_cache_size * 1024 ** 3)
 
         # Test the existence of the shaders subfolder to validate the SWTOR "resources" folder
-        if pathlib.Path(swtor_shaders_path).exists() == False:
+        # (.tor archives can't tell folders apart, so they're taken at their word)
+        if resources.isdir("art/shaders/materials") == False and not resources.has_archives:
             self.report({"WARNING"}, "Unable to find the SWTOR Materials subfolder. Please check this add-on's preferences: either the path to the extracted assets 'resources' folder is incorrect or the resources > art > shaders > materials subfolder is missing.")
             return {"CANCELLED"}
 
@@ -154,9 +175,24 @@ class SWTOR_OT_process_named_mats(bpy.types.Operator):
         print("PROCESSING OF MATERIALS STARTS HERE")
         print()
 
+        # Read and parse the .mat files of all the materials that the
+        # loop might process at once, concurrently (see prefetch.py),
+        # rather than one by one as it reaches them.
+        mat_trees = prefetch_mat_trees(
+            resources,
+            [
+                mat_slot.material.name
+                for ob in selected_objects if ob.type == "MESH"
+                for mat_slot in ob.material_slots
+                if mat_slot.material
+                and (r"Template: " not in mat_slot.material.name)
+                and (r"default" not in mat_slot.material.name)
+                ],
+            )
+
         # Main loop
 
-        already_processed_mats = []
+        already_processed_mats = set()
         collider_objects = []
         
         items_to_process = len(selected_objects)
@@ -196,10 +232,8 @@ class SWTOR_OT_process_named_mats(bpy.types.Operator):
                         # By looking for the material in the shaders folder we'll inherently
                         # filter out recolorable materials such as skin, eyes or armor already,
                         # finding only the Uber and a few Creature ones.
-                        mat_tree_filepath = swtor_shaders_path + "/" + mat.name + ".mat"
-                        try:
-                            matxml_tree = ET.parse(mat_tree_filepath)
-                        except:
+                        matxml_tree = mat_trees.get(mat.name)
+                        if matxml_tree is None:
                             continue  # disregard and go for the next material
                         matxml_root = matxml_tree.getroot()
 
@@ -365,12 +399,13 @@ class SWTOR_OT_process_named_mats(bpy.types.Operator):
 
                                 if matxml_type == "texture":
                                     matxml_value = matxml_value.replace("\\", "/")
-                                    temp_imagepath = swtor_resources_folderpath + "/" + matxml_value + ".dds"
-                                    try:
-                                        temp_image = bpy.data.images.load(temp_imagepath, check_existing=True)
-                                        temp_image.colorspace_settings.name = 'Raw'
-                                    except:
-                                        pass
+                                    temp_imagepath = resources.filepath(matxml_value + ".dds")
+                                    if temp_imagepath is not None:
+                                        try:
+                                            temp_image = bpy.data.images.load(temp_imagepath, check_existing=True)
+                                            temp_image.colorspace_settings.name = 'Raw'
+                                        except:
+                                            pass
                                     if matxml_semantic == "DiffuseMap":
                                         diffusemap_image = temp_image
                                     elif matxml_semantic == "RotationMap1":
@@ -1154,7 +1189,7 @@ class SWTOR_OT_process_named_mats(bpy.types.Operator):
                                     
 
 
-                        already_processed_mats.append(mat.name)
+                        already_processed_mats.add(mat.name)
 
 
         # Adding collider objects to a Collection
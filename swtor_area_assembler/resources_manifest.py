@@ -0,0 +1,217 @@
+# Manifest of the extracted SWTOR assets' "resources" folder.
+#
+# The resources folder holds hundreds of thousands of files, often on
+# slow disks, and the Area Assembler keeps asking whether some of them
+# exist (.gr2 objects, .mag and .mat files, textures, terrains). Rather
+# than hitting the filesystem for each of those questions, the folder's
+# tree is listed once with os.scandir into a manifest that answers them
+# from memory, case-insensitively (SWTOR's paths are, but the extracted
+# files' names might not be lowercase, and some filesystems care).
+#
+# The manifest is persisted in the cache folder and refreshed
+# incrementally: only the folders whose modification time changed
+# (that is, that got files or subfolders added, removed or renamed)
+# are listed again.
+#
+# Manifest file layout (.json):
+#   {"version", "root", "folders": {relative folder path: [mtime,
+#   [subfolder names], [file names]]}}, with "/" separated paths
+#   in their actual letter case, "" being the resources folder itself.
+#
+# No bpy here.
+
+import json
+import os
+
+from .addon_cache import folder_cache_key
+from .asset_paths import canonical_asset_path
+
+
+MANIFEST_VERSION = 1
+
+
+class ResourcesManifest:
+    """
+    Listing of a resources folder's tree. Asset paths passed to its
+    lookups are canonicalized (see asset_paths.py) before use.
+    """
+
+    def __init__(self, root_folderpath, folders=None):
+        self.root_folderpath = root_folderpath
+        # Relative folder path: (mtime, subfolder names, file names)
+        self.folders = folders if folders is not None else {}
+        # Lowercase relative paths to actual ones, built on first lookup.
+        self._files = None
+        self._subfolders = None
+
+    def __getstate__(self):
+        # The lookup tables are rebuilt on demand rather than pickled.
+        return {"root_folderpath": self.root_folderpath, "folders": self.folders}
+
+    def __setstate__(self, state):
+        self.__init__(state["root_folderpath"], state["folders"])
+
+    def __len__(self):
+        # Number of files.
+        return sum(len(files) for _, _, files in self.folders.values())
+
+
+    # Listing ------------------------------------------------------------
+
+    def refresh(self):
+        """
+        Brings the manifest up to date, listing only new folders and those
+        whose modification time changed. Returns True if anything changed.
+        """
+        folders = {}
+        changed = False
+        pending = [""]
+        while pending:
+            relative_folderpath = pending.pop()
+            folderpath = os.path.join(self.root_folderpath, relative_folderpath)
+            try:
+                mtime = os.stat(folderpath).st_mtime_ns
+            except OSError:
+                changed = True
+                continue
+
+            folder = self.folders.get(relative_folderpath)
+            if folder is None or folder[0] != mtime:
+                folder = _list_folder(folderpath, mtime)
+                changed = True
+
+            folders[relative_folderpath] = folder
+            prefix = relative_folderpath + "/" if relative_folderpath else ""
+            pending.extend(prefix + subfolder_name for subfolder_name in folder[1])
+
+        if changed or len(folders) != len(self.folders):
+            self.folders = folders
+            self._files = None
+            self._subfolders = None
+            return True
+        return False
+
+    def _build_lookups(self):
+        files = {}
+        subfolders = {}
+        for relative_folderpath, (_, _, file_names) in self.folders.items():
+            subfolders[relative_folderpath.lower()] = relative_folderpath
+            prefix = relative_folderpath + "/" if relative_folderpath else ""
+            for file_name in file_names:
+                files[(prefix + file_name).lower()] = prefix + file_name
+        self._files = files
+        self._subfolders = subfolders
+
+
+    # Lookups ------------------------------------------------------------
+
+    def relative_filepath(self, swtor_filepath):
+        # Actual relative path of an asset's file, or None if it doesn't exist.
+        if self._files is None:
+            self._build_lookups()
+        return self._files.get(canonical_asset_path(swtor_filepath))
+
+    def isfile(self, swtor_filepath):
+        return self.relative_filepath(swtor_filepath) is not None
+
+    def isdir(self, swtor_folderpath):
+        if self._subfolders is None:
+            self._build_lookups()
+        return canonical_asset_path(swtor_folderpath) in self._subfolders
+
+    def filepath(self, swtor_filepath):
+        """
+        Returns the full, actual filepath of an asset inside the
+        resources folder, or None if there's no such file.
+        """
+        relative_filepath = self.relative_filepath(swtor_filepath)
+        if relative_filepath is None:
+            return None
+        return os.path.join(self.root_folderpath, *relative_filepath.split("/"))
+
+
+    # Persistence ------------------------------------------------------------
+
+    def save(self, manifest_filepath):
+        temp_filepath = manifest_filepath + ".%d.tmp" % os.getpid()
+        try:
+            with open(temp_filepath, "w") as manifest_file:
+                json.dump({
+                    "version": MANIFEST_VERSION,
+                    "root": self.root_folderpath,
+                    "folders": {
+                        relative_folderpath: [mtime, list(subfolder_names), list(file_names)]
+                        for relative_folderpath, (mtime, subfolder_names, file_names) in self.folders.items()
+                        },
+                    }, manifest_file, separators=(",", ":"))
+            os.replace(temp_filepath, manifest_filepath)
+        except OSError:
+            try:
+                os.remove(temp_filepath)
+            except OSError:
+                pass
+
+
+def _list_folder(folderpath, mtime):
+    # (mtime, subfolder names, file names) of a folder, out of one os.scandir.
+    subfolder_names = []
+    file_names = []
+    try:
+        with os.scandir(folderpath) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir():
+                        subfolder_names.append(entry.name)
+                    elif entry.is_file():
+                        file_names.append(entry.name)
+                except OSError:
+                    pass
+    except OSError:
+        pass
+    return (mtime, tuple(subfolder_names), tuple(file_names))
+
+
+def load_resources_manifest(manifest_filepath, root_folderpath):
+    # Returns a persisted manifest of root_folderpath, or None if there's
+    # no usable one (missing, of another version or of another folder).
+    try:
+        with open(manifest_filepath, "r") as manifest_file:
+            data = json.load(manifest_file)
+        if data.get("version") != MANIFEST_VERSION or data.get("root") != root_folderpath:
+            return None
+        folders = {
+            relative_folderpath: (mtime, tuple(subfolder_names), tuple(file_names))
+            for relative_folderpath, (mtime, subfolder_names, file_names) in data["folders"].items()
+            }
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return None
+    return ResourcesManifest(root_folderpath, folders)
+
+
+# Loaded manifests. Key: resources folder's path. Value: ResourcesManifest.
+_loaded_manifests = {}
+
+
+def get_resources_manifest(swtor_resources_folderpath, cache_folderpath=None):
+    """
+    Returns an up to date manifest of a resources folder, reusing the one
+    loaded earlier in the session or persisted in cache_folderpath (if
+    set), and saving it there if it changed. A missing resources folder
+    results in an empty manifest.
+    """
+    root_folderpath = os.path.abspath(swtor_resources_folderpath or "")
+    manifest_filepath = None
+    if cache_folderpath:
+        manifest_filepath = os.path.join(cache_folderpath, "resources_" + folder_cache_key(root_folderpath) + ".manifest")
+
+    manifest = _loaded_manifests.get(root_folderpath)
+    if manifest is None and manifest_filepath is not None:
+        manifest = load_resources_manifest(manifest_filepath, root_folderpath)
+    if manifest is None:
+        manifest = ResourcesManifest(root_folderpath)
+
+    if manifest.refresh() and manifest_filepath is not None:
+        manifest.save(manifest_filepath)
+
+    _loaded_manifests[root_folderpath] = manifest
+    return manifest
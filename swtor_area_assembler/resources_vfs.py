@@ -0,0 +1,499 @@
+# Virtual filesystem for SWTOR's resources.
+#
+# Assets (.gr2, .mag, .mat, .dds, .obj…) used to be read only from
+# a "resources" folder produced by a full extraction of the game's
+# assets, which means tens of GB of loose files. They can now come
+# from any combination of:
+#   • the extracted resources folder (listed through its manifest,
+#     see resources_manifest.py),
+#   • .zip packs holding (part of) a resources folder's tree,
+#   • the game's own .tor archives, read directly through their
+#     hashed file tables.
+# The first backend holding a file wins.
+#
+# Files are read as bytes wherever possible. Blender's importers and
+# images.load() need actual files, though, so files coming from
+# archives are extracted on demand into a folder in the cache (capped
+# in size like the local cache, see local_cache.py), and those in the
+# resources folder are handed over through the local read-through
+# cache, if there's one.
+#
+# .tor archives (MYP format):
+#   header:      "MYP\0", version, byte order mark, uint64 offset
+#                of the first file table block
+#   table block: uint32 capacity, uint64 offset of the next block (0 if
+#                none), then capacity 34-byte entries: uint64 data offset,
+#                uint32 header size, uint32 compressed size, uint32 size,
+#                uint64 filename hash, uint32 crc, uint16 compression
+#                (0 = none, else zlib).
+# Filenames are hashed with Bob Jenkins' lookup3 hashlittle2 over their
+# lowercase "/resources/…" path, the two 32-bit halves making the key.
+#
+# No bpy here.
+
+import os
+import struct
+import threading
+import zlib
+from array import array
+from bisect import bisect_left
+from functools import lru_cache
+from zipfile import ZipFile, BadZipFile
+
+from .addon_cache import file_signature
+from .asset_paths import canonical_asset_path
+from .local_cache import LocalFileCache
+from .resources_manifest import get_resources_manifest
+
+
+# Default cap of the files extracted from archives (see ResourcesVFS).
+EXTRACTED_FILES_MAX_SIZE = 20 * 1024 ** 3
+
+
+# Backends -------------------------------------------------------------------
+
+class FolderBackend:
+    """
+    Extracted resources folder, looked up through its ResourcesManifest.
+    """
+
+    extracted = True
+
+    def __init__(self, resources_manifest):
+        self.resources_manifest = resources_manifest
+        self.location = resources_manifest.root_folderpath
+
+    def isfile(self, swtor_filepath):
+        return self.resources_manifest.isfile(swtor_filepath)
+
+    def isdir(self, swtor_folderpath):
+        return self.resources_manifest.isdir(swtor_folderpath)
+
+    def filepath(self, swtor_filepath):
+        return self.resources_manifest.filepath(swtor_filepath)
+
+    def read_bytes(self, swtor_filepath, size=None):
+        filepath = self.filepath(swtor_filepath)
+        if filepath is None:
+            return None
+        try:
+            with open(filepath, "rb") as read_file:
+                return read_file.read(size)
+        except OSError:
+            return None
+
+    def signature(self, swtor_filepath):
+        filepath = self.filepath(swtor_filepath)
+        return file_signature(filepath) if filepath is not None else None
+
+
+class ZipBackend:
+    """
+    .zip pack holding a resources folder's tree (or part of it).
+    Members can be read from several threads.
+    """
+
+    extracted = False
+
+    def __init__(self, zip_filepath):
+        self.zip_filepath = zip_filepath
+        self.location = os.path.abspath(zip_filepath)
+        self._zip = None
+        self._members = None
+        self._folders = None
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # Worker processes reopen the archive if they need it.
+        return {"zip_filepath": self.zip_filepath}
+
+    def __setstate__(self, state):
+        self.__init__(state["zip_filepath"])
+
+    def _open(self):
+        if self._members is not None:
+            return
+        with self._lock:
+            if self._members is not None:
+                return
+            members = {}
+            folders = set()
+            try:
+                self._zip = ZipFile(self.zip_filepath, "r")
+                for info in self._zip.infolist():
+                    member_path = canonical_asset_path(info.filename)
+                    # Packs may or may not include the "resources" folder itself.
+                    if member_path.startswith("resources/"):
+                        member_path = member_path[len("resources/"):]
+                    member_path = member_path.rstrip("/")
+                    if not info.is_dir():
+                        members[member_path] = info
+                        member_path = member_path.rpartition("/")[0]
+                    # Folders, whether listed or not, and those holding them.
+                    while member_path and member_path not in folders:
+                        folders.add(member_path)
+                        member_path = member_path.rpartition("/")[0]
+            except (OSError, BadZipFile):
+                self._zip = None
+            self._signature = file_signature(self.zip_filepath)
+            self._folders = folders
+            self._members = members
+
+    def isfile(self, swtor_filepath):
+        self._open()
+        return canonical_asset_path(swtor_filepath) in self._members
+
+    def isdir(self, swtor_folderpath):
+        self._open()
+        return canonical_asset_path(swtor_folderpath) in self._folders
+
+    def read_bytes(self, swtor_filepath, size=None):
+        self._open()
+        info = self._members.get(canonical_asset_path(swtor_filepath))
+        if info is None:
+            return None
+        try:
+            with self._zip.open(info) as member_file:
+                return member_file.read(size)
+        except (OSError, BadZipFile, zlib.error):
+            return None
+
+    def signature(self, swtor_filepath):
+        self._open()
+        info = self._members.get(canonical_asset_path(swtor_filepath))
+        if info is None or self._signature is None:
+            return None
+        return (info.file_size, self._signature[1])
+
+
+TOR_MAGIC = b"MYP\x00"
+_TOR_HEADER = struct.Struct("<4sIIQ")
+_TOR_BLOCK_HEADER = struct.Struct("<IQ")
+_TOR_ENTRY = struct.Struct("<QIIIQIH")
+
+
+class TorBackend:
+    """
+    SWTOR's .tor archives, read directly. Their file tables are loaded
+    on first use into sorted arrays, searched by bisection.
+    """
+
+    extracted = False
+
+    def __init__(self, tor_filepaths):
+        self.tor_filepaths = list(tor_filepaths)
+        self.location = "|".join(os.path.abspath(tor_filepath) for tor_filepath in self.tor_filepaths)
+        self._archives = None
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # Worker processes load the file tables again if they need them.
+        return {"tor_filepaths": self.tor_filepaths}
+
+    def __setstate__(self, state):
+        self.__init__(state["tor_filepaths"])
+
+    def _load(self):
+        if self._archives is not None:
+            return
+        with self._lock:
+            if self._archives is not None:
+                return
+            archives = []
+            for tor_filepath in self.tor_filepaths:
+                try:
+                    archives.append(_TorArchive(tor_filepath))
+                except (OSError, ValueError, struct.error):
+                    print(" -- Unreadable .tor archive:", tor_filepath)  # Console.
+            self._archives = archives
+
+    def _find(self, swtor_filepath):
+        self._load()
+        filename_hash = tor_filename_hash(swtor_filepath)
+        for archive in self._archives:
+            entry = archive.find(filename_hash)
+            if entry is not None:
+                return archive, entry
+        return None
+
+    def isfile(self, swtor_filepath):
+        return self._find(swtor_filepath) is not None
+
+    def isdir(self, swtor_folderpath):
+        # Hashed file tables don't tell folders apart.
+        return False
+
+    def read_bytes(self, swtor_filepath, size=None):
+        found = self._find(swtor_filepath)
+        if found is None:
+            return None
+        archive, entry = found
+        try:
+            return archive.read(entry, size)
+        except (OSError, zlib.error):
+            return None
+
+    def signature(self, swtor_filepath):
+        found = self._find(swtor_filepath)
+        if found is None:
+            return None
+        archive, entry = found
+        return (archive.sizes[entry], archive.signature[1])
+
+
+class _TorArchive:
+    # A .tor archive's file table, as parallel arrays sorted by hash.
+
+    def __init__(self, tor_filepath):
+        self.tor_filepath = tor_filepath
+        self.signature = file_signature(tor_filepath)
+        self._file = open(tor_filepath, "rb")
+        self._lock = threading.Lock()
+        try:
+            self._read_file_table()
+        except BaseException:
+            self._file.close()
+            raise
+
+    def _read_file_table(self):
+        magic, _, _, block_offset = _TOR_HEADER.unpack(self._file.read(_TOR_HEADER.size))
+        if magic != TOR_MAGIC:
+            raise ValueError("Not a .tor archive")
+
+        entries = []
+        visited = set()
+        while block_offset and block_offset not in visited:
+            visited.add(block_offset)
+            self._file.seek(block_offset)
+            capacity, next_block_offset = _TOR_BLOCK_HEADER.unpack(self._file.read(_TOR_BLOCK_HEADER.size))
+            block = self._file.read(capacity * _TOR_ENTRY.size)
+            for data_offset, header_size, compressed_size, size, filename_hash, _, compression in _TOR_ENTRY.iter_unpack(block):
+                if data_offset:
+                    entries.append((filename_hash, data_offset + header_size, compressed_size, size, compression))
+            block_offset = next_block_offset
+
+        entries.sort()
+        self.hashes = array("Q", (entry[0] for entry in entries))
+        self.offsets = array("Q", (entry[1] for entry in entries))
+        self.compressed_sizes = array("I", (entry[2] for entry in entries))
+        self.sizes = array("I", (entry[3] for entry in entries))
+        self.compressions = bytes(min(entry[4], 1) for entry in entries)
+
+    def find(self, filename_hash):
+        # Index of a file's entry, or None.
+        i = bisect_left(self.hashes, filename_hash)
+        if i < len(self.hashes) and self.hashes[i] == filename_hash:
+            return i
+        return None
+
+    def read(self, i, size=None):
+        # An entry's data (its first size bytes only, if set).
+        read_size = self.compressed_sizes[i]
+        if size is not None and not self.compressions[i]:
+            read_size = min(read_size, size)
+        with self._lock:
+            self._file.seek(self.offsets[i])
+            data = self._file.read(read_size)
+        if self.compressions[i]:
+            if size is not None:
+                return zlib.decompressobj().decompress(data, size)
+            data = zlib.decompress(data)
+        return data
+
+
+# hashlittle2 ----------------------------------------------------------------
+
+_MASK = 0xFFFFFFFF
+
+
+def _rot(x, k):
+    return ((x << k) | (x >> (32 - k))) & _MASK
+
+
+def hashlittle2(data, pc=0, pb=0):
+    """
+    Bob Jenkins' lookup3 hashlittle2 over a bytes object.
+    Returns the (pc, pb) pair of 32-bit hashes.
+    """
+    length = len(data)
+    a = b = c = (0xDEADBEEF + length + pc) & _MASK
+    c = (c + pb) & _MASK
+    if length == 0:
+        return c, b
+
+    # All blocks but the last, then the last one zero-padded to 12 bytes.
+    padded = data + b"\x00" * (-length % 12)
+    words = struct.unpack("<%dI" % (len(padded) // 4), padded)
+    last = len(words) - 3
+    for i in range(0, last, 3):
+        a = (a + words[i]) & _MASK
+        b = (b + words[i + 1]) & _MASK
+        c = (c + words[i + 2]) & _MASK
+        a = (a - c) & _MASK; a ^= _rot(c, 4);  c = (c + b) & _MASK
+        b = (b - a) & _MASK; b ^= _rot(a, 6);  a = (a + c) & _MASK
+        c = (c - b) & _MASK; c ^= _rot(b, 8);  b = (b + a) & _MASK
+        a = (a - c) & _MASK; a ^= _rot(c, 16); c = (c + b) & _MASK
+        b = (b - a) & _MASK; b ^= _rot(a, 19); a = (a + c) & _MASK
+        c = (c - b) & _MASK; c ^= _rot(b, 4);  b = (b + a) & _MASK
+
+    a = (a + words[last]) & _MASK
+    b = (b + words[last + 1]) & _MASK
+    c = (c + words[last + 2]) & _MASK
+    c ^= b; c = (c - _rot(b, 14)) & _MASK
+    a ^= c; a = (a - _rot(c, 11)) & _MASK
+    b ^= a; b = (b - _rot(a, 25)) & _MASK
+    c ^= b; c = (c - _rot(b, 16)) & _MASK
+    a ^= c; a = (a - _rot(c, 4)) & _MASK
+    b ^= a; b = (b - _rot(a, 14)) & _MASK
+    c ^= b; c = (c - _rot(b, 24)) & _MASK
+    return c, b
+
+
+@lru_cache(maxsize=1 << 16)
+def tor_filename_hash(swtor_filepath):
+    # 64-bit key of an asset in the .tor archives' file tables.
+    pc, pb = hashlittle2(("/resources/" + canonical_asset_path(swtor_filepath)).encode("utf-8"))
+    return (pc << 32) | pb
+
+
+# Virtual filesystem ---------------------------------------------------------
+
+class ResourcesVFS:
+    """
+    SWTOR resources served by a list of backends (see this module's
+    header). Asset paths are canonicalized before use. Files coming
+    from archives are extracted into extract_folderpath (if set) when
+    an actual file is needed, keeping it under extract_max_size bytes
+    by deleting the least recently used ones, and the resources
+    folder's are copied into local_cache (a LocalFileCache), if set.
+    """
+
+    def __init__(self, backends, extract_folderpath=None, local_cache=None,
+                 extract_max_size=EXTRACTED_FILES_MAX_SIZE):
+        self.backends = list(backends)
+        self.extract_folderpath = extract_folderpath
+        self.local_cache = local_cache
+        self.extract_cache = LocalFileCache(extract_folderpath, extract_max_size) if extract_folderpath else None
+
+    @property
+    def resources_key(self):
+        # Identifies the resources' location, for keying caches with.
+        return "|".join(backend.location for backend in self.backends)
+
+    @property
+    def has_archives(self):
+        return any(not backend.extracted for backend in self.backends)
+
+    def _backend(self, swtor_filepath):
+        for backend in self.backends:
+            if backend.isfile(swtor_filepath):
+                return backend
+        return None
+
+    def isfile(self, swtor_filepath):
+        return self._backend(swtor_filepath) is not None
+
+    def isdir(self, swtor_folderpath):
+        return any(backend.isdir(swtor_folderpath) for backend in self.backends)
+
+    def read_bytes(self, swtor_filepath, size=None):
+        # A file's contents (only its first size bytes, if set),
+        # or None if there's no such file. Partial reads (such as
+        # of headers) bypass the local cache.
+        backend = self._backend(swtor_filepath)
+        if backend is None:
+            return None
+        if size is not None:
+            return backend.read_bytes(swtor_filepath, size)
+        if backend.extracted and self.local_cache is not None:
+            filepath = backend.filepath(swtor_filepath)
+            if filepath is not None:
+                try:
+                    with open(self.local_cache.filepath(swtor_filepath, filepath), "rb") as read_file:
+                        return read_file.read()
+                except OSError:
+                    pass
+        return backend.read_bytes(swtor_filepath)
+
+    def signature(self, swtor_filepath):
+        # (size, mtime) pair identifying a file's version, or None.
+        backend = self._backend(swtor_filepath)
+        return backend.signature(swtor_filepath) if backend is not None else None
+
+    def original_filepath(self, swtor_filepath):
+        # Path to an asset's file in the resources folder (not to
+        # a copy of it), or None if it isn't there.
+        backend = self._backend(swtor_filepath)
+        if backend is None or not backend.extracted:
+            return None
+        return backend.filepath(swtor_filepath)
+
+    def filepath(self, swtor_filepath):
+        """
+        Returns the path to an actual file with an asset's contents
+        (extracting it from its archive if needed), or None if there's
+        no such asset or it can't be extracted.
+        """
+        backend = self._backend(swtor_filepath)
+        if backend is None:
+            return None
+        if backend.extracted:
+            filepath = backend.filepath(swtor_filepath)
+            if self.local_cache is not None and filepath is not None:
+                return self.local_cache.filepath(swtor_filepath, filepath)
+            return filepath
+        if self.extract_cache is None:
+            return None
+
+        filepath = self.extract_cache.local_filepath(swtor_filepath)
+        signature = backend.signature(swtor_filepath)
+        extracted_signature = file_signature(filepath)
+        if extracted_signature is not None and signature is not None and extracted_signature[0] == signature[0] \
+                and extracted_signature[1] >= signature[1]:
+            self.extract_cache.touch(filepath)
+            return filepath
+
+        data = backend.read_bytes(swtor_filepath)
+        if data is None:
+            return None
+        return self.extract_cache.store(swtor_filepath, data)
+
+
+def archive_backends(swtor_archives_path):
+    """
+    Backends for the archives setting: a .zip pack, a .tor archive, or a
+    folder holding any number of them (such as the game's Assets folder).
+    """
+    if not swtor_archives_path:
+        return []
+    if os.path.isdir(swtor_archives_path):
+        try:
+            filepaths = sorted(os.path.join(swtor_archives_path, name) for name in os.listdir(swtor_archives_path))
+        except OSError:
+            return []
+    else:
+        filepaths = [swtor_archives_path]
+
+    backends = [ZipBackend(filepath) for filepath in filepaths if filepath.lower().endswith(".zip")]
+    tor_filepaths = [filepath for filepath in filepaths if filepath.lower().endswith(".tor")]
+    if tor_filepaths:
+        backends.append(TorBackend(tor_filepaths))
+    return backends
+
+
+def open_resources_vfs(swtor_resources_folderpath, swtor_archives_path="",
+                       index_cache_folderpath=None, extract_folderpath=None, local_cache=None,
+                       extract_max_size=EXTRACTED_FILES_MAX_SIZE):
+    """
+    Returns the ResourcesVFS for the add-on's settings: the extracted
+    resources folder (if any) first, then the archives. The resources
+    folder's manifest is kept in index_cache_folderpath, files are
+    extracted from the archives into extract_folderpath, if set (up to
+    extract_max_size bytes of them), and the resources folder's are
+    read through local_cache, if set.
+    """
+    backends = []
+    if swtor_resources_folderpath and os.path.isdir(swtor_resources_folderpath):
+        backends.append(FolderBackend(get_resources_manifest(swtor_resources_folderpath, index_cache_folderpath)))
+    backends.extend(archive_backends(swtor_archives_path))
+    return ResourcesVFS(backends, extract_folderpath, local_cache, extract_max_size)
@@ -0,0 +1,95 @@
+# Persistent per-asset caches keyed by file signature.
+#
+# Some facts about assets are worth remembering across Blender sessions
+# as long as the assets' files don't change (which .gr2 a .mag names,
+# which assets are missing or crash the importers…). Such a cache maps
+# asset paths to (signature, value) pairs, signature being the file's
+# addon_cache.file_signature() (None for missing files), and is kept
+# in a small .json file in the cache folder.
+#
+# No bpy here.
+
+import json
+import os
+
+
+# Returned by SignedCache.get() for assets it knows nothing about
+# (None being a valid value).
+NOT_CACHED = object()
+
+
+class SignedCache:
+    """
+    Asset path: (signature, value) mapping with JSON-serializable values,
+    loaded from and saved to cache_filepath, if set. Subclasses set the
+    version of their file's format.
+    """
+
+    version = 1
+
+    def __init__(self, cache_filepath=None):
+        self.cache_filepath = cache_filepath
+        self._entries = self._load() if cache_filepath else {}
+        # Entries put since the last take_new_entries() call.
+        self._new_entries = {}
+        self._dirty = False
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _load(self):
+        try:
+            with open(self.cache_filepath, "r") as cache_file:
+                data = json.load(cache_file)
+            if data.get("version") != self.version:
+                return {}
+            return {
+                swtor_filepath: (tuple(signature) if signature is not None else None, value)
+                for swtor_filepath, (signature, value) in data["entries"].items()
+                }
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return {}
+
+    def get(self, swtor_filepath, signature):
+        # Returns the cached value for an asset with the
+        # given signature, or NOT_CACHED.
+        entry = self._entries.get(swtor_filepath)
+        if entry is None or entry[0] != signature:
+            return NOT_CACHED
+        return entry[1]
+
+    def put(self, swtor_filepath, signature, value):
+        self._entries[swtor_filepath] = (signature, value)
+        self._new_entries[swtor_filepath] = (signature, value)
+        self._dirty = True
+
+    def take_new_entries(self):
+        # Returns the entries put since the last call as a path:
+        # (signature, value) dict, say, for a worker process to send
+        # them over to the main process' cache rather than saving them.
+        new_entries = self._new_entries
+        self._new_entries = {}
+        return new_entries
+
+    def save(self):
+        """
+        Writes the cache to its file if anything's new, merging it with
+        whatever other processes might have saved in the meantime.
+        """
+        if not self._dirty or not self.cache_filepath:
+            return
+        entries = self._load()
+        entries.update(self._entries)
+        self._entries = entries
+
+        temp_filepath = self.cache_filepath + ".%d.tmp" % os.getpid()
+        try:
+            with open(temp_filepath, "w") as cache_file:
+                json.dump({"version": self.version, "entries": entries}, cache_file)
+            os.replace(temp_filepath, self.cache_filepath)
+            self._dirty = False
+        except OSError:
+            try:
+                os.remove(temp_filepath)
+            except OSError:
+                pass
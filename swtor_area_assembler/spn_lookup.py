@@ -0,0 +1,260 @@
+# Session-wide lookup of the spn table.
+#
+# spn_table.txt maps .spn_p object references to the .gr2, .mag or .dyn
+# files they stand for. It's some 22k lines long, so instead of reading
+# it into a dict on every import it's compiled, on first use, into a
+# sorted binary index in the cache folder, which is memory-mapped and
+# searched by bisection. The index is loaded once per Blender session
+# (or worker process), and compiled again only if spn_table.txt's size
+# or modification time change.
+#
+# Each entry's target is typed by its actual extension, so that things
+# like .dynmag or .mag_dropship files aren't taken for .dyn or .mag ones.
+# Both keys and targets are stored in their canonical form (see
+# asset_paths.py), and so must be the paths being looked up.
+#
+# Index file layout (little-endian):
+#   header:   magic, key count, target count, spn table's size and mtime
+#   keys:     uint32 offsets (key count + 1), then the sorted utf-8 keys
+#   entries:  uint32 per key (target index)
+#   targets:  uint8 per target (SPN_TARGET_* kind),
+#             uint32 offsets (target count + 1), then the utf-8 targets
+#
+# No bpy here.
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from .addon_cache import file_signature
+from .asset_paths import canonical_asset_path
+
+
+# Kinds of spn table targets.
+SPN_TARGET_OTHER = 0
+SPN_TARGET_GR2 = 1
+SPN_TARGET_MAG = 2
+SPN_TARGET_DYN = 3
+
+_TARGET_KINDS_BY_EXTENSION = {
+    ".gr2": SPN_TARGET_GR2,
+    ".mag": SPN_TARGET_MAG,
+    ".dyn": SPN_TARGET_DYN,
+}
+
+SPN_INDEX_MAGIC = b"SAASPNX2"
+SPN_INDEX_FILENAME = "spn_table.idx"
+
+_HEADER = struct.Struct("<8sIIQQ")
+
+
+def spn_target_kind(target_filepath):
+    # Kind of a target path, by its extension (the whole of it).
+    return _TARGET_KINDS_BY_EXTENSION.get(os.path.splitext(target_filepath)[1].lower(), SPN_TARGET_OTHER)
+
+
+def read_spn_table(spn_table_filepath):
+    """
+    Reads the spn to plc or dyn correspondence table into a dict,
+    with canonical paths. Returns None if the file doesn't exist.
+    """
+    try:
+        with open(spn_table_filepath, "r") as spn_to_gr2_or_dyn:
+            spn_table = {}
+            for dyn_obj in spn_to_gr2_or_dyn:
+                key, value = dyn_obj.split(",")
+                spn_table[canonical_asset_path(key)] = canonical_asset_path(value.replace("\n", ""))
+            return spn_table
+    except FileNotFoundError:
+        return None
+
+
+def compile_spn_index(spn_table, signature):
+    # Returns the binary index of an spn table dict (see layout above).
+    keys = sorted(key.encode("utf-8") for key in spn_table)
+
+    targets = []
+    target_indices = {}
+    entries = array("I")
+    for key in keys:
+        target = spn_table[key.decode("utf-8")]
+        target_index = target_indices.get(target)
+        if target_index is None:
+            target_index = target_indices[target] = len(targets)
+            targets.append(target)
+        entries.append(target_index)
+
+    encoded_targets = [target.encode("utf-8") for target in targets]
+
+    def offsets(blobs):
+        result = array("I", [0])
+        for blob in blobs:
+            result.append(result[-1] + len(blob))
+        return result
+
+    return b"".join((
+        _HEADER.pack(SPN_INDEX_MAGIC, len(keys), len(targets), signature[0], signature[1]),
+        offsets(keys).tobytes(),
+        b"".join(keys),
+        entries.tobytes(),
+        bytes(spn_target_kind(target) for target in targets),
+        offsets(encoded_targets).tobytes(),
+        b"".join(encoded_targets),
+        ))
+
+
+class SpnIndex:
+    """
+    Read-only view of a compiled spn index, held in a buffer
+    (typically a memory map of the index file).
+    """
+
+    def __init__(self, buffer, index_file=None):
+        self._buffer = buffer
+        self._index_file = index_file
+
+        magic, key_count, target_count, source_size, source_mtime = _HEADER.unpack_from(buffer, 0)
+        if magic != SPN_INDEX_MAGIC:
+            raise ValueError("Not an spn index")
+        self.signature = (source_size, source_mtime)
+        self.key_count = key_count
+
+        offset = _HEADER.size
+        self._key_offsets_start = offset
+        offset += (key_count + 1) * 4
+        self._keys_start = offset
+        offset += struct.unpack_from("<I", buffer, self._key_offsets_start + key_count * 4)[0]
+        self._entries_start = offset
+        offset += key_count * 4
+        self._target_kinds_start = offset
+        offset += target_count
+        self._target_offsets_start = offset
+        offset += (target_count + 1) * 4
+        self._targets_start = offset
+
+        # Decoded (and interned) targets, filled as they're looked up.
+        self._targets = {}
+
+    def __len__(self):
+        return self.key_count
+
+    def _key(self, i):
+        start, end = struct.unpack_from("<II", self._buffer, self._key_offsets_start + i * 4)
+        return self._buffer[self._keys_start + start:self._keys_start + end]
+
+    def _target(self, target_index):
+        target = self._targets.get(target_index)
+        if target is None:
+            start, end = struct.unpack_from("<II", self._buffer, self._target_offsets_start + target_index * 4)
+            target = self._buffer[self._targets_start + start:self._targets_start + end].decode("utf-8")
+            target = self._targets[target_index] = (
+                self._buffer[self._target_kinds_start + target_index],
+                sys.intern(target),
+                )
+        return target
+
+    def lookup(self, spn_filepath):
+        """
+        Returns a (SPN_TARGET_* kind, target path) tuple for
+        a canonical .spn_p path, or None if it isn't in the table.
+        """
+        key = spn_filepath.encode("utf-8")
+        low, high = 0, self.key_count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.key_count and self._key(low) == key:
+            target_index = struct.unpack_from("<I", self._buffer, self._entries_start + low * 4)[0]
+            return self._target(target_index)
+        return None
+
+    def __contains__(self, spn_filepath):
+        return self.lookup(spn_filepath) is not None
+
+    def close(self):
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+        if self._index_file is not None:
+            self._index_file.close()
+            self._index_file = None
+
+
+def open_spn_index(index_filepath):
+    # Memory-maps a compiled index file. Returns None if it's unusable.
+    try:
+        index_file = open(index_filepath, "rb")
+    except OSError:
+        return None
+    try:
+        index_map = mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        index_file.close()
+        return None
+    try:
+        return SpnIndex(index_map, index_file)
+    except (ValueError, struct.error):
+        index_map.close()
+        index_file.close()
+        return None
+
+
+# Loaded indexes. Key: spn table's filepath. Value: SpnIndex.
+_loaded_spn_indexes = {}
+
+
+def get_spn_index(spn_table_filepath, cache_folderpath=None):
+    """
+    Returns the spn table's SpnIndex, compiling it into cache_folderpath
+    if there isn't an up to date one there already (or in memory, if
+    there's no cache folder), and reusing it for the rest of the session.
+    Returns None if the spn table doesn't exist.
+    """
+    signature = file_signature(spn_table_filepath)
+    loaded = _loaded_spn_indexes.get(spn_table_filepath)
+    if loaded is not None:
+        if loaded.signature == signature:
+            return loaded
+        loaded.close()
+        del _loaded_spn_indexes[spn_table_filepath]
+
+    if signature is None:
+        return None
+
+    spn_index = None
+    index_filepath = None
+    if cache_folderpath:
+        index_filepath = os.path.join(cache_folderpath, SPN_INDEX_FILENAME)
+        spn_index = open_spn_index(index_filepath)
+        if spn_index is not None and spn_index.signature != signature:
+            spn_index.close()
+            spn_index = None
+
+    if spn_index is None:
+        spn_table = read_spn_table(spn_table_filepath)
+        if spn_table is None:
+            return None
+        index_bytes = compile_spn_index(spn_table, signature)
+
+        if index_filepath is not None:
+            temp_filepath = index_filepath + ".%d.tmp" % os.getpid()
+            try:
+                with open(temp_filepath, "wb") as index_file:
+                    index_file.write(index_bytes)
+                os.replace(temp_filepath, index_filepath)
+                spn_index = open_spn_index(index_filepath)
+            except OSError:
+                try:
+                    os.remove(temp_filepath)
+                except OSError:
+                    pass
+
+        if spn_index is None:
+            spn_index = SpnIndex(index_bytes)
+
+    _loaded_spn_indexes[spn_table_filepath] = spn_index
+    return spn_index
@@ -15,7 +15,8 @@ class SWTOR_PT_files_tools(bpy.types.Panel):
         
         # Extracted SWTOR assets' "resources" folder. 
         swtor_resources_folderpath = bpy.context.preferences.addons[__package__].preferences.swtor_resources_folderpath
-        resources_folder_exists = ( Path(swtor_resources_folderpath) / "art/shaders/materials").exists()
+        swtor_archives_path = bpy.context.preferences.addons[__package__].preferences.swtor_archives_path
+        resources_folder_exists = ( Path(swtor_resources_folderpath) / "art/shaders/materials").exists() or bool(swtor_archives_path and Path(swtor_archives_path).exists())
         
         # .gr2 Importer Addon
         modern_gr2_addon_is_enabled = addon_utils.check("io_scene_gr2")[1]
@@ -64,7 +65,8 @@ class SWTOR_PT_files_tools(bpy.types.Panel):
         # CHECKS:
         # Extracted SWTOR assets' "resources" folder. 
         swtor_resources_folderpath = bpy.context.preferences.addons[__package__].preferences.swtor_resources_folderpath
-        resources_folder_exists = ( Path(swtor_resources_folderpath) / "art/shaders/materials").exists()
+        swtor_archives_path = bpy.context.preferences.addons[__package__].preferences.swtor_archives_path
+        resources_folder_exists = ( Path(swtor_resources_folderpath) / "art/shaders/materials").exists() or bool(swtor_archives_path and Path(swtor_archives_path).exists())
         # .gr2 Importer Addon
         modern_gr2_addon_is_enabled = addon_utils.check("io_scene_gr2")[1]
 
@@ -90,6 +92,8 @@ class SWTOR_PT_files_tools(bpy.types.Panel):
         tool_section_props.prop(context.scene, "SAA_CollectionObjects",     text="Collect Objects By Type")
         tool_section_props.prop(context.scene, "SAA_MergeMultiMeshObjects", text="Merge Multi-Mesh Objects")
         tool_section_props.prop(context.scene, "SAA_ShowFullReport",        text="Full Report In Terminal")
+        tool_section_props.prop(context.scene, "SAA_ParallelPreprocessing", text="Parallel File Preprocessing")
+        tool_section_props.prop(context.scene, "SAA_UseBuiltinGr2Reader",   text="Built-in .gr2 Reader")
         tool_section_props.label(text="")
         tool_section_props.label(text="To keep Blender responsive")
         tool_section_props.label(text="after importing massive areas:")
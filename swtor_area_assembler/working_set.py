@@ -0,0 +1,173 @@
+# Extraction of the working set of a group of areas.
+#
+# Importing an area only needs a small fraction of a full SWTOR assets
+# extraction (tens of GB): the .gr2 objects its elements end up at
+# (through their .spn_p / .dyn / .mag references), the .mag files on
+# the way, the .mat files those objects' materials are described in,
+# the textures those .mat files name, and the areas' terrain .obj
+# files. This works that exact set of files out, with the same
+# resolution logic as the importer (see area_preprocess.py), and
+# hard-links (or, across drives, copies) them into a slim resources
+# folder, which can then be set as the add-on's resources folder to
+# import from a small, fast local tree.
+#
+# From the command line:
+#   python -m swtor_area_assembler.working_set <output folder> <area .json files…>
+#       --resources <resources folder> [--archives <.zip/.tor or folder>] [--copy]
+#
+# No bpy here.
+
+import argparse
+import os
+import shutil
+import sys
+
+from .area_preprocess import open_asset_resolver, preprocess_area_file
+from .asset_paths import canonical_asset_path
+from .element_kinds import KIND_MESH, KIND_DBO, KIND_TERRAIN, classify_elements
+from .gr2_header import read_gr2_headers
+from .import_plan import terrain_asset_path
+from .prefetch import mat_texture_filepaths, prefetch_mat_trees, PREFETCH_MAX_WORKERS
+from .resources_vfs import open_resources_vfs
+
+
+MAT_FOLDERPATH = "art/shaders/materials"
+
+
+def area_working_set(json_filepaths, spn_table_filepath, dyn_zip_filepath, resources,
+                     skip_dbo_objects=True, index_cache_folderpath=None, max_workers=PREFETCH_MAX_WORKERS):
+    """
+    Returns the sorted list of asset paths (see asset_paths.py) that
+    importing the given area .json files and processing their objects'
+    materials reads from resources (a ResourcesVFS), and the list of
+    (json_filepath, exception) pairs of the files that couldn't be read.
+    Paths of missing assets are included, too.
+    """
+    resolver = open_asset_resolver(spn_table_filepath, dyn_zip_filepath, resources, index_cache_folderpath)
+    gr2_filepaths = set()
+    terrain_filepaths = set()
+    failures = []
+    try:
+        for json_filepath in json_filepaths:
+            try:
+                store, _, _ = preprocess_area_file(json_filepath, resolver, skip_dbo_objects)
+            except (OSError, ValueError) as error:
+                failures.append((json_filepath, error))
+                continue
+            elements_by_kind = classify_elements(store, skip_dbo_objects)
+            for element in elements_by_kind[KIND_MESH]:
+                gr2_filepaths.add(store.asset_path(element))
+            for element in elements_by_kind[KIND_DBO]:
+                gr2_filepaths.add(store.asset_path(element))
+            for element in elements_by_kind[KIND_TERRAIN]:
+                terrain_filepaths.add(terrain_asset_path(store.ids[element]))
+        mag_filepaths = resolver.mag_filepaths()
+    finally:
+        resolver.mag_cache.save()
+        resolver.dyn_templates.close()
+
+    # Materials named in the objects' headers, read concurrently.
+    mat_names = set()
+    for gr2_header in read_gr2_headers(resources, gr2_filepaths, max_workers).values():
+        if gr2_header is not None:
+            mat_names.update(gr2_header.materials)
+
+    # Textures named in those materials' .mat files.
+    mat_filepaths = set()
+    texture_filepaths = set()
+    for mat_name, mat_tree in prefetch_mat_trees(resources, mat_names, max_workers).items():
+        if mat_tree is None:
+            continue
+        mat_filepaths.add(MAT_FOLDERPATH + "/" + mat_name + ".mat")
+        texture_filepaths.update(mat_texture_filepaths(mat_tree))
+
+    working_set = gr2_filepaths | terrain_filepaths | set(mag_filepaths) | mat_filepaths | texture_filepaths
+    return sorted({canonical_asset_path(swtor_filepath) for swtor_filepath in working_set}), failures
+
+
+def export_working_set(swtor_filepaths, resources, output_folderpath, copy_files=False):
+    """
+    Hard-links (or copies, if copy_files is True or linking isn't
+    possible) the given assets from resources (a ResourcesVFS) into
+    output_folderpath, laid out as a resources folder. Files already
+    there are left alone.
+    Returns (linked count, copied count, list of missing asset paths).
+    """
+    linked = 0
+    copied = 0
+    missing = []
+    for swtor_filepath in swtor_filepaths:
+        output_filepath = os.path.join(output_folderpath, *swtor_filepath.split("/"))
+        if os.path.isfile(output_filepath):
+            continue
+
+        # Folders are only created for assets that turn out to exist.
+        source_filepath = resources.original_filepath(swtor_filepath)
+        if source_filepath is not None:
+            os.makedirs(os.path.dirname(output_filepath), exist_ok=True)
+            if not copy_files:
+                try:
+                    os.link(source_filepath, output_filepath)
+                    linked += 1
+                    continue
+                except OSError:
+                    pass
+            try:
+                shutil.copy2(source_filepath, output_filepath)
+                copied += 1
+                continue
+            except OSError:
+                pass
+
+        # From archives (or unreadable in place).
+        data = resources.read_bytes(swtor_filepath)
+        if data is None:
+            missing.append(swtor_filepath)
+            continue
+        os.makedirs(os.path.dirname(output_filepath), exist_ok=True)
+        with open(output_filepath, "wb") as output_file:
+            output_file.write(data)
+        copied += 1
+
+    return linked, copied, missing
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m swtor_area_assembler.working_set",
+        description="Extracts the files that importing some SWTOR areas needs into a slim resources folder.",
+        )
+    parser.add_argument("output_folder", help="Folder to extract the files into (laid out as a resources folder)")
+    parser.add_argument("json_files", nargs="+", help="Area .json files")
+    parser.add_argument("--resources", default="", help="Extracted SWTOR assets' resources folder")
+    parser.add_argument("--archives", default="", help=".zip pack, .tor archive, or folder of them")
+    parser.add_argument("--cache", default=None, help="Folder for the Area Assembler's indexes")
+    parser.add_argument("--keep-dbo", action="store_true", help="Include design blockout objects")
+    parser.add_argument("--copy", action="store_true", help="Copy files rather than hard-linking them")
+    args = parser.parse_args(argv)
+
+    addon_folderpath = os.path.dirname(os.path.abspath(__file__))
+    resources = open_resources_vfs(args.resources, args.archives, args.cache)
+    if not resources.backends:
+        parser.error("neither a resources folder nor archives were found")
+
+    swtor_filepaths, failures = area_working_set(
+        args.json_files,
+        os.path.join(addon_folderpath, "spn_table.txt"),
+        os.path.join(addon_folderpath, "dyn.zip"),
+        resources,
+        skip_dbo_objects=not args.keep_dbo,
+        index_cache_folderpath=args.cache,
+        )
+    for json_filepath, error in failures:
+        print(f"WARNING: couldn't read {json_filepath}: {error}")
+
+    linked, copied, missing = export_working_set(swtor_filepaths, resources, args.output_folder, args.copy)
+    for swtor_filepath in missing:
+        print("MISSING:", swtor_filepath)
+    print(f"{len(swtor_filepaths)} files: {linked} linked, {copied} copied, {len(missing)} missing")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
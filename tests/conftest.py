@@ -0,0 +1,8 @@
+# Tests of the add-on's bpy-free modules, run outside Blender:
+#   python -m pytest tests
+# from the repository's root folder.
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,60 @@
+import json
+
+import pytest
+
+from swtor_area_assembler.area_reader import iter_area_elements, iter_json_array
+
+
+AREA_JSON = """[
+    {"id": "1", "parent": "0", "assetName": "\\\\Art\\\\Static\\\\Rock.gr2",
+     "position": [1.5, -2e3, 3.25E-2], "rotation": [0, 90.0, -180], "scale": [1, 1, 1],
+     "name": "kept out"},
+    {"id": "2", "parent": "1", "assetName": "/art/sound/emitter.wav", "position": [0, 0, 0]},
+    {"id": "3", "parent": "0", "assetName": "spn/camp/fire.spn_p",
+     "position": [0.125, 1e-7, 12345.678], "rotation": [0, 0, 0], "scale": [2, 2, 2]},
+    {"id": "4", "parent": "0", "assetName": "art/blockout/wall.dbo"},
+    {"id": "5", "parent": "0", "assetName": "art/portals/a_fadeportal_01.gr2"},
+    {"no": "assetName"},
+    [1, 2], 17, -0.5e-3, 1.0E+2, "text", true, null
+]
+"""
+
+
+def write_json(tmp_path, text, name="area.json"):
+    json_filepath = tmp_path / name
+    json_filepath.write_text(text)
+    return str(json_filepath)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7, 1 << 20])
+def test_matches_json_load(tmp_path, chunk_size):
+    json_filepath = write_json(tmp_path, AREA_JSON)
+    with open(json_filepath) as json_file:
+        assert list(iter_json_array(json_filepath, chunk_size)) == json.load(json_file)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7])
+@pytest.mark.parametrize("text", ["[]", " [ ] \n", "[12.5e-3]", "[1,\n2.0 , -3E+2]", '[{"a": [1.5]}]'])
+def test_small_arrays(tmp_path, chunk_size, text):
+    assert list(iter_json_array(write_json(tmp_path, text), chunk_size)) == json.loads(text)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7, 1 << 20])
+@pytest.mark.parametrize("text", ["", "   ", "{}", "[1 2]", "[1,", "[1]x", "[]]", "[1.]", '[{"a": 1]'])
+def test_bad_files(tmp_path, chunk_size, text):
+    with pytest.raises(ValueError):
+        list(iter_json_array(write_json(tmp_path, text), chunk_size))
+
+
+def test_area_elements(tmp_path):
+    elements = list(iter_area_elements(write_json(tmp_path, AREA_JSON)))
+
+    # Only assets, with canonical paths and the fields in use.
+    assert [element["id"] for element in elements] == ["1", "3"]
+    assert elements[0] == {
+        "id": "1", "parent": "0", "assetName": "art/static/rock.gr2",
+        "position": [1.5, -2e3, 3.25e-2], "rotation": [0, 90.0, -180], "scale": [1, 1, 1],
+        }
+
+    elements = list(iter_area_elements(write_json(tmp_path, AREA_JSON), skip_dbo_objects=False))
+    assert [element["id"] for element in elements] == ["1", "3", "4"]
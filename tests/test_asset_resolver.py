@@ -0,0 +1,127 @@
+from swtor_area_assembler.asset_resolver import AssetResolver, ResolvedAsset, parse_mag_mesh
+from swtor_area_assembler.dyn_templates import DynTemplateCache
+from swtor_area_assembler.spn_lookup import spn_target_kind
+
+
+class SpnIndex:
+    def __init__(self, spn_table):
+        self.spn_table = spn_table
+
+    def lookup(self, spn_filepath):
+        target = self.spn_table.get(spn_filepath)
+        return None if target is None else (spn_target_kind(target), target)
+
+
+class DynSource:
+    thread_safe = True
+
+    def __init__(self, dyns):
+        self.dyns = dyns
+        self.reads = []
+
+    def visuals(self, dyn_filepath):
+        self.reads.append(dyn_filepath)
+        visuals = self.dyns.get(dyn_filepath)
+        if visuals is None:
+            return None
+        return [(idx, path, (idx, 0, 0), (0, 0, 0), (1, 1, 1)) for idx, path in enumerate(visuals)]
+
+    def close(self):
+        pass
+
+
+class Resources:
+    def __init__(self, files):
+        self.files = files
+        self.reads = []
+
+    def signature(self, swtor_filepath):
+        return (len(self.files[swtor_filepath]), 0) if swtor_filepath in self.files else None
+
+    def read_bytes(self, swtor_filepath):
+        self.reads.append(swtor_filepath)
+        return self.files.get(swtor_filepath)
+
+
+def make_resolver(spn_table=None, dyns=None, files=None):
+    return AssetResolver(SpnIndex(spn_table or {}), DynTemplateCache(DynSource(dyns or {})), Resources(files or {}))
+
+
+def test_parse_mag_mesh():
+    assert parse_mag_mesh(b"<a>\r\n  Mesh=Art\\Static\\Rock.gr2\r\n</a>") == "art/static/rock.gr2"
+    assert parse_mag_mesh(b"Material=art/static/rock.mat") is None
+
+
+def test_spn_to_dyn_to_mag():
+    resolver = make_resolver(
+        spn_table={"spn/crate.spn_p": "dyn/crate.dyn"},
+        dyns={"dyn/crate.dyn": ["art/crate/box.mag", "art/crate/lid.gr2", "art/crate/glow.lit"]},
+        files={"art/crate/box.mag": b"Mesh=art/crate/box.gr2"},
+        )
+
+    resolution = resolver.resolve("spn/crate.spn_p")
+    assert resolution.asset_path == "dyn/crate.dyn" and resolution.resolved
+    assert [child[0] for child in resolution.children] == [0, 1]
+    assert resolution.children[0][4] == ResolvedAsset("art/crate/box.gr2", None, True)
+    assert resolution.children[1][4] == ResolvedAsset("art/crate/lid.gr2", None, True)
+    assert resolver.mag_dependencies("spn/crate.spn_p") == {"art/crate/box.mag"}
+    assert resolver.mag_filepaths() == ["art/crate/box.mag"]
+
+
+def test_memoization():
+    resolver = make_resolver(
+        spn_table={"spn/a.spn_p": "dyn/shared.dyn", "spn/b.spn_p": "dyn/shared.dyn"},
+        dyns={"dyn/shared.dyn": ["art/rock.mag", "art/rock.mag"]},
+        files={"art/rock.mag": b"Mesh=art/rock.gr2"},
+        )
+
+    first = resolver.resolve("spn/a.spn_p")
+    assert resolver.resolve("spn/a.spn_p") is first
+    assert resolver.resolve("spn/b.spn_p") is first
+    assert resolver.resolve("dyn/shared.dyn") is first
+    assert resolver.dyn_templates.dyn_source.reads == ["dyn/shared.dyn"]
+    assert resolver.resources.reads == ["art/rock.mag"]
+
+
+def test_prefetch():
+    resolver = make_resolver(
+        spn_table={"spn/a.spn_p": "dyn/outer.dyn"},
+        dyns={"dyn/outer.dyn": ["dyn/inner.dyn"], "dyn/inner.dyn": ["art/rock.mag"]},
+        files={"art/rock.mag": b"Mesh=art/rock.gr2"},
+        )
+    resolver.prefetch(["spn/a.spn_p"])
+    assert sorted(resolver.dyn_templates.dyn_source.reads) == ["dyn/inner.dyn", "dyn/outer.dyn"]
+    assert resolver.resources.reads == ["art/rock.mag"]
+
+    # Resolving after prefetching doesn't read anything else.
+    inner = resolver.resolve("spn/a.spn_p").children[0][4]
+    assert inner.children[0][4] == ResolvedAsset("art/rock.gr2", None, True)
+    assert len(resolver.dyn_templates.dyn_source.reads) == 2
+    assert resolver.resources.reads == ["art/rock.mag"]
+
+
+def test_reference_cycle():
+    resolver = make_resolver(
+        spn_table={"spn/loop.spn_p": "dyn/loop.dyn"},
+        dyns={"dyn/loop.dyn": ["spn/loop.spn_p", "art/rock.gr2"]},
+        )
+    resolver.prefetch(["spn/loop.spn_p"])
+
+    resolution = resolver.resolve("spn/loop.spn_p")
+    assert resolution.asset_path == "dyn/loop.dyn" and resolution.resolved
+    # The inner reference is left unresolved instead of recursing.
+    assert resolution.children[0][4] == ResolvedAsset("spn/loop.spn_p", None, False)
+    assert resolution.children[1][4] == ResolvedAsset("art/rock.gr2", None, True)
+
+
+def test_unresolvable():
+    resolver = make_resolver(
+        spn_table={"spn/gone.spn_p": "dyn/gone.dyn"},
+        files={"art/empty.mag": b"Material=art/empty.mat", "art/odd.mag": b"Mesh=art/odd.dynmag"},
+        )
+    for swtor_filepath in ("spn/unknown.spn_p", "spn/gone.spn_p", "art/missing.mag",
+                           "art/empty.mag", "art/odd.mag", "art/light.lit"):
+        assert resolver.resolve(swtor_filepath) == ResolvedAsset(swtor_filepath, None, False)
+    assert resolver.mag_dependencies("art/empty.mag") == {"art/empty.mag"}
+    assert resolver.mag_dependencies("art/light.lit") == frozenset()
+    assert resolver.mag_filepaths() == []
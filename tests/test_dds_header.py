@@ -0,0 +1,49 @@
+import struct
+
+import pytest
+
+from swtor_area_assembler.dds_header import DDS_HEADER_SIZE, DdsHeader, dds_memory_size, parse_dds_header
+
+
+def dds_header_bytes(width, height, mipmap_count, fourcc=b"", bit_count=32, dxgi_format=None):
+    # The first DDS_HEADER_SIZE bytes of a .dds file.
+    pixel_format_flags = 0x4 if fourcc else 0x40
+    data = struct.pack("<4s7I44x2I4sI16x", b"DDS ", 124, 0, height, width, 0, 0, mipmap_count,
+                       32, pixel_format_flags, fourcc, bit_count)
+    # The DX10 header follows the 124-byte DDS_HEADER.
+    data = data.ljust(128, b"\x00") + struct.pack("<I", dxgi_format or 0)
+    return data.ljust(DDS_HEADER_SIZE, b"\x00")
+
+
+def test_block_compressed():
+    header = parse_dds_header(dds_header_bytes(256, 128, 9, b"DXT1"))
+    assert header == DdsHeader(256, 128, 9, 8, 32)
+
+    assert parse_dds_header(dds_header_bytes(256, 128, 1, b"DXT5")).block_size == 16
+    assert parse_dds_header(dds_header_bytes(256, 128, 1, b"DX10", dxgi_format=98)).block_size == 16
+    assert parse_dds_header(dds_header_bytes(256, 128, 1, b"DX10", dxgi_format=80)).block_size == 8
+
+
+def test_uncompressed():
+    header = parse_dds_header(dds_header_bytes(64, 64, 0, bit_count=24))
+    assert (header.block_size, header.bits_per_pixel, header.mipmap_count) == (None, 24, 1)
+
+    # Unknown formats are taken for the widest common ones.
+    assert parse_dds_header(dds_header_bytes(64, 64, 1, b"q\x00\x00\x00")).bits_per_pixel == 64
+    assert parse_dds_header(dds_header_bytes(64, 64, 1, b"DX10", dxgi_format=2)).bits_per_pixel == 32
+
+
+def test_not_dds():
+    with pytest.raises(ValueError):
+        parse_dds_header(b"DDS ")
+    with pytest.raises(ValueError):
+        parse_dds_header(b"PNG " + dds_header_bytes(4, 4, 1)[4:])
+
+
+def test_memory_size():
+    # Every mipmap level down to 1x1, blocks never smaller than 4x4.
+    assert dds_memory_size(DdsHeader(256, 128, 9, 8, 32)) == \
+        sum(max(256 >> level, 4) // 4 * (max(128 >> level, 4) // 4) * 8 for level in range(9))
+    assert dds_memory_size(DdsHeader(4, 4, 3, 16, 32)) == 3 * 16
+    assert dds_memory_size(DdsHeader(3, 5, 1, None, 24)) == 45
+    assert dds_memory_size(DdsHeader(64, 64, 2, None, 32)) == 64 * 64 * 4 + 32 * 32 * 4
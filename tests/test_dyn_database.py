@@ -0,0 +1,87 @@
+import json
+import os
+from zipfile import ZipFile
+
+from swtor_area_assembler.dyn_database import (DYN_DATABASE_FILENAME, build_dyn_database, get_dyn_database_filepath,
+                                               open_dyn_database)
+from swtor_area_assembler.dyn_templates import DynTemplateCache, ZippedDynSource
+
+
+def dyn_json(*visuals):
+    dyn_visual_list = []
+    for visual in visuals:
+        dyn_obj = {}
+        for key, value in visual.items():
+            if key == "dynVisualFqn":
+                dyn_obj[key] = {"value": value}
+            else:
+                dyn_obj[key] = {"value": dict(zip("xyz", value))}
+        dyn_visual_list.append(dyn_obj)
+    return json.dumps({"dynPlaceable": {"dynVisualList": {"value": {"list": dyn_visual_list}}}})
+
+
+def write_dyn_zip(dyn_zip_filepath):
+    with ZipFile(dyn_zip_filepath, "w") as dyn_zip:
+        dyn_zip.writestr("Dyn/Alderaan/Crate.json", dyn_json(
+            {"dynVisualFqn": "Art\\Crate\\Box.gr2", "dynPosition": (1, 2, 3), "dynScale": (2, 2, 2)},
+            {"dynLightFqn": "art/crate/glow.lit"},
+            {"dynVisualFqn": "spn\\crate\\lid.spn_p", "dynRotation": (0, 90, 0)},
+            ))
+        dyn_zip.writestr("dyn/empty.json", dyn_json())
+        dyn_zip.writestr("dyn/broken.json", "{\"dynPlaceable\": ")
+        dyn_zip.writestr("dyn/readme.txt", "Not a .dyn")
+
+
+def test_database_matches_zip(tmp_path):
+    dyn_zip_filepath = str(tmp_path / "dyn.zip")
+    database_filepath = str(tmp_path / DYN_DATABASE_FILENAME)
+    write_dyn_zip(dyn_zip_filepath)
+    build_dyn_database(dyn_zip_filepath, database_filepath)
+
+    dyn_database = open_dyn_database(database_filepath)
+    with ZipFile(dyn_zip_filepath) as dyn_zip:
+        zipped_dyn_source = ZippedDynSource(dyn_zip)
+        for dyn_filepath in ("dyn/alderaan/crate.dyn", "dyn/empty.dyn", "dyn/broken.dyn", "dyn/missing.dyn"):
+            assert dyn_database.visuals(dyn_filepath) == zipped_dyn_source.visuals(dyn_filepath)
+
+    assert dyn_database.visuals("dyn/alderaan/crate.dyn") == [
+        (0, "art/crate/box.gr2", (1, 2, 3), (0, 0, 0), (2, 2, 2)),
+        (2, "spn/crate/lid.spn_p", (0, 0, 0), (0, 90, 0), (1, 1, 1)),
+        ]
+    assert dyn_database.visuals("dyn/empty.dyn") == []
+    assert dyn_database.visuals("dyn/broken.dyn") is None
+
+    dyn_templates = DynTemplateCache(dyn_database)
+    dyn_templates.prefetch(["dyn/alderaan/crate.dyn", "dyn/missing.dyn"])
+    assert [visual[1] for visual in dyn_templates.get("dyn/alderaan/crate.dyn")] == \
+        ["art/crate/box.gr2", "spn/crate/lid.spn_p"]
+    assert dyn_templates.get("dyn/missing.dyn") is None
+    dyn_templates.close()
+
+
+def test_rebuilt_when_zip_changes(tmp_path):
+    dyn_zip_filepath = str(tmp_path / "dyn.zip")
+    cache_folderpath = str(tmp_path / "cache")
+    os.makedirs(cache_folderpath)
+    assert get_dyn_database_filepath(dyn_zip_filepath, cache_folderpath) is None
+
+    write_dyn_zip(dyn_zip_filepath)
+    database_filepath = get_dyn_database_filepath(dyn_zip_filepath, cache_folderpath)
+    assert database_filepath == os.path.join(cache_folderpath, DYN_DATABASE_FILENAME)
+    mtime = os.stat(database_filepath).st_mtime_ns
+    assert get_dyn_database_filepath(dyn_zip_filepath, cache_folderpath) == database_filepath
+    assert os.stat(database_filepath).st_mtime_ns == mtime
+
+    with ZipFile(dyn_zip_filepath, "a") as dyn_zip:
+        dyn_zip.writestr("dyn/added.json", dyn_json({"dynVisualFqn": "art/added.mag"}))
+    assert get_dyn_database_filepath(dyn_zip_filepath, cache_folderpath) == database_filepath
+    dyn_database = open_dyn_database(database_filepath)
+    assert dyn_database.visuals("dyn/added.dyn") == [(0, "art/added.mag", (0, 0, 0), (0, 0, 0), (1, 1, 1))]
+    dyn_database.close()
+
+
+def test_unusable_database(tmp_path):
+    database_filepath = tmp_path / DYN_DATABASE_FILENAME
+    assert open_dyn_database(str(database_filepath)) is None
+    database_filepath.write_bytes(b"Not a database")
+    assert open_dyn_database(str(database_filepath)) is None
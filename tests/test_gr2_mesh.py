@@ -0,0 +1,130 @@
+import struct
+
+import numpy
+import pytest
+
+from swtor_area_assembler.gr2_header import _GR2_HEADER, _GR2_MESH_HEADER, Gr2HeaderTruncated, parse_gr2_header
+from swtor_area_assembler.gr2_mesh import Gr2Decoder, decode_gr2_static_meshes
+
+
+def gr2_file_data(vertex_size=24, piece_first_in_indices=False, index_count_in_faces=False, gr2_type=0):
+    # A static .gr2 file with one quad mesh: two faces, one per material.
+    materials = [b"mat_a", b"collision"]
+    vertices = numpy.zeros(4, dtype=[("position", "<f4", 3), ("normal", "u1", 4),
+                                     ("tangent", "u1", 4), ("uv", "<f2", 2)])
+    vertices["position"] = [[0, 0, 0], [1, 0, 0], [0, 1, 0], [1, 1, 0]]
+    vertices["normal"] = [[127, 127, 255, 0]] * 4
+    vertices["uv"] = [[0, 0], [1, 0], [0, 1], [1, 1]]
+    indices = numpy.array([0, 1, 2, 1, 3, 2], "<u2")
+
+    meshes_offset = _GR2_HEADER.size
+    pieces_offset = meshes_offset + _GR2_MESH_HEADER.size
+    pieces = struct.pack("<4I32x", 0, 1, 0, 0) + struct.pack("<4I32x", 3 if piece_first_in_indices else 1, 1, 1, 1)
+    vertices_offset = pieces_offset + len(pieces)
+    indices_offset = vertices_offset + vertices.nbytes
+    material_names_offset = indices_offset + indices.nbytes
+
+    names = b""
+    name_offsets = []
+    for name in materials + [b"quad"]:
+        name_offsets.append(material_names_offset + 4 * len(materials) + len(names))
+        names += name + b"\x00"
+
+    header = _GR2_HEADER.pack(b"GAWB", 4, 3, gr2_type, 1, len(materials), 0, 0, *[0.0] * 8,
+                              0, meshes_offset, material_names_offset, 0, 0)
+    mesh_header = _GR2_MESH_HEADER.pack(name_offsets[-1], 0, 2, 0, 0, vertex_size, 4,
+                                        2 if index_count_in_faces else 6,
+                                        vertices_offset, pieces_offset, indices_offset, 0)
+    return (header + mesh_header + pieces + vertices.tobytes() + indices.tobytes()
+            + struct.pack("<2I", *name_offsets[:2]) + names)
+
+
+@pytest.mark.parametrize("variant", [{}, {"piece_first_in_indices": True}, {"index_count_in_faces": True}])
+def test_decode(variant):
+    model = decode_gr2_static_meshes(gr2_file_data(**variant))
+
+    assert model.materials == ("mat_a", "collision")
+    mesh, = model.meshes
+    assert mesh.name == "quad"
+    assert mesh.positions.tolist() == [[0, 0, 0], [1, 0, 0], [0, 1, 0], [1, 1, 0]]
+    assert mesh.faces.tolist() == [[0, 1, 2], [1, 3, 2]]
+    assert mesh.face_materials.tolist() == [0, 1]
+    # Normals are unit length, UVs flipped vertically.
+    assert numpy.allclose(numpy.linalg.norm(mesh.normals, axis=1), 1)
+    assert mesh.uvs.tolist() == [[0, 1], [1, 1], [0, 0], [1, 0]]
+
+
+def test_header():
+    data = gr2_file_data()
+    header = parse_gr2_header(data)
+    assert header.materials == ("mat_a", "collision")
+    assert [mesh.name for mesh in header.meshes] == ["quad"]
+
+    # The start of the file is enough if it holds the names, or else
+    # tells how much more to read.
+    assert parse_gr2_header(data, partial=True) == header
+    read_sizes = [100]
+    while True:
+        try:
+            partial_header = parse_gr2_header(data[:read_sizes[-1]], partial=True)
+            break
+        except Gr2HeaderTruncated as truncated:
+            assert truncated.needed_size > read_sizes[-1]
+            read_sizes.append(truncated.needed_size)
+    assert partial_header == header
+    assert len(read_sizes) > 1
+
+
+@pytest.mark.parametrize("data", [
+    gr2_file_data(vertex_size=32),
+    gr2_file_data(gr2_type=1),
+    gr2_file_data()[:300],
+    b"GAWB",
+    b"not a .gr2 file" * 10,
+    ])
+def test_unsupported(data):
+    with pytest.raises(ValueError):
+        decode_gr2_static_meshes(data)
+
+
+def gr2_files(tmp_path, count):
+    # count files, every third one unreadable.
+    filepaths = {}
+    for i in range(count):
+        filepath = tmp_path / ("%d.gr2" % i)
+        filepath.write_bytes(gr2_file_data() if i % 3 else b"junk")
+        filepaths["art/%d.gr2" % i] = str(filepath)
+    return filepaths
+
+
+@pytest.mark.parametrize("use_process_pool", [False, True])
+def test_decoder(tmp_path, use_process_pool):
+    filepaths = gr2_files(tmp_path, 40)
+    keys = list(filepaths)
+    # One asked for way before its turn.
+    keys[2], keys[30] = keys[30], keys[2]
+
+    with Gr2Decoder(filepaths, use_process_pool, max_workers=2) as decoder:
+        assert (decoder._executor is not None) == use_process_pool
+        for key in keys:
+            if int(key[4:-4]) % 3:
+                assert decoder.model(key).meshes[0].name == "quad"
+            else:
+                with pytest.raises(ValueError):
+                    decoder.model(key)
+            # Only a window of files is decoded ahead.
+            assert len(decoder._futures) <= 2 * 4
+        assert not decoder._futures
+
+        # Files not given up front are decoded in place.
+        assert decoder.model("art/extra.gr2", filepaths["art/1.gr2"]).materials == ("mat_a", "collision")
+        with pytest.raises(KeyError):
+            decoder.model("art/unknown.gr2")
+
+
+def test_decoder_closed_early(tmp_path):
+    filepaths = gr2_files(tmp_path, 40)
+    decoder = Gr2Decoder(filepaths, max_workers=2)
+    decoder.model("art/1.gr2")
+    decoder.close()
+    assert decoder._executor is None and not decoder._futures
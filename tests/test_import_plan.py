@@ -0,0 +1,91 @@
+from math import radians
+
+from swtor_area_assembler.element_kinds import KIND_MESH, KIND_TERRAIN, KIND_LIGHT, KIND_DYN_PARENT
+from swtor_area_assembler.element_store import (AreaElementStore, ELEMENT_DYN_PARENT,
+                                                PARENT_ROOT, PARENT_MISSING)
+from swtor_area_assembler.import_plan import plan_import
+
+
+def preprocessed_area(elements, has_terrain=False):
+    # A preprocess_area_file() result out of (id, parent id, asset path[, element type]) tuples.
+    store = AreaElementStore()
+    for swtor_id, parent_id, swtor_filepath, *element_type in elements:
+        store.append(swtor_id, parent_id, swtor_filepath, (1, 2, 3), (90, 0, 180), (1, 1, 2), *element_type)
+    return store, has_terrain, 10
+
+
+def area_a():
+    return preprocessed_area([
+        ("1", "0", "art/static/rock.gr2"),
+        ("2", "1", "art/static/tree.gr2"),
+        ("3", "0", "art/lights/lamp.lit"),
+        ("4", "0", "world/heightmaps/heightmap.hms"),
+        ("5", "99", "art/static/rock.gr2"),
+        ("6", "0", "dyn/camp/fire.dyn", ELEMENT_DYN_PARENT),
+        ("7", "0", "art/dbo/blockout_dbo.gr2x"),
+        ], has_terrain=True)
+
+
+def test_objects_and_names():
+    plan = plan_import([("a.json", area_a())])
+
+    assert [planned_object.swtor_id for planned_object in plan.objects] == ["1", "2", "3", "4", "5", "6"]
+    rock, tree, lamp, terrain, orphan, fire = plan.objects
+
+    assert (rock.kind, rock.asset_name, rock.final_name, rock.import_path) == \
+        (KIND_MESH, "rock", "rock", "art/static/rock.gr2")
+    assert lamp.kind == KIND_LIGHT and lamp.import_path is None
+    assert fire.kind == KIND_DYN_PARENT and fire.import_path is None
+
+    # Terrains are imported from their id's .obj and keep their id as name.
+    assert terrain.kind == KIND_TERRAIN
+    assert terrain.import_path == "world/heightmaps/4.obj"
+    assert terrain.final_name is None
+
+    assert rock.location == (1, 2, 3)
+    assert rock.rotation == (radians(90), 0, radians(180))
+    assert rock.scale == (1, 1, 2)
+
+
+def test_parenting():
+    plan = plan_import([("a.json", area_a())])
+    rock, tree, _, _, orphan, _ = plan.objects
+
+    assert rock.parent == PARENT_ROOT
+    assert tree.parent == rock.element and tree.parent_id == "1"
+    assert orphan.parent == PARENT_MISSING
+
+
+def test_unique_assets_across_areas():
+    plan = plan_import([("a.json", area_a()), ("b.json", preprocessed_area([("1", "0", "art/static/rock.gr2")]))])
+
+    assert plan.json_names == ["a.json", "b.json"]
+    assert plan.assets["art/static/rock.gr2"] == [0, 4, 6]
+    assert plan.objects[6].json_name == "b.json"
+    assert set(plan.assets) == {"art/static/rock.gr2", "art/static/tree.gr2", "world/heightmaps/4.obj"}
+
+
+def test_collections():
+    area = area_a()
+
+    plan = plan_import([("a.json", area)], create_lights=True, collection_objects=True)
+    assert plan.areas[0].collections == (
+        ("a.json", None),
+        ("a.json - Lights", "a.json"),
+        ("a.json - Terrain", "a.json"),
+        ("a.json - Objects", "a.json"),
+        )
+    assert [planned_object.collection_name for planned_object in plan.objects[:4]] == [
+        "a.json - Objects", "a.json - Objects", "a.json - Lights", "a.json - Terrain"]
+
+    plan = plan_import([("a.json", area)])
+    assert plan.areas[0].collections == (("a.json", None),)
+    assert {planned_object.collection_name for planned_object in plan.objects} == {"a.json"}
+
+
+def test_dbo_objects():
+    area = preprocessed_area([("1", "0", "art/dbo/blockout_dbo.gr2x")])
+
+    assert len(plan_import([("a.json", area)], skip_dbo_objects=True)) == 0
+    planned_object, = plan_import([("a.json", area)], skip_dbo_objects=False).objects
+    assert planned_object.import_path == "art/dbo/blockout_dbo.gr2x"
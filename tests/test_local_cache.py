@@ -0,0 +1,90 @@
+import os
+
+from swtor_area_assembler import local_cache
+from swtor_area_assembler.local_cache import LocalFileCache, get_local_file_cache
+
+
+def make_source(folderpath, name, size):
+    filepath = folderpath / name
+    filepath.write_bytes(name.encode("utf-8")[:1] * size)
+    return str(filepath)
+
+
+def set_atime(filepath, atime_ns):
+    # Explicit use times, so that eviction doesn't depend on the clock's resolution.
+    os.utime(filepath, ns=(atime_ns, os.stat(filepath).st_mtime_ns))
+
+
+def test_read_through(tmp_path):
+    source_folderpath = tmp_path / "nas"
+    source_folderpath.mkdir()
+    source_filepath = make_source(source_folderpath, "rock.gr2", 40)
+    cache = LocalFileCache(str(tmp_path / "cache"), 100)
+
+    local_filepath = cache.filepath("Art\\Static\\Rock.gr2", source_filepath)
+    assert local_filepath == str(tmp_path.joinpath("cache", "art", "static", "rock.gr2"))
+    assert os.stat(local_filepath).st_mtime_ns == os.stat(source_filepath).st_mtime_ns
+    with open(local_filepath, "rb") as local_file:
+        assert local_file.read() == b"r" * 40
+
+    # Copies are refreshed when their originals change.
+    with open(source_filepath, "wb") as source_file:
+        source_file.write(b"R" * 50)
+    assert cache.filepath("art/static/rock.gr2", source_filepath) == local_filepath
+    with open(local_filepath, "rb") as local_file:
+        assert local_file.read() == b"R" * 50
+
+    # Files that can't be cached are read in place.
+    big_filepath = make_source(source_folderpath, "big.gr2", 101)
+    assert cache.filepath("art/static/big.gr2", big_filepath) == big_filepath
+    missing_filepath = str(source_folderpath / "missing.gr2")
+    assert cache.filepath("art/static/missing.gr2", missing_filepath) == missing_filepath
+
+
+def test_lru_eviction(tmp_path):
+    source_folderpath = tmp_path / "nas"
+    source_folderpath.mkdir()
+    cache = LocalFileCache(str(tmp_path / "cache"), 100)
+
+    local_filepaths = {}
+    for i, name in enumerate(("a.gr2", "b.gr2"), 1):
+        local_filepaths[name] = cache.filepath(name, make_source(source_folderpath, name, 40))
+        set_atime(local_filepaths[name], i * 10**9)
+
+    # Using a copy makes it the most recently used.
+    assert cache.filepath("a.gr2", str(source_folderpath / "a.gr2")) == local_filepaths["a.gr2"]
+    assert os.stat(local_filepaths["a.gr2"]).st_atime_ns > 2 * 10**9
+
+    # Going over the cap evicts the least recently used files down to 90% of it.
+    local_filepaths["c.gr2"] = cache.filepath("c.gr2", make_source(source_folderpath, "c.gr2", 40))
+    assert not os.path.exists(local_filepaths["b.gr2"])
+    assert os.path.exists(local_filepaths["a.gr2"]) and os.path.exists(local_filepaths["c.gr2"])
+    assert cache.prune() == 80
+
+    # So does storing data (such as extracted from an archive).
+    set_atime(local_filepaths["c.gr2"], 3 * 10**9)
+    stored_filepath = cache.store("art/d.mag", b"d" * 30)
+    assert stored_filepath == str(tmp_path.joinpath("cache", "art", "d.mag"))
+    assert not os.path.exists(local_filepaths["c.gr2"])
+    assert cache.prune() == 70
+
+    set_atime(local_filepaths["a.gr2"], 4 * 10**9)
+    set_atime(stored_filepath, 5 * 10**9)
+    cache.max_size = 50
+    assert cache.prune() == 30
+    assert os.listdir(str(tmp_path / "cache")) == ["art"]
+
+
+def test_get_local_file_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(local_cache, "_local_caches", {})
+    assert get_local_file_cache("", 100) is None
+
+    cache = get_local_file_cache(str(tmp_path / "cache"), 100)
+    assert os.path.isdir(str(tmp_path / "cache"))
+    cache.store("art/a.mag", b"a" * 80)
+
+    # Later calls reuse the cache, pruning it if its cap got lower.
+    assert get_local_file_cache(str(tmp_path / "cache"), 100) is cache
+    assert get_local_file_cache(str(tmp_path / "cache"), 50) is cache
+    assert cache.max_size == 50
+    assert not os.path.exists(cache.local_filepath("art/a.mag"))
@@ -0,0 +1,103 @@
+import os
+
+from swtor_area_assembler.element_store import AreaElementStore, ELEMENT_DYN_PARENT
+from swtor_area_assembler.plan_cache import plan_cache_key, save_area_plan, load_area_plan
+
+
+def preprocessed_area():
+    store = AreaElementStore()
+    store.append("1", "0", "dyn/camp/fire.dyn", (1.5, 2, 3), (0, 90, 0), (1, 1, 1), ELEMENT_DYN_PARENT)
+    store.append("1-0", "1", "art/static/fire_pit.gr2", (0, 0, 0.25), (0, 0, 0), (2, 2, 2))
+    store.append("2", "0", "art/static/fire_pit.gr2", (-1, 0, 0), (0, 0, 45), (1, 1, 1))
+    store.append("3", "0", "world/heightmaps/heightmap.hms", (0, 0, 0), (0, 0, 0), (1, 1, 1))
+    return store, True, 17
+
+
+def write_json(tmp_path, name="area.json", text="[]"):
+    json_filepath = tmp_path / name
+    json_filepath.write_text(text)
+    return str(json_filepath)
+
+
+def test_round_trip(tmp_path):
+    key = plan_cache_key(write_json(tmp_path), (1, 4, 0), {"SkipDBOObjects": True})
+    save_area_plan(str(tmp_path), key, preprocessed_area())
+
+    store, has_terrain, max_swtor_name_length = load_area_plan(str(tmp_path), key)
+    original_store = preprocessed_area()[0]
+
+    assert (has_terrain, max_swtor_name_length) == (True, 17)
+    assert store.ids == original_store.ids
+    assert store.parent_ids == original_store.parent_ids
+    assert [store.asset_path(i) for i in range(len(store))] == \
+        [original_store.asset_path(i) for i in range(len(original_store))]
+    assert store.element_types == original_store.element_types
+    assert store.positions == original_store.positions
+    assert store.rotations == original_store.rotations
+    assert store.scales == original_store.scales
+
+
+def test_missing_and_unreadable_plans(tmp_path):
+    assert plan_cache_key(str(tmp_path / "missing.json"), (1, 4, 0), {}) is None
+
+    key = plan_cache_key(write_json(tmp_path), (1, 4, 0), {})
+    assert load_area_plan(str(tmp_path), key) is None
+
+    save_area_plan(str(tmp_path), key, preprocessed_area())
+    plan_filepath = os.path.join(str(tmp_path), key + ".plan")
+    with open(plan_filepath, "r+b") as plan_file:
+        plan_file.truncate(os.path.getsize(plan_filepath) // 2)
+    assert load_area_plan(str(tmp_path), key) is None
+
+
+def test_key_changes(tmp_path):
+    json_filepath = write_json(tmp_path)
+    dependency_filepath = write_json(tmp_path, "spn_table.txt", "a,b\n")
+    key = plan_cache_key(json_filepath, (1, 4, 0), {"SkipDBOObjects": True}, (dependency_filepath,))
+
+    assert key == plan_cache_key(json_filepath, (1, 4, 0), {"SkipDBOObjects": True}, (dependency_filepath,))
+    assert key != plan_cache_key(json_filepath, (1, 5, 0), {"SkipDBOObjects": True}, (dependency_filepath,))
+    assert key != plan_cache_key(json_filepath, (1, 4, 0), {"SkipDBOObjects": False}, (dependency_filepath,))
+
+    write_json(tmp_path, "spn_table.txt", "a,b\nc,d\n")
+    assert key != plan_cache_key(json_filepath, (1, 4, 0), {"SkipDBOObjects": True}, (dependency_filepath,))
+
+    write_json(tmp_path, "area.json", "[{}]")
+    assert key != plan_cache_key(json_filepath, (1, 4, 0), {"SkipDBOObjects": True})
+
+
+def test_mag_dependencies(tmp_path):
+    key = plan_cache_key(write_json(tmp_path), (1, 4, 0), {})
+    mag_signatures = {"art/camp/fire.mag": (120, 1000), "art/camp/missing.mag": None}
+    save_area_plan(str(tmp_path), key, preprocessed_area(), mag_signatures)
+
+    assert load_area_plan(str(tmp_path), key, mag_signatures.get) is not None
+
+    # Changed or newly extracted .mag files make the plan stale.
+    changed_signatures = dict(mag_signatures, **{"art/camp/fire.mag": (121, 2000)})
+    assert load_area_plan(str(tmp_path), key, changed_signatures.get) is None
+    extracted_signatures = dict(mag_signatures, **{"art/camp/missing.mag": (80, 3000)})
+    assert load_area_plan(str(tmp_path), key, extracted_signatures.get) is None
+
+
+def test_superseded_plans(tmp_path):
+    cache_folderpath = tmp_path / "plans"
+    cache_folderpath.mkdir()
+    json_filepath = write_json(tmp_path)
+    other_json_filepath = write_json(tmp_path, "other.json")
+
+    old_key = plan_cache_key(json_filepath, (1, 4, 0), {"SkipDBOObjects": True})
+    other_options_key = plan_cache_key(json_filepath, (1, 4, 0), {"SkipDBOObjects": False})
+    other_area_key = plan_cache_key(other_json_filepath, (1, 4, 0), {"SkipDBOObjects": True})
+    for key in (old_key, other_options_key, other_area_key):
+        save_area_plan(str(cache_folderpath), key, preprocessed_area())
+
+    # A new version of the add-on supersedes the area's plan, but
+    # not those of other areas or options.
+    new_key = plan_cache_key(json_filepath, (1, 5, 0), {"SkipDBOObjects": True})
+    save_area_plan(str(cache_folderpath), new_key, preprocessed_area())
+
+    assert sorted(os.listdir(str(cache_folderpath))) == sorted(
+        key + ".plan" for key in (new_key, other_options_key, other_area_key))
+    assert load_area_plan(str(cache_folderpath), old_key) is None
+    assert load_area_plan(str(cache_folderpath), new_key) is not None
@@ -0,0 +1,118 @@
+import os
+import pickle
+
+from swtor_area_assembler import resources_manifest
+from swtor_area_assembler.resources_manifest import ResourcesManifest, get_resources_manifest, load_resources_manifest
+
+
+def make_file(root, relative_filepath):
+    filepath = root.joinpath(*relative_filepath.split("/"))
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    filepath.write_bytes(b"")
+    return filepath
+
+
+def set_mtime(folderpath, mtime_ns):
+    # Explicit folder mtimes, so that changes don't depend on the clock's resolution.
+    os.utime(str(folderpath), ns=(mtime_ns, mtime_ns))
+
+
+def record_listings(monkeypatch, root):
+    # Returns the list that the folders listed from now on are appended to.
+    listed = []
+    list_folder = resources_manifest._list_folder
+
+    def recording_list_folder(folderpath, mtime):
+        listed.append(os.path.relpath(folderpath, str(root)).replace(os.sep, "/"))
+        return list_folder(folderpath, mtime)
+
+    monkeypatch.setattr(resources_manifest, "_list_folder", recording_list_folder)
+    return listed
+
+
+def test_lookups(tmp_path):
+    make_file(tmp_path, "Art/Static/Rock.GR2")
+    make_file(tmp_path, "art/static/tree.gr2")
+    make_file(tmp_path, "world/heightmaps/area.obj")
+
+    manifest = ResourcesManifest(str(tmp_path))
+    assert manifest.refresh()
+    assert len(manifest) == 3
+    assert manifest.relative_filepath("art\\static\\rock.gr2") == "Art/Static/Rock.GR2"
+    assert manifest.filepath("/ART/static/ROCK.gr2") == str(tmp_path.joinpath("Art", "Static", "Rock.GR2"))
+    assert manifest.isfile("art/static/tree.gr2")
+    assert not manifest.isfile("art/static")
+    assert manifest.isdir("art/static") and manifest.isdir("World\\HeightMaps")
+    assert not manifest.isdir("art/static/tree.gr2")
+    assert manifest.filepath("art/static/missing.gr2") is None
+
+    unpickled = pickle.loads(pickle.dumps(manifest))
+    assert unpickled.folders == manifest.folders
+    assert unpickled.isfile("art/static/rock.gr2")
+
+
+def test_incremental_refresh(tmp_path, monkeypatch):
+    listed = record_listings(monkeypatch, tmp_path)
+    make_file(tmp_path, "art/static/rock.gr2")
+    make_file(tmp_path, "art/dynamic/door.gr2")
+    for mtime_ns, folderpath in enumerate((tmp_path / "art" / "static", tmp_path / "art" / "dynamic",
+                                           tmp_path / "art", tmp_path), 1):
+        set_mtime(folderpath, mtime_ns * 10**9)
+
+    manifest = ResourcesManifest(str(tmp_path))
+    assert manifest.refresh()
+    assert sorted(listed) == [".", "art", "art/dynamic", "art/static"]
+
+    # Nothing changed, nothing listed.
+    del listed[:]
+    assert not manifest.refresh()
+    assert listed == []
+
+    # Only the folder that got a new file is listed again.
+    make_file(tmp_path, "art/static/tree.gr2")
+    set_mtime(tmp_path / "art" / "static", 100 * 10**9)
+    assert manifest.isfile("art/static/rock.gr2")
+    assert manifest.refresh()
+    assert listed == ["art/static"]
+    assert manifest.isfile("art/static/tree.gr2")
+
+    # A removed subfolder goes away along with its files.
+    del listed[:]
+    os.remove(str(tmp_path / "art" / "dynamic" / "door.gr2"))
+    os.rmdir(str(tmp_path / "art" / "dynamic"))
+    set_mtime(tmp_path / "art", 200 * 10**9)
+    assert manifest.refresh()
+    assert listed == ["art"]
+    assert not manifest.isfile("art/dynamic/door.gr2")
+    assert not manifest.isdir("art/dynamic")
+    assert "art/dynamic" not in manifest.folders
+
+
+def test_persisted_manifest(tmp_path, monkeypatch):
+    monkeypatch.setattr(resources_manifest, "_loaded_manifests", {})
+    resources_folderpath = tmp_path / "resources"
+    cache_folderpath = tmp_path / "cache"
+    cache_folderpath.mkdir()
+    make_file(resources_folderpath, "art/static/rock.gr2")
+
+    manifest = get_resources_manifest(str(resources_folderpath), str(cache_folderpath))
+    assert get_resources_manifest(str(resources_folderpath), str(cache_folderpath)) is manifest
+    (manifest_filepath,) = cache_folderpath.iterdir()
+
+    # A new session reads the saved manifest and lists nothing.
+    monkeypatch.setattr(resources_manifest, "_loaded_manifests", {})
+    listed = record_listings(monkeypatch, resources_folderpath)
+    loaded_manifest = get_resources_manifest(str(resources_folderpath), str(cache_folderpath))
+    assert loaded_manifest is not manifest
+    assert loaded_manifest.folders == manifest.folders
+    assert listed == []
+
+    # Manifests of other folders aren't used.
+    assert load_resources_manifest(str(manifest_filepath), str(tmp_path)) is None
+
+
+def test_missing_resources_folder(tmp_path, monkeypatch):
+    monkeypatch.setattr(resources_manifest, "_loaded_manifests", {})
+    manifest = get_resources_manifest(str(tmp_path / "missing"))
+    assert len(manifest) == 0
+    assert not manifest.isfile("art/static/rock.gr2")
@@ -0,0 +1,154 @@
+import os
+import pickle
+import struct
+import zlib
+from zipfile import ZipFile, ZIP_DEFLATED
+
+import pytest
+
+from swtor_area_assembler.resources_vfs import (TOR_MAGIC, TorBackend, ZipBackend, archive_backends, hashlittle2,
+                                                open_resources_vfs, tor_filename_hash)
+
+
+# Bob Jenkins' own test vectors (lookup3.c's driver5), as (pc, pb) pairs.
+@pytest.mark.parametrize("data, pc, pb, expected", [
+    (b"", 0, 0, (0xDEADBEEF, 0xDEADBEEF)),
+    (b"", 0, 0xDEADBEEF, (0xBD5B7DDE, 0xDEADBEEF)),
+    (b"", 0xDEADBEEF, 0xDEADBEEF, (0x9C093CCD, 0xBD5B7DDE)),
+    (b"Four score and seven years ago", 0, 0, (0x17770551, 0xCE7226E6)),
+    (b"Four score and seven years ago", 0, 1, (0xE3607CAE, 0xBD371DE4)),
+    (b"Four score and seven years ago", 1, 0, (0xCD628161, 0x6CBEA4B3)),
+    ])
+def test_hashlittle2(data, pc, pb, expected):
+    assert hashlittle2(data, pc, pb) == expected
+
+
+def test_tor_filename_hash():
+    pc, pb = hashlittle2(b"/resources/art/static/rock.gr2")
+    assert tor_filename_hash("Art\\Static\\Rock.gr2") == (pc << 32) | pb
+
+
+def write_tor(tor_filepath, files, block_capacity=2):
+    """
+    Writes a .tor archive holding files ({asset path: (data, compressed)}),
+    its file table split in blocks of block_capacity entries.
+    """
+    header_size = 8
+    data = bytearray(struct.pack("<4sIIQ", TOR_MAGIC, 6, 0xFD23EC43, 0))
+    entries = []
+    for swtor_filepath, (file_data, compressed) in files.items():
+        stored_data = zlib.compress(file_data) if compressed else file_data
+        entries.append(struct.pack("<QIIIQIH", len(data), header_size, len(stored_data), len(file_data),
+                                   tor_filename_hash(swtor_filepath), 0, int(compressed)))
+        data += b"\xFF" * header_size + stored_data
+
+    # Blocks have unused (zeroed) entries too.
+    blocks = [entries[i:i + block_capacity] for i in range(0, len(entries), block_capacity)]
+    block_offset = len(data)
+    struct.pack_into("<Q", data, 12, block_offset)
+    for i, block in enumerate(blocks):
+        next_block_offset = block_offset + 12 + (block_capacity + 1) * 34 if i + 1 < len(blocks) else 0
+        data += struct.pack("<IQ", block_capacity + 1, next_block_offset) + b"".join(block)
+        data += bytes(34 * (block_capacity + 1 - len(block)))
+        block_offset = next_block_offset
+
+    with open(tor_filepath, "wb") as tor_file:
+        tor_file.write(data)
+
+
+TOR_FILES = {
+    "art/static/rock.gr2": (b"GR2 rock" * 100, False),
+    "art/static/tree.gr2": (b"GR2 tree" * 100, True),
+    "art/static/rock.mag": (b"Mesh=art/static/rock.gr2", False),
+    "art/static/tree.mag": (b"Mesh=art/static/tree.gr2", True),
+    "art/static/bush.gr2": (b"", False),
+    }
+
+
+def test_tor_backend(tmp_path):
+    write_tor(str(tmp_path / "main_1.tor"), dict(list(TOR_FILES.items())[:3]))
+    write_tor(str(tmp_path / "main_2.tor"), dict(list(TOR_FILES.items())[3:]))
+    (tmp_path / "broken.tor").write_bytes(b"Not a .tor archive")
+    tor_backend = TorBackend([str(tmp_path / "broken.tor"), str(tmp_path / "main_1.tor"),
+                              str(tmp_path / "main_2.tor")])
+
+    for swtor_filepath, (file_data, _) in TOR_FILES.items():
+        assert tor_backend.isfile(swtor_filepath.upper())
+        assert tor_backend.read_bytes(swtor_filepath) == file_data
+        assert tor_backend.read_bytes(swtor_filepath, 3) == file_data[:3]
+        assert tor_backend.signature(swtor_filepath)[0] == len(file_data)
+    assert not tor_backend.isfile("art/static/missing.gr2")
+    assert tor_backend.read_bytes("art/static/missing.gr2") is None
+    assert tor_backend.signature("art/static/missing.gr2") is None
+    assert not tor_backend.isdir("art/static")
+
+    unpickled = pickle.loads(pickle.dumps(tor_backend))
+    assert unpickled.read_bytes("art/static/tree.gr2") == TOR_FILES["art/static/tree.gr2"][0]
+
+
+def test_zip_backend(tmp_path):
+    zip_filepath = str(tmp_path / "pack.zip")
+    with ZipFile(zip_filepath, "w", ZIP_DEFLATED) as pack:
+        pack.writestr("resources/Art/Static/Rock.gr2", b"GR2 rock" * 100)
+        pack.writestr("art/static/rock.mag", b"Mesh=art/static/rock.gr2")
+        pack.writestr("world/heightmaps/", b"")
+    zip_backend = ZipBackend(zip_filepath)
+
+    assert zip_backend.isfile("art\\static\\rock.gr2")
+    assert zip_backend.read_bytes("art/static/rock.gr2") == b"GR2 rock" * 100
+    assert zip_backend.read_bytes("art/static/rock.gr2", 3) == b"GR2"
+    assert zip_backend.signature("art/static/rock.gr2")[0] == 800
+    assert zip_backend.read_bytes("art/static/rock.mag") == b"Mesh=art/static/rock.gr2"
+    assert zip_backend.isdir("art/static") and zip_backend.isdir("World/HeightMaps")
+    assert zip_backend.isdir("art") and zip_backend.isdir("world")
+    assert not zip_backend.isfile("art/static")
+    assert zip_backend.read_bytes("art/static/missing.gr2") is None
+    assert zip_backend.signature("art/static/missing.gr2") is None
+
+    unpickled = pickle.loads(pickle.dumps(zip_backend))
+    assert unpickled.read_bytes("art/static/rock.mag") == b"Mesh=art/static/rock.gr2"
+
+    assert not ZipBackend(str(tmp_path / "missing.zip")).isfile("art/static/rock.gr2")
+
+
+def test_resources_vfs(tmp_path):
+    resources_folderpath = tmp_path / "resources"
+    resources_folderpath.joinpath("art", "static").mkdir(parents=True)
+    resources_folderpath.joinpath("art", "static", "rock.gr2").write_bytes(b"Extracted rock")
+
+    archives_folderpath = tmp_path / "assets"
+    archives_folderpath.mkdir()
+    write_tor(str(archives_folderpath / "main.tor"), TOR_FILES)
+    with ZipFile(str(archives_folderpath / "pack.zip"), "w") as pack:
+        pack.writestr("art/static/tree.gr2", b"Zipped tree")
+    (archives_folderpath / "readme.txt").write_bytes(b"")
+    assert [type(backend) for backend in archive_backends(str(archives_folderpath))] == [ZipBackend, TorBackend]
+
+    extract_folderpath = tmp_path / "extracted"
+    resources = open_resources_vfs(str(resources_folderpath), str(archives_folderpath),
+                                   str(tmp_path), str(extract_folderpath))
+    assert resources.has_archives
+
+    # The first backend holding a file wins.
+    assert resources.read_bytes("art/static/rock.gr2") == b"Extracted rock"
+    assert resources.read_bytes("art/static/tree.gr2") == b"Zipped tree"
+    assert resources.read_bytes("art/static/tree.mag") == TOR_FILES["art/static/tree.mag"][0]
+    assert resources.isdir("art/static")
+    assert not resources.isfile("art/static/missing.gr2")
+    assert resources.signature("art/static/missing.gr2") is None
+
+    assert resources.filepath("art/static/rock.gr2") == str(resources_folderpath.joinpath("art", "static", "rock.gr2"))
+    assert resources.original_filepath("art/static/rock.gr2") == resources.filepath("art/static/rock.gr2")
+    assert resources.original_filepath("art/static/tree.mag") is None
+
+    # Archived files are extracted once, when an actual file is needed.
+    mag_filepath = resources.filepath("art/static/tree.mag")
+    assert mag_filepath == str(extract_folderpath.joinpath("art", "static", "tree.mag"))
+    with open(mag_filepath, "rb") as mag_file:
+        assert mag_file.read() == TOR_FILES["art/static/tree.mag"][0]
+    mtime = os.stat(mag_filepath).st_mtime_ns
+    assert resources.filepath("art/static/tree.mag") == mag_filepath
+    assert os.stat(mag_filepath).st_mtime_ns == mtime
+
+    assert open_resources_vfs(str(resources_folderpath), str(archives_folderpath), str(tmp_path)) \
+        .filepath("art/static/tree.mag") is None
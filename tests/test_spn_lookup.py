@@ -0,0 +1,43 @@
+import os
+
+from swtor_area_assembler.spn_lookup import (SPN_TARGET_GR2, SPN_TARGET_DYN, SPN_TARGET_OTHER, SPN_INDEX_FILENAME,
+                                             get_spn_index, read_spn_table, spn_target_kind)
+
+
+SPN_TABLE_FILEPATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                  "swtor_area_assembler", "spn_table.txt")
+
+
+def test_shipped_spn_table(tmp_path):
+    spn_index = get_spn_index(SPN_TABLE_FILEPATH, str(tmp_path))
+
+    assert os.path.isfile(os.path.join(str(tmp_path), SPN_INDEX_FILENAME))
+    assert len(spn_index) == len(read_spn_table(SPN_TABLE_FILEPATH))
+    assert spn_index.lookup("spn/alliance/alderaan/broonmark/motorcade_speeder.spn_p") == \
+        (SPN_TARGET_GR2, "art/static/area/hth_hoth/vehicle/hth_veh_neu_speeder_02.gr2")
+    assert spn_index.lookup("spn/alliance/alderaan/broonmark/motorcade_speeder_crash_site.spn_p") == \
+        (SPN_TARGET_DYN, "dyn/alliance/alderaan/broonmark/motorcade_speeder_crash_site.dyn")
+    assert spn_index.lookup("spn/not/in/the/table.spn_p") is None
+
+
+def test_every_entry(tmp_path):
+    spn_table_filepath = tmp_path / "spn_table.txt"
+    spn_table_filepath.write_text(
+        "spn\\Zeta\\Last.spn_p,art\\Zeta\\LAST.gr2\n"
+        "spn\\alpha\\first.spn_p,dyn\\alpha\\first.dyn\n"
+        "spn\\middle\\weird.spn_p,art\\middle\\weird.dynmag\n"
+        "spn\\middle\\shared.spn_p,art\\zeta\\last.gr2\n"
+        )
+    spn_index = get_spn_index(str(spn_table_filepath), str(tmp_path / "cache"))
+
+    # Keys and targets are canonical, and so must be the paths looked up.
+    for spn_filepath, target_filepath in read_spn_table(str(spn_table_filepath)).items():
+        assert spn_index.lookup(spn_filepath) == (spn_target_kind(target_filepath), target_filepath)
+    assert spn_index.lookup("spn/zeta/last.spn_p") == (SPN_TARGET_GR2, "art/zeta/last.gr2")
+    assert spn_index.lookup("spn/middle/weird.spn_p")[0] == SPN_TARGET_OTHER
+    assert "spn/alpha/first.spn_p" in spn_index
+    assert "spn/alpha/second.spn_p" not in spn_index
+
+
+def test_missing_spn_table(tmp_path):
+    assert get_spn_index(str(tmp_path / "spn_table.txt"), str(tmp_path)) is None